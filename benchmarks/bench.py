@@ -0,0 +1,317 @@
+"""
+Throughput and latency benchmarks for the ingest to render path.
+
+Each case reports messages (or calls) per second, per item latency
+percentiles and the peak memory allocated while it ran. Memory is traced
+with tracemalloc, which slows every case down, pass --no-memory when only
+timings are compared.
+
+Usage:
+    python benchmarks/bench.py
+    python benchmarks/bench.py --ids 500 --messages 200000 --rate 5000
+    python benchmarks/bench.py --cases controller --view dpg --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import can
+import numpy as np
+
+from can_explorer.configs import Default
+from can_explorer.controllers import Controller
+from can_explorer.frames import Frames
+from can_explorer.headless import NullView
+from can_explorer.models import PlotModel
+from can_explorer.plot_data import convert_payloads
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+@dataclass
+class Result:
+    name: str
+    count: int
+    seconds: float
+    latencies: np.ndarray = field(repr=False)  # Seconds per item
+    peak: int | None = None  # Bytes
+
+    @property
+    def rate(self) -> float:
+        return self.count / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> dict:
+        percentiles = (
+            np.percentile(self.latencies, PERCENTILES)
+            if len(self.latencies)
+            else [0.0] * len(PERCENTILES)
+        )
+        return dict(
+            name=self.name,
+            count=self.count,
+            rate=round(self.rate),
+            **{
+                f"p{p}_us": round(value * 1e6, 2)
+                for p, value in zip(PERCENTILES, percentiles, strict=True)
+            },
+            max_us=round(float(self.latencies.max(initial=0)) * 1e6, 2),
+            peak_mib=None if self.peak is None else round(self.peak / 2**20, 2),
+        )
+
+
+@contextmanager
+def traced(enabled: bool) -> Iterator[list[int | None]]:
+    peak: list[int | None] = [None]
+    if enabled:
+        tracemalloc.start()
+    try:
+        yield peak
+    finally:
+        if enabled:
+            peak[0] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def generate_messages(count: int, ids: int, seed: int = 0) -> list[can.Message]:
+    rng = random.Random(seed)
+    return [
+        can.Message(
+            timestamp=index * 1e-4,
+            arbitration_id=rng.randrange(ids),
+            data=rng.randbytes(rng.randint(1, 8)),
+        )
+        for index in range(count)
+    ]
+
+
+def timed_calls(name: str, calls: list[Callable[[], object]], memory: bool) -> Result:
+    latencies = np.empty(len(calls))
+    with traced(memory) as peak:
+        start = time.perf_counter()
+        for index, call in enumerate(calls):
+            begin = time.perf_counter()
+            call()
+            latencies[index] = time.perf_counter() - begin
+        seconds = time.perf_counter() - start
+    return Result(name, len(calls), seconds, latencies, peak[0])
+
+
+def bench_add_message(args, messages: list[can.Message]) -> Result:
+    model = PlotModel()
+    return timed_calls(
+        "model.add_message",
+        [lambda message=message: model.add_message(message) for message in messages],
+        args.memory,
+    )
+
+
+def bench_add_frames(args, messages: list[can.Message]) -> Result:
+    model = PlotModel()
+    batches = [
+        Frames.from_messages(messages[index : index + Default.BATCH_SIZE])
+        for index in range(0, len(messages), Default.BATCH_SIZE)
+    ]
+    result = timed_calls(
+        "model.add_frames",
+        [lambda frames=frames: model.add_frames(frames) for frames in batches],
+        args.memory,
+    )
+    # Report per message figures, a batch is a single call
+    result.count = len(messages)
+    result.latencies = result.latencies / Default.BATCH_SIZE
+    return result
+
+
+def bench_get_data(args, messages: list[can.Message]) -> Result:
+    model = PlotModel()
+    model.add_frames(Frames.from_messages(messages))
+    ids = model.get_ids()
+    return timed_calls(
+        "model.get_data",
+        [lambda can_id=can_id: model.get_data(can_id) for can_id in ids * args.rounds],
+        args.memory,
+    )
+
+
+def bench_convert_payloads(args, messages: list[can.Message]) -> Result:
+    values = np.random.default_rng(0).random(Default.BUFFER_SIZE)
+    return timed_calls(
+        "convert_payloads",
+        [lambda: convert_payloads(values)] * (args.ids * args.rounds),
+        args.memory,
+    )
+
+
+def _plot_data(messages: list[can.Message]):
+    model = PlotModel()
+    model.add_frames(Frames.from_messages(messages))
+    return {can_id: model.get_data(can_id) for can_id in model.get_ids()}
+
+
+def bench_view_update_stub(args, messages: list[can.Message]) -> Result:
+    view = NullView()
+    data = _plot_data(messages)
+    return timed_calls(
+        "view.update[stub]",
+        [
+            lambda item=item: view.plot.update(*item)
+            for item in list(data.items()) * args.rounds
+        ],
+        args.memory,
+    )
+
+
+@contextmanager
+def hidden_view() -> Iterator:
+    """
+    Build the main view in a DearPyGui context that is never shown.
+    """
+    import dearpygui.dearpygui as dpg
+
+    from can_explorer.views import MainView
+
+    dpg.create_context()
+    try:
+        view = MainView()
+        view.ui.build()
+        yield view
+    finally:
+        dpg.destroy_context()
+
+
+def bench_view_update_dpg(args, messages: list[can.Message]) -> Result:
+    data = _plot_data(messages)
+    with hidden_view() as view:
+        view.plot.add_rows(*data)
+        view.plot.sync()
+        visible = [(can_id, data[can_id]) for can_id in view.plot.get_rows()]
+        return timed_calls(
+            "view.update[dpg]",
+            [
+                lambda item=item: view.plot.update(*item)
+                for item in visible * args.rounds
+            ],
+            args.memory,
+        )
+
+
+def bench_controller(args, messages: list[can.Message]) -> Result:
+    """
+    Send over the virtual interface and refresh until every message arrives.
+
+    Latency is measured from the send timestamp the virtual bus assigns
+    to the moment the batch holding the message reached the model.
+    """
+    channel = f"bench-{time.monotonic_ns()}"
+    tx = can.Bus(interface="virtual", channel=channel)
+    rx = can.Bus(interface="virtual", channel=channel)
+
+    @contextmanager
+    def null_view():
+        yield NullView()
+
+    view_context = hidden_view if args.view == "dpg" else null_view
+    received: list[np.ndarray] = []
+
+    with view_context() as view, traced(args.memory) as peak:
+        controller = Controller(PlotModel(), view, rx)
+        ingest = controller._ingest
+
+        def record_latency(frames: Frames) -> None:
+            ingest(frames)
+            received.append(time.time() - frames.timestamp)
+
+        controller._ingest = record_latency  # type: ignore [method-assign]
+
+        def send() -> None:
+            interval = 1 / args.rate if args.rate else 0.0
+            deadline = time.perf_counter()
+            for message in messages:
+                tx.send(message)
+                if interval:
+                    deadline += interval
+                    while time.perf_counter() < deadline:
+                        pass
+
+        controller.start()
+        sender = threading.Thread(target=send, daemon=True)
+        start = time.perf_counter()
+        sender.start()
+        while sum(map(len, received)) < len(messages) and (
+            sender.is_alive() or time.perf_counter() - start < args.timeout
+        ):
+            controller.refresh()
+            time.sleep(Default.REFRESH_RATE / 10)
+        seconds = time.perf_counter() - start
+        controller.stop()
+
+    tx.shutdown()
+    rx.shutdown()
+
+    latencies = np.concatenate(received) if received else np.empty(0)
+    name = f"controller[{args.view}, {args.rate or 'max'} msg/s]"
+    return Result(name, len(latencies), seconds, latencies, peak[0])
+
+
+CASES = {
+    "add_message": bench_add_message,
+    "add_frames": bench_add_frames,
+    "get_data": bench_get_data,
+    "convert_payloads": bench_convert_payloads,
+    "view_stub": bench_view_update_stub,
+    "view_dpg": bench_view_update_dpg,
+    "controller": bench_controller,
+}
+
+
+def format_table(rows: list[dict]) -> str:
+    columns = list(rows[0])
+    widths = [max(len(c), *(len(str(row[c])) for row in rows)) for c in columns]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths, strict=True))]
+    for row in rows:
+        lines.append(
+            "  ".join(
+                str(row[c]).ljust(w) for c, w in zip(columns, widths, strict=True)
+            )
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cases", default=",".join(CASES), help="comma separated")
+    parser.add_argument("--ids", type=int, default=100, help="distinct CAN id's")
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="controller send rate, 0 for max"
+    )
+    parser.add_argument("--rounds", type=int, default=20, help="calls per CAN id")
+    parser.add_argument("--view", choices=("null", "dpg"), default="null")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--json", action="store_true", help="emit JSON lines")
+    args = parser.parse_args()
+
+    messages = generate_messages(args.messages, args.ids)
+    results = []
+    for case in args.cases.split(","):
+        result = CASES[case](args, messages).summary()
+        results.append(result)
+        if args.json:
+            print(json.dumps(result), flush=True)
+
+    if not args.json:
+        print(format_table(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,29 @@
-from can_explorer.app import CanExplorer
-from can_explorer.controllers import Controller
-from can_explorer.models import PlotModel
-from can_explorer.views import MainView
+from __future__ import annotations
 
-_all__ = ["PlotModel", "MainView", "Controller", "CanExplorer"]
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from can_explorer.app import CanExplorer
+    from can_explorer.controllers import Controller
+    from can_explorer.models import PlotModel
+    from can_explorer.views import MainView
+
+# Exports are imported on first access so the headless pipeline
+# can run without importing DearPyGui
+_EXPORTS = {
+    "CanExplorer": "can_explorer.app",
+    "Controller": "can_explorer.controllers",
+    "PlotModel": "can_explorer.models",
+    "MainView": "can_explorer.views",
+}
+
+__all__ = ["CanExplorer", "Controller", "MainView", "PlotModel"]
+
+
+def __getattr__(name: str):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    return getattr(importlib.import_module(module), name)
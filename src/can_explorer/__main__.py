@@ -1,18 +1,102 @@
 import argparse
 import sys
 
-from can_explorer import CanExplorer
-from can_explorer.resources.demo import demo_config
+from can_explorer.profiling import StartupProfile
 
-parser = argparse.ArgumentParser()
-parser.add_argument("--demo", action="store_true")
-args = parser.parse_args()
 
-app = CanExplorer()
+def main() -> None:
+    profile = StartupProfile()
+    parser = argparse.ArgumentParser(prog="can-explorer")
+    parser.add_argument("--demo", action="store_true")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="receive without a GUI, DearPyGui is never imported",
+    )
+    parser.add_argument("-i", "--interface", help="python-can interface (headless)")
+    parser.add_argument(
+        "-c",
+        "--channel",
+        help="python-can channel, comma separated for several buses (headless)",
+    )
+    parser.add_argument("-b", "--bitrate", type=int, help="bitrate (headless)")
+    parser.add_argument("--fd", action="store_true", help="CAN FD bus (headless)")
+    parser.add_argument(
+        "--data-bitrate", type=int, help="CAN FD data phase bitrate (headless)"
+    )
+    parser.add_argument("--record", help="capture file to record to (headless)")
+    parser.add_argument(
+        "--metrics", help="JSON lines file to export pipeline metrics to"
+    )
+    parser.add_argument(
+        "--filters",
+        help="CAN id's to receive, e.g. '0x100/0x7F0,0x200-0x2FF' (headless)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        help="MiB of samples to keep, 0 for no limit (headless)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print where the time goes until the first frame is shown",
+    )
+    parser.add_argument(
+        "--duration", type=float, help="seconds to run before exiting (headless)"
+    )
+    args = parser.parse_args()
 
-if args.demo:
-    app.run(test_config=demo_config)
-else:
-    app.run()
+    if args.headless:
+        from can_explorer import headless
+        from can_explorer.filters import FrameFilter
+        from can_explorer.models import PlotModel
 
-sys.exit()
+        configs = []
+        for channel in (args.channel or "").split(","):
+            config = dict(
+                interface=args.interface,
+                channel=channel.strip(),
+                bitrate=args.bitrate,
+                fd=args.fd,
+                data_bitrate=args.data_bitrate,
+            )
+            configs.append({k: v for k, v in config.items() if v})
+        model = PlotModel()
+        if args.memory_budget is not None:
+            model.set_memory_budget(args.memory_budget * 2**20 or None)
+        controller = headless.run(
+            configs,
+            model=model,
+            duration=args.duration,
+            record=args.record,
+            metrics=args.metrics,
+            filters=FrameFilter.parse(args.filters or ""),
+        )
+        print(headless.summarize(controller))
+        sys.exit()
+
+    profile.enabled = args.profile_startup
+    with profile.stage("import numpy"):
+        import numpy  # noqa: F401
+    with profile.stage("import dearpygui"):
+        import dearpygui.dearpygui  # noqa: F401
+    with profile.stage("import can_explorer"):
+        from can_explorer import CanExplorer
+
+    app = CanExplorer()
+    app.controller.set_metrics_export(args.metrics)
+
+    if args.demo:
+        with profile.stage("import demo"):
+            from can_explorer.resources.demo import demo_config
+
+        app.run(test_config=demo_config, profile=profile)
+    else:
+        app.run(profile=profile)
+
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,23 @@ from __future__ import annotations
 
 import logging
 import sys
+import time
 from collections.abc import Callable
+from typing import TYPE_CHECKING
 
-import can
 import dearpygui.dearpygui as dpg
 
+from can_explorer.backpressure import Policy
 from can_explorer.configs import CANBus, Default
 from can_explorer.controllers import Controller
 from can_explorer.models import PlotModel
+from can_explorer.profiling import StartupProfile
 from can_explorer.tags import Tag
 from can_explorer.views import MainView
 
+if TYPE_CHECKING:
+    import can
+
 
 class CanExplorer:
     def __init__(
@@ -44,19 +50,55 @@ class CanExplorer:
         if tags is not None:
             self.view.tag = tags
 
+        self.profile = StartupProfile(enabled=False)
+
     def setup(self):
-        dpg.create_context()
+        with self.profile.stage("create context"):
+            dpg.create_context()
 
-        main_window = self.view.ui.build()
+        with self.profile.stage("build ui"):
+            main_window = self.view.ui.build()
 
-        self.view.settings.set_interface_options(CANBus.INTERFACES)
+        # Discovering interfaces imports python-can, which is slow
+        # to import and only needed once the settings are opened
+        self.view.settings.set_interface_options_loader(CANBus.get_interfaces)
         self.view.settings.set_baudrate_options(CANBus.BAUDRATES)
+        self.view.settings.set_data_bitrate_options(CANBus.DATA_BITRATES)
+        self.view.settings.set_policy_options(
+            [policy.value for policy in Policy], default=Policy.COALESCE.value
+        )
+        self.view.settings.set_policy_callback(self.controller.settings_policy_callback)
         self.view.settings.set_apply_button_callback(
             self.controller.settings_apply_button_callback
         )
         self.view.settings.set_can_id_format_callback(
             self.controller.settings_can_id_format_callback
         )
+        self.view.settings.set_filters_callback(
+            self.controller.settings_filters_callback
+        )
+        self.view.settings.set_dbc_load_callback(
+            self.controller.settings_dbc_load_callback
+        )
+        self.view.settings.set_byte_channels_callback(
+            self.controller.settings_byte_channels_callback
+        )
+        self.view.settings.set_group_channels_callback(
+            self.controller.settings_group_channels_callback
+        )
+        self.view.settings.set_time_window_callback(
+            self.controller.settings_time_window_callback
+        )
+        self.view.settings.set_record_callback(self.controller.settings_record_callback)
+        self.view.settings.set_log_open_callback(
+            self.controller.settings_log_open_callback
+        )
+        self.view.settings.set_metrics_overlay_callback(
+            self.controller.settings_metrics_overlay_callback
+        )
+        self.view.settings.set_memory_budget_callback(
+            self.controller.settings_memory_budget_callback
+        )
 
         self.view.set_main_button_label(self.controller.state)
         self.view.set_main_button_callback(self.controller.start_stop_button_callback)
@@ -68,19 +110,27 @@ class CanExplorer:
         self.view.set_plot_height_slider_callback(
             self.controller.plot_height_slider_callback
         )
-
-        dpg.create_viewport(
-            title=Default.TITLE, width=Default.WIDTH, height=Default.HEIGHT
+        self.view.set_timeline_slider_callback(self.controller.timeline_slider_callback)
+        self.view.heatmap.set_reset_button_callback(
+            self.controller.heatmap_reset_button_callback
         )
-        dpg.set_viewport_resize_callback(self.view.resize)
-        dpg.setup_dearpygui()
-        self.view.resize()
+
+        with self.profile.stage("create viewport"):
+            dpg.create_viewport(
+                title=Default.TITLE, width=Default.WIDTH, height=Default.HEIGHT
+            )
+            dpg.set_viewport_resize_callback(self.view.resize)
+            dpg.setup_dearpygui()
+            self.view.resize()
 
         dpg.set_primary_window(main_window, True)
 
     def teardown(self):
         if self.controller.is_active():
             self.controller.stop()
+        self.controller.set_recorder(None)
+        self.controller.close_log()
+        self.controller.set_metrics_export(None)
         dpg.destroy_context()
 
     def exception_handler(self, exc_type, exc_value, exc_traceback):
@@ -89,17 +139,70 @@ class CanExplorer:
         )
         self.view.popup_error(name=exc_type.__name__, info=exc_value)
 
-    def run(self, test_config: Callable | None = None, show: bool = True):
+    def run(
+        self,
+        test_config: Callable | None = None,
+        show: bool = True,
+        profile: StartupProfile | None = None,
+    ):
+        """
+        Show the app and render until it is closed.
+
+        Args:
+            test_config (Callable | None): Called with the app once set up
+            show (bool): Show the viewport
+            profile (StartupProfile | None): Printed once the first frame
+                is rendered
+        """
+        if profile is not None:
+            self.profile = profile
+
         self.setup()
 
         if test_config:
-            test_config(self)
+            with self.profile.stage("configure"):
+                test_config(self)
 
         sys.excepthook = self.exception_handler
 
         if show:
-            dpg.show_viewport()
-
-        dpg.start_dearpygui()
+            with self.profile.stage("show viewport"):
+                dpg.show_viewport()
+
+        # Render loop replaces dpg.start_dearpygui() so plots
+        # can be refreshed from the GUI thread between frames
+        overlay_deadline = memory_deadline = 0.0
+        while dpg.is_dearpygui_running():
+            self.controller.refresh()
+            self.controller.metrics.observe("frame", dpg.get_delta_time())
+
+            if (
+                self.view.settings.get_metrics_overlay()
+                and time.monotonic() >= overlay_deadline
+            ):
+                self.view.set_metrics(self.controller.get_metrics())
+                overlay_deadline = time.monotonic() + Default.METRICS_INTERVAL
+
+            if time.monotonic() >= memory_deadline:
+                self.view.set_memory_usage(
+                    self.model.get_memory_usage(), self.model.get_memory_budget()
+                )
+                memory_deadline = time.monotonic() + Default.METRICS_INTERVAL
+
+            if self.view.statistics.is_shown():
+                self.view.statistics.update(self.model.get_statistics())
+
+            if self.view.heatmap.is_shown():
+                self.view.heatmap.update(*self.model.get_toggles())
+
+            if self.profile.enabled:
+                # The first frame includes building the font atlas
+                with self.profile.stage("first frame"):
+                    dpg.render_dearpygui_frame()
+                print(self.profile.report(), flush=True)
+                self.profile.enabled = False
+                continue
+
+            dpg.render_dearpygui_frame()
 
         self.teardown()
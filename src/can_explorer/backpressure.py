@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import enum
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from can_explorer.configs import Default
+from can_explorer.frames import Frames
+
+
+class Policy(str, enum.Enum):
+    """
+    How the ingest queue sheds load once the model falls behind.
+
+    COALESCE: Keep only the latest frame of each CAN id in the backlog.
+    DECIMATE: Limit every CAN id in the backlog to a maximum rate,
+        dropping the oldest frames if the queue still fills up.
+    DROP_OLDEST: Discard the oldest frames in the backlog.
+    """
+
+    COALESCE = "Coalesce"
+    DECIMATE = "Decimate"
+    DROP_OLDEST = "Drop Oldest"
+
+
+def latest_per_id(frames: Frames) -> Frames:
+    """
+    Reduce frames to the most recent one of each CAN id, in arrival order.
+    """
+    reverse = frames.keys()[::-1]
+    _, first = np.unique(reverse, return_index=True)
+    return frames[np.sort(len(frames) - 1 - first)]
+
+
+class IngestQueue:
+    """
+    Bounded queue of frame batches between the receive threads and the model.
+
+    Receive threads never block, when the queue holds more than its capacity
+    the policy decides which frames are skipped. Frames are counted as shed
+    so what is missing from the model is always explicit.
+    """
+
+    def __init__(
+        self,
+        capacity: int = Default.QUEUE_CAPACITY,
+        policy: Policy = Policy.COALESCE,
+        rate_limit: float = Default.DECIMATE_RATE,
+    ) -> None:
+        self.capacity = capacity
+        self.policy = policy
+        self.rate_limit = rate_limit
+        self.shed = 0
+
+        self._batches: deque[Frames] = deque()
+        self._size = 0
+        self._last_shed = -np.inf
+        self._slots: dict[int, int] = {}  # Last rate limited slot of each CAN id
+        self._ready = threading.Condition()
+        self._shed_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def is_shedding(self, hold: float = Default.SHEDDING_HOLD) -> bool:
+        """
+        Check if frames were shed within the last hold seconds.
+        """
+        return time.monotonic() - self._last_shed < hold
+
+    def put(self, frames: Frames) -> None:
+        with self._ready:
+            self._batches.append(frames)
+            self._size += len(frames)
+            if self._size > self.capacity:
+                self._overflow()
+            self._ready.notify()
+
+    def get(self, timeout: float | None = None) -> Frames | None:
+        """
+        Take every queued frame as a single batch.
+
+        Returns:
+            Frames | None: None if nothing arrived within the timeout
+        """
+        with self._ready:
+            if not self._size and not self._ready.wait_for(lambda: self._size, timeout):
+                return None
+            frames = Frames.concatenate(list(self._batches))
+            self._batches.clear()
+            self._size = 0
+        return frames
+
+    def _skip(self, count: int) -> None:
+        if count > 0:
+            with self._shed_lock:
+                self.shed += count
+                self._last_shed = time.monotonic()
+
+    def _overflow(self) -> None:
+        if self.policy == Policy.COALESCE:
+            frames = Frames.concatenate(list(self._batches))
+            kept = latest_per_id(frames)
+            self._batches = deque([kept])
+            self._size = len(kept)
+            self._skip(len(frames) - len(kept))
+        elif self.policy == Policy.DECIMATE:
+            kept = self._decimate(Frames.concatenate(list(self._batches)))
+            self._batches = deque([kept])
+            self._size = len(kept)
+
+        # Coalescing or decimating alone may not shrink the backlog enough
+        while self._size > self.capacity and len(self._batches) > 1:
+            dropped = self._batches.popleft()
+            self._size -= len(dropped)
+            self._skip(len(dropped))
+
+        if self._size > self.capacity:
+            # A single batch larger than the queue keeps its newest frames
+            excess = self._size - self.capacity
+            self._batches[0] = self._batches[0][excess:]
+            self._size -= excess
+            self._skip(excess)
+
+    def _decimate(self, frames: Frames) -> Frames:
+        if not len(frames):
+            return frames
+
+        # Keep the first frame of each CAN id within every 1 / rate_limit slot
+        slots = np.floor(frames.timestamp * self.rate_limit).astype(np.int64)
+        ids = frames.keys()
+        _, first = np.unique(np.stack((ids, slots), axis=1), axis=0, return_index=True)
+        first.sort()
+
+        # A slot already kept by a previous batch is not kept again, only the
+        # first slot of each CAN id in this batch can have been
+        ids, slots = ids[first], slots[first]
+        keep = np.ones(len(first), dtype=bool)
+        unique, earliest = np.unique(ids, return_index=True)
+        for can_id, position in zip(unique.tolist(), earliest.tolist(), strict=True):
+            keep[position] = self._slots.get(can_id) != slots[position]
+
+        _, latest = np.unique(ids[::-1], return_index=True)
+        latest = len(ids) - 1 - latest
+        self._slots.update(zip(unique.tolist(), slots[latest].tolist(), strict=True))
+
+        kept = first[keep]
+        self._skip(len(frames) - len(kept))
+        return frames[kept]
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from multiprocessing import shared_memory
+
+import can
+import numpy as np
+
+from can_explorer.configs import Default
+from can_explorer.frames import Frames
+from can_explorer.ingest import receive_batch
+from can_explorer.payloads import FD_PAYLOAD_WIDTH, PAYLOAD_WIDTH, fit_payloads
+
+_HEADER = 64  # Keeps the frame arrays cache line aligned
+
+
+class FrameRing:
+    """
+    Single producer, single consumer ring of CAN frames in shared memory.
+
+    Frames are stored as parallel arrays behind a header holding the total
+    number of frames written. The producer publishes a batch by bumping the
+    count after its frames are written, the consumer keeps its own read count
+    and receives views straight into the shared arrays.
+    """
+
+    def __init__(
+        self,
+        shm: shared_memory.SharedMemory,
+        capacity: int,
+        owner: bool,
+        width: int = PAYLOAD_WIDTH,
+    ) -> None:
+        self.shm = shm
+        self.capacity = capacity
+        self.width = width
+        self.lost = 0
+        self._owner = owner
+        self._read = 0
+
+        offset = _HEADER
+        arrays = {}
+        for name, dtype, shape in self._layout(capacity, width):
+            arrays[name] = np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)
+            offset += arrays[name].nbytes
+
+        self._count = np.ndarray((1,), np.uint64, buffer=shm.buf, offset=0)
+        self._frames = Frames(**arrays)
+
+    @staticmethod
+    def _layout(capacity: int, width: int):
+        return (
+            ("timestamp", np.float64, (capacity,)),
+            ("arbitration_id", np.uint32, (capacity,)),
+            ("dlc", np.uint8, (capacity,)),
+            ("flags", np.uint8, (capacity,)),
+            ("payload", np.uint8, (capacity, width)),
+        )
+
+    @classmethod
+    def nbytes(cls, capacity: int, width: int = PAYLOAD_WIDTH) -> int:
+        return _HEADER + sum(
+            np.dtype(dtype).itemsize * int(np.prod(shape))
+            for _, dtype, shape in cls._layout(capacity, width)
+        )
+
+    @classmethod
+    def create(
+        cls, capacity: int = Default.RING_CAPACITY, width: int = PAYLOAD_WIDTH
+    ) -> FrameRing:
+        shm = shared_memory.SharedMemory(create=True, size=cls.nbytes(capacity, width))
+        ring = cls(shm, capacity, owner=True, width=width)
+        ring._count[0] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, capacity: int, width: int = PAYLOAD_WIDTH) -> FrameRing:
+        # Spawned children share the resource tracker of their parent,
+        # so attaching does not hand ownership of the memory to the child
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, capacity, owner=False, width=width)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def written(self) -> int:
+        return int(self._count[0])
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of frames published but not yet read.
+        """
+        return min(self.written - self._read, self.capacity)
+
+    def write(self, frames: Frames) -> None:
+        """
+        Publish a batch of frames, overwriting the oldest if the ring is full.
+        """
+        count, total = self.written, len(frames)
+
+        # Frames that would be overwritten within this batch are skipped
+        frames = frames[-self.capacity :]
+        index = (count + total - len(frames) + np.arange(len(frames))) % self.capacity
+        for name in ("timestamp", "arbitration_id", "dlc", "flags"):
+            getattr(self._frames, name)[index] = getattr(frames, name)
+        self._frames.payload[index] = fit_payloads(frames.payload, self.width)
+
+        self._count[0] = count + total
+
+    def read(self, limit: int | None = None) -> Frames:
+        """
+        Get the frames published since the previous read.
+
+        The returned arrays are views into shared memory and are only valid
+        until the producer laps the ring, consume or copy them promptly.
+        A read never wraps, frames past the end of the ring are returned by
+        the next call.
+
+        Args:
+            limit (int | None): Maximum number of frames to return
+
+        Returns:
+            Frames: Empty if nothing new was published
+        """
+        written = self.written
+        if written - self._read > self.capacity:
+            # Producer lapped the consumer, skip to the oldest intact frame
+            self.lost += written - self._read - self.capacity
+            self._read = written - self.capacity
+
+        start = self._read % self.capacity
+        stop = min(self.capacity, start + (written - self._read))
+        if limit is not None:
+            stop = min(stop, start + limit)
+
+        self._read += stop - start
+        return self._frames[start:stop]
+
+    def close(self) -> None:
+        # Views must be released before the buffer can be closed
+        del self._count, self._frames
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def _capture(
+    config: dict,
+    name: str,
+    capacity: int,
+    width: int,
+    running,
+    batch_size: int,
+    timeout: float,
+) -> None:
+    """
+    Entry point of the capture process, must be importable for spawn.
+    """
+    ring = FrameRing.attach(name, capacity, width)
+    try:
+        bus = can.Bus(**config)
+        try:
+            while running.is_set():
+                messages = receive_batch(bus, batch_size, timeout=timeout)
+                if messages:
+                    ring.write(Frames.from_messages(messages))
+        finally:
+            bus.shutdown()
+    finally:
+        ring.close()
+
+
+class CaptureProcess:
+    """
+    Owns a CAN bus in a separate process and streams its frames to this one.
+
+    The capture process receives from the bus on its own core and writes into
+    a shared memory FrameRing, while a reader thread in this process hands
+    new frames to a callback without copying them out of the ring first.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        callback: Callable[[Frames], None],
+        capacity: int = Default.RING_CAPACITY,
+        batch_size: int = Default.BATCH_SIZE,
+        poll_interval: float = Default.BATCH_LATENCY,
+    ) -> None:
+        self.config = config
+        # CAN FD buses need the full 64 bytes, classic ones keep the ring small
+        width = FD_PAYLOAD_WIDTH if config.get("fd") else PAYLOAD_WIDTH
+        self.ring = FrameRing.create(capacity, width)
+        self._callback = callback
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+
+        context = multiprocessing.get_context("spawn")
+        self._running = context.Event()
+        self._process = context.Process(
+            target=_capture,
+            args=(
+                config,
+                self.ring.name,
+                capacity,
+                width,
+                self._running,
+                batch_size,
+                Default.RECV_TIMEOUT,
+            ),
+            name="can-explorer-capture",
+            daemon=True,
+        )
+        self._reader = threading.Thread(
+            target=self._read, name="can-explorer-ring-reader", daemon=True
+        )
+
+    @property
+    def lost(self) -> int:
+        """
+        Number of frames overwritten before they could be read.
+        """
+        return self.ring.lost
+
+    def start(self) -> None:
+        self._running.set()
+        self._process.start()
+        self._reader.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._running.clear()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._reader.join(timeout)
+
+        # Frames written after the reader last polled are still handed off
+        if not self._reader.is_alive():
+            while len(frames := self.ring.read(self._batch_size)):
+                self._callback(frames)
+
+    def close(self) -> None:
+        """
+        Release the ring, frames read from it must no longer be accessed.
+        """
+        self.ring.close()
+
+    def _read(self) -> None:
+        while self._running.is_set():
+            frames = self.ring.read(self._batch_size)
+            if len(frames):
+                self._callback(frames)
+            elif not self._process.is_alive():
+                break  # Capture process exited, e.g. the bus failed to open
+            else:
+                time.sleep(self._poll_interval)
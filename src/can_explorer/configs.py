@@ -1,7 +1,6 @@
+import functools
 from typing import Final
 
-from can.interfaces import VALID_INTERFACES
-
 from can_explorer.resources import DIR_PATH as RESOURCES_DIR
 
 
@@ -10,21 +9,50 @@ class Default:
     HEIGHT: Final = 600
     REFRESH_RATE: Final = 0.05
     BACKGROUND: Final = (50, 50, 50, 255)
+    WARNING: Final = (255, 165, 0, 255)
     FONT_HEIGHT: Final = 14
     PLOT_HEIGHT: Final = 100
     PLOT_HEIGHT_MAX: Final = 500
+    ROW_SPACING: Final = 8  # Table cell padding and item spacing
     BUFFER_MIN: Final = 50
     BUFFER_MAX: Final = 2500
     BUFFER_SIZE: Final = 100
+    MEMORY_BUDGET: Final = 256 * 2**20  # Bytes of sample storage
+    WINDOW_LENGTH: Final = 10.0
+    BATCH_SIZE: Final = 512
+    BATCH_LATENCY: Final = 0.01
+    RECV_TIMEOUT: Final = 0.1
+    RING_CAPACITY: Final = 1 << 16
+    RECORD_CHUNK: Final = 4096
+    RECORD_FLUSH: Final = 1.0
+    LOG_CHUNK: Final = 8192
+    METRICS_INTERVAL: Final = 1.0
+    QUEUE_CAPACITY: Final = 1 << 16
+    DECIMATE_RATE: Final = 100.0  # Frames per second per CAN id
+    SHEDDING_HOLD: Final = 1.0
+    HEATMAP_ROWS: Final = 64  # Initial texture height, doubled as needed
     ID_FORMAT: Final = hex
     LABEL_COLUMN_WIDTH: Final = 15
     PLOT_COLUMN_WIDTH: Final = 85
     TITLE: Final = "CAN Explorer"
     FONT: Final = RESOURCES_DIR / "Inter-Medium.ttf"
     FOOTER_OFFSET: Final = 50
+    FOOTER_HEIGHT: Final = 155
+    OVERLAY_HEIGHT: Final = 95
 
 
 class CANBus:
-    INTERFACES: Final = sorted(list(VALID_INTERFACES))
     _BAUDRATES = [33_333, 125_000, 250_000, 500_000, 1_000_000]
     BAUDRATES: Final = [format(i, "_d") for i in _BAUDRATES]
+    _DATA_BITRATES = [1_000_000, 2_000_000, 4_000_000, 5_000_000, 8_000_000]
+    DATA_BITRATES: Final = [format(i, "_d") for i in _DATA_BITRATES]
+
+    @staticmethod
+    @functools.cache
+    def get_interfaces() -> list[str]:
+        """
+        Discover the interfaces python-can supports, importing it on first use.
+        """
+        from can.interfaces import VALID_INTERFACES
+
+        return sorted(VALID_INTERFACES)
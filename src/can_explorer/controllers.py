@@ -1,13 +1,38 @@
 from __future__ import annotations
 
 import enum
+import functools
+import threading
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from queue import Queue
+from typing import TYPE_CHECKING
 
-import can
-from can.bus import BusABC
+import numpy as np
 
+from can_explorer.backpressure import IngestQueue, Policy
 from can_explorer.configs import Default
+from can_explorer.dbc import SignalDatabase
+from can_explorer.filters import FrameFilter, has_driver_filters
+from can_explorer.frames import MAX_CHANNELS, Frames
+from can_explorer.metrics import MetricsExporter, PipelineMetrics
 from can_explorer.models import PlotModel
-from can_explorer.views import MainView
+from can_explorer.payloads import FD_PAYLOAD_WIDTH, PAYLOAD_WIDTH
+from can_explorer.recording import CaptureWriter
+from can_explorer.scheduler import RenderScheduler
+
+# python-can and the modules built on it are imported when first
+# needed, creating a controller must not slow down the app startup
+if TYPE_CHECKING:
+    import can
+    from can.bus import BusABC
+
+    from can_explorer.capture import CaptureProcess
+    from can_explorer.ingest import IngestWorker
+    from can_explorer.logs import LogFile
+    from can_explorer.protocols import View
+    from can_explorer.views import MainView
 
 
 class State(enum.Flag):
@@ -19,16 +44,36 @@ class Controller:
     def __init__(
         self,
         model: PlotModel,
-        view: MainView,
+        view: MainView | View,
         bus: BusABC | None = None,
+        recorder: CaptureWriter | None = None,
         refresh_rate: float | None = Default.REFRESH_RATE,
+        batch_size: int | None = Default.BATCH_SIZE,
+        max_latency: float = Default.BATCH_LATENCY,
+        policy: Policy = Policy.COALESCE,
     ) -> None:
         self.model = model
         self.view = view
-        self.notififer: can.Notifier | None = None
+        self.notifiers: list[can.Notifier] = []
+        self.workers: list[IngestWorker] = []
+        self.captures: list[CaptureProcess] = []
+        self.queue: IngestQueue | None = None
+        self.recorder = recorder
+        self.log: LogFile | None = None
 
-        self._bus = bus
-        self._rate = refresh_rate
+        self.scheduler = RenderScheduler(refresh_rate)
+        self.metrics = PipelineMetrics()
+        self.exporter: MetricsExporter | None = None
+
+        self._buses: list[BusABC] = [bus] if bus is not None else []
+        self._capture_configs: list[dict] | None = None
+        self.channels: list[str] = []
+        self._filter: FrameFilter | None = None
+        self._batch_size = batch_size
+        self._max_latency = max_latency
+        self._policy = policy
+        self._processor: threading.Thread | None = None
+        self._shedding = False
         self._state = State.STOPPED
 
     @property
@@ -36,24 +81,138 @@ class Controller:
         return self._state
 
     @property
-    def bus(self) -> BusABC:
-        if self._bus is None:
+    def buses(self) -> list[BusABC]:
+        if not self._buses:
             raise RuntimeError("Must apply settings before starting")
-        return self._bus
+        return list(self._buses)
+
+    @property
+    def bus(self) -> BusABC:
+        return self.buses[0]
 
     def is_active(self) -> bool:
         return bool(self.state)
 
-    def set_bus(self, bus: BusABC) -> None:
+    def set_bus(self, bus: BusABC | None) -> None:
         """
         Set CAN bus to use during controller loop.
         """
-        self._bus = bus
+        self.set_buses([bus] if bus is not None else [])
+
+    def set_buses(
+        self, buses: Sequence[BusABC], channels: Sequence[str] | None = None
+    ) -> None:
+        """
+        Receive from several CAN buses at once, each with its own ingest worker.
+
+        Frames are marked with the index of their bus, so the model keys
+        them by channel and CAN id, see frames.make_key.
+
+        Args:
+            buses (Sequence[BusABC])
+            channels (Sequence[str] | None): Name of each bus, defaults to
+                its index
+
+        Raises:
+            ValueError: If there are more buses than channels can be marked.
+        """
+        if len(buses) > MAX_CHANNELS:
+            raise ValueError(f"At most {MAX_CHANNELS} buses are supported")
+
+        self._buses = list(buses)
+        self._set_channels(
+            channels or [str(index) for index in range(len(self._buses))]
+        )
+        self._apply_filters()
+
+    def set_capture(self, config: dict | Sequence[dict] | None) -> None:
+        """
+        Capture from buses owned by separate processes instead of set_buses.
+
+        Each bus gets a capture process of its own, so receiving from
+        several buses is spread over as many cores.
+
+        Args:
+            config (dict | Sequence[dict] | None): Keyword arguments for
+                can.Bus in the capture process, one per bus, None to receive
+                from the buses in this process
+
+        Raises:
+            ValueError: If there are more buses than channels can be marked.
+        """
+        configs = [config] if isinstance(config, dict) else config
+        if configs is not None:
+            if len(configs) > MAX_CHANNELS:
+                raise ValueError(f"At most {MAX_CHANNELS} buses are supported")
+            self._set_channels(
+                [str(c.get("channel", index)) for index, c in enumerate(configs)]
+            )
+
+        self._capture_configs = list(configs) if configs is not None else None
+        self._apply_filters()
+
+    def _set_channels(self, channels: Sequence[str]) -> None:
+        self.channels = list(channels)
+        self.view.set_channels(self.channels)
+
+    def set_filters(self, frame_filter: FrameFilter | None) -> None:
+        """
+        Only receive the CAN id's a filter accepts.
+
+        The filters are pushed down to the bus so drivers that support it
+        discard frames before Python sees them, otherwise the model discards
+        them in batches. A capture process takes new filters on its next start.
+
+        Args:
+            frame_filter (FrameFilter | None): None to receive every CAN id
+        """
+        self._filter = frame_filter or None
+        self._apply_filters()
+
+    def _apply_filters(self) -> None:
+        can_filters = self._filter.to_can_filters() if self._filter else None
+
+        # python-can would otherwise check every message in Python
+        # when the driver cannot filter, the model is faster at that
+        offloaded = False
+        if self._capture_configs is None and self._buses:
+            offloaded = can_filters is not None and all(
+                has_driver_filters(bus) for bus in self._buses
+            )
+            for bus in self._buses:
+                bus.set_filters(can_filters if offloaded else None)
+
+        self.model.set_filter(None if offloaded else self._filter)
+
+    def set_recorder(self, recorder: CaptureWriter | None) -> None:
+        """
+        Set the capture file every received frame is written to.
+
+        The previous recorder, if any, is closed.
+        """
+        previous, self.recorder = self.recorder, recorder
+        if previous is not None:
+            previous.close()
+
+    def set_policy(self, policy: Policy) -> None:
+        """
+        Set how load is shed once the model falls behind the bus.
+        """
+        self._policy = policy
+        if self.queue is not None:
+            self.queue.policy = policy
 
     def start(self) -> None:
         """
         Initialize and start the controller loop.
 
+        Messages of each bus are received in batches by an ingest worker
+        unless the batch size is None, in which case a notifier delivers them
+        one by one. If capture configurations are set, a capture process per
+        bus receives them.
+        Received frames are recorded immediately and queued for a processing
+        thread that appends them to the model, shedding load per the policy.
+
         Raises:
             Exception: If CAN bus does not exist.
         """
@@ -61,7 +220,58 @@ class Controller:
         if self.state == State.RUNNING:
             raise RuntimeError("App is already running")
 
-        self.notifier = can.Notifier(self.bus, [self._on_message_received])
+        configs = self._capture_configs
+        buses = self.buses if configs is None else []
+
+        self.close_log()
+        self.queue = IngestQueue(policy=self._policy)
+
+        if configs is not None:
+            from can_explorer.capture import CaptureProcess
+
+            can_filters = self._filter.to_can_filters() if self._filter else None
+            self.captures = [
+                CaptureProcess(
+                    dict(config, can_filters=can_filters),
+                    functools.partial(self._on_frames_received, channel=index),
+                    batch_size=self._batch_size or Default.BATCH_SIZE,
+                )
+                for index, config in enumerate(configs)
+            ]
+            for capture in self.captures:
+                capture.start()
+        elif self._batch_size:
+            from can_explorer.ingest import IngestWorker
+
+            self.workers = [
+                IngestWorker(
+                    bus,
+                    functools.partial(self._on_messages_received, channel=index),
+                    batch_size=self._batch_size,
+                    max_latency=self._max_latency,
+                )
+                for index, bus in enumerate(buses)
+            ]
+            for worker in self.workers:
+                worker.start()
+        else:
+            import can
+
+            self.notifiers = [
+                can.Notifier(
+                    bus, [functools.partial(self._on_message_received, channel=index)]
+                )
+                for index, bus in enumerate(buses)
+            ]
+
+        self._processor = threading.Thread(
+            target=self._process,
+            args=(self.queue,),
+            name="can-explorer-processor",
+            daemon=True,
+        )
+        self._processor.start()
+
         self.view.set_main_button_label(True)
         self._state = State.RUNNING
 
@@ -72,14 +282,231 @@ class Controller:
         if self.state == State.STOPPED:
             return
 
-        self.notifier.stop()
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
+
+        for notifier in self.notifiers:
+            notifier.stop()
+        self.notifiers = []
+
+        for capture in self.captures:
+            capture.stop()
+
+        # The processor exits once the queue is detached, whatever
+        # it did not get to is ingested before returning
+        queue, self.queue = self.queue, None
+        if self._processor is not None:
+            self._processor.join()
+            self._processor = None
+        if queue is not None:
+            remaining = queue.get(timeout=0)
+            if remaining is not None:
+                self._ingest(remaining)
+            self.metrics.count("shed", queue.shed)
+
+        # Rings are only released once nothing read from them is pending,
+        # their losses are counted by get_metrics until they are detached
+        captures, self.captures = self.captures, []
+        for capture in captures:
+            self.metrics.count("dropped", capture.lost)
+            capture.close()
+
+        if self.recorder is not None:
+            self.recorder.flush()
+
         self.view.set_main_button_label(False)
         self._state = State.STOPPED
 
-    def _on_message_received(self, message: can.Message):
-        self.model.add_message(message)
-        plot_data = self.model.get_data(message.arbitration_id)
-        self.view.plot.update(message.arbitration_id, plot_data)
+    def open_log(self, path: str) -> None:
+        """
+        Load a log file for offline viewing, replacing the current data.
+
+        Args:
+            path (str): Log in any format python-can reads, or a capture file
+
+        Raises:
+            RuntimeError: If the controller is running.
+        """
+        if self.is_active():
+            raise RuntimeError("App must be stopped before opening a log")
+
+        self.close_log()
+        self.model.clear()
+        self.view.plot.clear()
+
+        from can_explorer.logs import LogFile
+
+        self.log = LogFile.open(path)
+        start, end = self.log.get_time_range()
+        self.view.set_timeline(end - start)
+        self.seek(end)
+
+    def close_log(self) -> None:
+        if self.log is None:
+            return
+        self.log.close()
+        self.log = None
+        self.view.set_timeline(None)
+
+    def seek(self, timestamp: float) -> None:
+        """
+        Show the window of the open log ending at a timestamp.
+
+        Args:
+            timestamp (float): Absolute timestamp within the log
+        """
+        if self.log is None:
+            return
+
+        history = self.model.get_history()
+        frames = Frames.concatenate(
+            [self.log.last(can_id, history, timestamp) for can_id in self.log.get_ids()]
+        )
+
+        self.model.clear()
+        self.model.add_frames(frames)
+        self.scheduler.mark(*np.unique(frames.keys()).tolist())
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Redraw every visible plot that received data since the previous refresh.
+
+        Rows scrolled into view are drawn immediately. Must be called
+        from the GUI thread, typically once per frame.
+
+        Args:
+            force (bool): Redraw even if the refresh period has not elapsed
+        """
+        # CAN id's evicted to stay within the memory budget lose their rows
+        evicted = self.model.pop_evicted()
+        if evicted:
+            self.view.plot.remove_rows(*evicted)
+            self.metrics.count("evicted", len(evicted))
+
+        dirty = set()
+        if force or self.scheduler.is_due():
+            dirty = self.scheduler.drain() - evicted
+            self.view.plot.add_rows(*dirty)
+
+        queue = self.queue
+        shedding = queue is not None and queue.is_shedding()
+        if shedding != self._shedding:
+            self._shedding = shedding
+            self.view.set_shedding(queue.policy if shedding else None)
+
+        dirty |= self.view.plot.sync()
+        if not dirty:
+            return
+
+        start = time.perf_counter()
+        drawn = 0
+        for can_id in self.view.plot.get_rows():
+            if can_id in dirty:
+                plot_data = self.model.get_data(can_id)
+                self.view.plot.update(can_id, plot_data)
+                drawn += 1
+
+        if drawn:
+            self.metrics.observe("render", time.perf_counter() - start)
+            self.metrics.count("rows_drawn", drawn)
+
+    def get_metrics(self) -> dict:
+        """
+        Get a snapshot of the pipeline counters and stage latencies.
+
+        Returns:
+            dict: JSON serializable metrics, queue_depth is None if the
+            receive queue cannot be measured for the current source
+        """
+        dropped = self.metrics.get_count("dropped")
+        dropped += sum(capture.lost for capture in list(self.captures))
+
+        shed = self.metrics.get_count("shed")
+        queue = self.queue
+        if queue is not None:
+            shed += queue.shed
+
+        return self.metrics.snapshot(
+            queue_depth=self._queue_depth(),
+            ingest_queue=len(queue) if queue is not None else 0,
+            dropped=dropped,
+            shed=shed,
+            policy=self._policy.value,
+            memory=self.model.get_memory_usage(),
+        )
+
+    def _queue_depth(self) -> int | None:
+        captures = list(self.captures)
+        if captures:
+            return sum(capture.ring.pending for capture in captures)
+
+        # Interfaces that buffer in a python queue, e.g. virtual
+        queues = [getattr(bus, "queue", None) for bus in self._buses]
+        if not queues or not all(isinstance(queue, Queue) for queue in queues):
+            return None
+        return sum(queue.qsize() for queue in queues)
+
+    def set_metrics_export(
+        self, path: str | Path | None, interval: float = Default.METRICS_INTERVAL
+    ) -> None:
+        """
+        Periodically append metric snapshots to a JSON lines file.
+
+        Args:
+            path (str | Path | None): None to stop exporting
+            interval (float): Seconds between snapshots
+        """
+        if self.exporter is not None:
+            self.exporter.stop()
+            self.exporter = None
+
+        if path is not None:
+            self.exporter = MetricsExporter(self.get_metrics, path, interval)
+            self.exporter.start()
+
+    def _process(self, queue: IngestQueue) -> None:
+        while self.queue is queue:
+            frames = queue.get(timeout=Default.RECV_TIMEOUT)
+            if frames is not None:
+                self._ingest(frames)
+
+    def _ingest(self, frames: Frames) -> None:
+        start = time.perf_counter()
+        self.model.add_frames(frames)
+        self.metrics.observe("append", time.perf_counter() - start)
+        self.metrics.count("batches")
+
+        # Frames that will not get a redraw of their own
+        marked = self.scheduler.mark(*np.unique(frames.keys()).tolist())
+        self.metrics.count("coalesced", len(frames) - marked)
+
+        # Only meaningful when the interface timestamps with the host clock
+        latency = time.time() - frames.timestamp
+        self.metrics.observe_many("receive", latency[(latency >= 0) & (latency < 60)])
+
+    def _on_message_received(self, message: can.Message, channel: int = 0):
+        self._on_frames_received(Frames.from_messages([message]), channel)
+
+    def _on_messages_received(self, messages: list[can.Message], channel: int = 0):
+        self._on_frames_received(Frames.from_messages(messages), channel)
+
+    def _on_frames_received(self, frames: Frames, channel: int = 0):
+        if channel:
+            frames = frames.with_channel(channel)
+        self.metrics.count("frames", len(frames))
+
+        # Every frame is recorded, whatever the model ends up shedding
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.write(frames)
+
+        queue = self.queue
+        if queue is None:
+            self._ingest(frames)
+        else:
+            # Frames may view a capture ring the producer keeps overwriting
+            queue.put(frames.copy())
 
     def start_stop_button_callback(self, *args, **kwargs) -> None:
         self.stop() if self.is_active() else self.start()
@@ -87,27 +514,96 @@ class Controller:
     def clear_button_callback(self, *args, **kwargs) -> None:
         self.view.plot.clear()
 
+    def heatmap_reset_button_callback(self, *args, **kwargs) -> None:
+        self.model.reset_toggles()
+
     def plot_buffer_slider_callback(self, *args, **kwargs) -> None:
         self.model.set_limit(self.view.get_plot_buffer())
-        for can_id in self.view.plot.get_rows():
-            plot_data = self.model.get_data(can_id)
-            self.view.plot.update(can_id, plot_data)
+        self.scheduler.mark(*self.view.plot.get_ids())
 
     def plot_height_slider_callback(self, *args, **kwargs) -> None:
         self.view.plot.set_height(self.view.get_plot_height())
 
+    def timeline_slider_callback(self, *args, **kwargs) -> None:
+        if self.log is not None:
+            start, _ = self.log.get_time_range()
+            self.seek(start + self.view.get_timeline())
+
     def settings_apply_button_callback(self, *args, **kwargs) -> None:
         if self.is_active():
             raise RuntimeError("App must be stopped before applying new settings")
 
-        user_settings = dict(
-            interface=self.view.settings.get_interface(),
-            channel=self.view.settings.get_channel(),
-            baudrate=self.view.settings.get_baudrate(),
-        )
+        # Comma separated channels are received simultaneously
+        channels = self.view.settings.get_channel().split(",")
+        configs = []
+        for channel in [c.strip() for c in channels if c.strip()] or [""]:
+            user_settings = dict(
+                interface=self.view.settings.get_interface(),
+                channel=channel,
+                baudrate=self.view.settings.get_baudrate(),
+            )
+            if self.view.settings.get_fd():
+                user_settings.update(
+                    fd=True, data_bitrate=self.view.settings.get_data_bitrate()
+                )
+            configs.append({k: v for k, v in user_settings.items() if v})
 
-        bus = can.Bus(**{k: v for k, v in user_settings.items() if v})  # type: ignore [arg-type]
-        self.set_bus(bus)
+        # Buses of the previous settings are released before opening new ones
+        for bus in self._buses:
+            bus.shutdown()
+        self._buses = []
+
+        if self.view.settings.get_capture_process():
+            self.set_capture(configs)
+        else:
+            import can
+
+            self.set_capture(None)
+            self.set_buses(
+                [can.Bus(**config) for config in configs],  # type: ignore [arg-type]
+                [config.get("channel", "") for config in configs],
+            )
 
     def settings_can_id_format_callback(self, *args, **kwargs) -> None:
         self.view.plot.set_format(self.view.settings.get_id_format())
+
+    def settings_group_channels_callback(self, *args, **kwargs) -> None:
+        self.view.plot.set_grouping(self.view.settings.get_group_channels())
+
+    def settings_byte_channels_callback(self, *args, **kwargs) -> None:
+        self.model.set_byte_channels(self.view.settings.get_byte_channels())
+        self.scheduler.mark(*self.view.plot.get_ids())
+
+    def settings_filters_callback(self, *args, **kwargs) -> None:
+        self.set_filters(FrameFilter.parse(self.view.settings.get_filters()))
+
+    def settings_policy_callback(self, *args, **kwargs) -> None:
+        self.set_policy(self.view.settings.get_policy())
+
+    def settings_time_window_callback(self, *args, **kwargs) -> None:
+        self.model.set_window(self.view.settings.get_time_window())
+        self.scheduler.mark(*self.view.plot.get_ids())
+
+    def settings_memory_budget_callback(self, *args, **kwargs) -> None:
+        self.model.set_memory_budget(self.view.settings.get_memory_budget())
+
+    def settings_metrics_overlay_callback(self, *args, **kwargs) -> None:
+        self.view.show_metrics(self.view.settings.get_metrics_overlay())
+
+    def settings_record_callback(self, *args, **kwargs) -> None:
+        path = self.view.settings.get_record_path()
+        if self.view.settings.get_record() and path:
+            fd = self.view.settings.get_fd()
+            self.set_recorder(
+                CaptureWriter(path, width=FD_PAYLOAD_WIDTH if fd else PAYLOAD_WIDTH)
+            )
+        else:
+            self.set_recorder(None)
+
+    def settings_log_open_callback(self, *args, **kwargs) -> None:
+        self.open_log(self.view.settings.get_log_path())
+
+    def settings_dbc_load_callback(self, *args, **kwargs) -> None:
+        path = self.view.settings.get_dbc_path()
+        self.model.set_database(SignalDatabase.load(path) if path else None)
+        self.scheduler.mark(*self.view.plot.get_ids())
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from can_explorer.payloads import PAYLOAD_WIDTH
+
+
+@dataclass(frozen=True, eq=False)
+class DecodePlan:
+    """
+    Precompiled instructions to decode every signal of a single message.
+
+    Each signal is reduced to a shift and mask against the payload read as
+    a 64 bit integer in the signal's byte order, followed by sign extension
+    or reinterpretation as an IEEE float and scaling, so a whole buffer of
+    payloads is decoded in one vectorized pass without interpreting the DBC
+    per frame. Multiplexed signals are only decoded from frames whose
+    multiplexer selects them.
+    """
+
+    frame_id: int
+    name: str
+    signals: tuple[str, ...]
+    big_endian: np.ndarray
+    shifts: np.ndarray
+    masks: np.ndarray
+    sign_bits: np.ndarray
+    float_bits: np.ndarray  # 32 or 64 for IEEE float signals, 0 for integers
+    scales: np.ndarray
+    offsets: np.ndarray
+    # Multiplexer signal index and the values selecting each multiplexed
+    # signal, from its own multiplexer up to the outermost one
+    guards: tuple[tuple[tuple[int, frozenset[int]], ...], ...] = ()
+
+    def decode(self, payloads: np.ndarray) -> np.ndarray:
+        """
+        Decode the physical value of every signal.
+
+        Args:
+            payloads (np.ndarray): uint8 matrix shaped [sample, byte]
+
+        Returns:
+            np.ndarray: float64 matrix shaped [sample, signal], NaN where the
+                multiplexer selects another signal
+        """
+        head = np.ascontiguousarray(payloads[:, :PAYLOAD_WIDTH])
+        big = head.view(">u8").astype(np.uint64)
+        little = head.view("<u8").astype(np.uint64)
+
+        raw = np.where(self.big_endian, big, little)
+        raw = (raw >> self.shifts) & self.masks
+
+        # Sign extension relies on wrapping int64 arithmetic, unsigned
+        # signals have no sign bit and are left untouched
+        values = (
+            (raw ^ self.sign_bits).astype(np.int64) - self.sign_bits.astype(np.int64)
+        ).astype(np.float64)
+
+        for index in np.flatnonzero(self.float_bits).tolist():
+            bits = np.ascontiguousarray(raw[:, index])
+            if self.float_bits[index] == 32:
+                values[:, index] = bits.astype(np.uint32).view(np.float32)
+            else:
+                values[:, index] = bits.view(np.float64)
+
+        values = values * self.scales + self.offsets
+        for index, guard in enumerate(self.guards):
+            for multiplexer, selectors in guard:
+                selected = np.isin(raw[:, multiplexer], list(selectors))
+                values[~selected, index] = np.nan
+        return values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.signals)
+
+
+def _shift(signal) -> int:
+    if signal.byte_order == "big_endian":
+        # DBC numbers the msb of motorola signals within its own byte,
+        # convert it to an offset from the msb of the first byte
+        msb = (signal.start // 8) * 8 + (7 - signal.start % 8)
+        return 64 - msb - signal.length
+    return signal.start
+
+
+def compile_message(message) -> DecodePlan:
+    """
+    Compile a cantools message definition into a decode plan.
+
+    Signals that do not fit within the first 8 payload bytes are skipped,
+    along with the signals they multiplex.
+
+    Args:
+        message (cantools.database.Message)
+
+    Returns:
+        DecodePlan
+    """
+    by_name = {signal.name: signal for signal in message.signals}
+
+    def fits(signal) -> bool:
+        shift = _shift(signal)
+        if shift < 0 or shift + signal.length > 64:
+            return False
+        parent = signal.multiplexer_signal
+        return parent is None or (parent in by_name and fits(by_name[parent]))
+
+    included = [signal for signal in message.signals if fits(signal)]
+    columns = {signal.name: index for index, signal in enumerate(included)}
+
+    guards = []
+    for signal in included:
+        guard = []
+        while signal.multiplexer_signal is not None:
+            guard.append(
+                (
+                    columns[signal.multiplexer_signal],
+                    frozenset(signal.multiplexer_ids or ()),
+                )
+            )
+            signal = by_name[signal.multiplexer_signal]
+        guards.append(tuple(guard))
+
+    lengths = np.asarray([signal.length for signal in included], dtype=np.uint64)
+    masks = np.where(
+        lengths == 64,
+        np.uint64(np.iinfo(np.uint64).max),
+        (np.uint64(1) << lengths % np.uint64(64)) - np.uint64(1),
+    ).astype(np.uint64)
+    signed = [signal.is_signed and not signal.is_float for signal in included]
+    sign_bits = np.where(
+        signed, np.uint64(1) << (lengths - np.uint64(1)) % np.uint64(64), 0
+    ).astype(np.uint64)
+
+    return DecodePlan(
+        frame_id=message.frame_id,
+        name=message.name,
+        signals=tuple(signal.name for signal in included),
+        big_endian=np.asarray(
+            [signal.byte_order == "big_endian" for signal in included], dtype=bool
+        ),
+        shifts=np.asarray([_shift(signal) for signal in included], dtype=np.uint64),
+        masks=masks,
+        sign_bits=sign_bits,
+        float_bits=np.asarray(
+            [signal.length if signal.is_float else 0 for signal in included],
+            dtype=np.uint8,
+        ),
+        scales=np.asarray([signal.scale for signal in included], dtype=np.float64),
+        offsets=np.asarray([signal.offset for signal in included], dtype=np.float64),
+        guards=tuple(guards),
+    )
+
+
+class SignalDatabase:
+    """
+    Decode plans for every message of a DBC file, keyed by CAN id.
+    """
+
+    def __init__(self, plans: dict[int, DecodePlan], path: Path | None = None):
+        self.path = path
+        self._plans = plans
+
+    def __contains__(self, can_id: int) -> bool:
+        return can_id in self._plans
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get(self, can_id: int) -> DecodePlan | None:
+        return self._plans.get(can_id)
+
+    @classmethod
+    def load(cls, path: str | Path) -> SignalDatabase:
+        """
+        Parse a DBC file and compile a decode plan for each message.
+
+        Raises:
+            ImportError: If the optional cantools dependency is not installed.
+        """
+        try:
+            import cantools
+        except ImportError as error:
+            raise ImportError(
+                "DBC support requires cantools | pip install can-explorer[dbc]"
+            ) from error
+
+        database = cantools.database.load_file(str(path), database_format="dbc")
+        return cls(
+            {
+                message.frame_id: compile_message(message)
+                for message in database.messages
+            },
+            Path(path),
+        )
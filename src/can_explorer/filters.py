@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import bisect
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from can_explorer.frames import Frames
+
+if TYPE_CHECKING:
+    from can.bus import BusABC
+
+CAN_EFF_MASK = 0x1FFFFFFF  # Every bit of an extended CAN id
+
+
+@dataclass(frozen=True)
+class IdFilter:
+    """
+    Acceptance filter, a CAN id matches if id & can_mask == can_id & can_mask.
+
+    Filters match by CAN id alone, standard and extended frames alike.
+    """
+
+    can_id: int
+    can_mask: int = CAN_EFF_MASK
+
+    def to_can_filter(self) -> dict:
+        return dict(can_id=self.can_id, can_mask=self.can_mask)
+
+    def get_range(self) -> tuple[int, int] | None:
+        """
+        Get the range of CAN id's matched if the mask only covers high bits.
+
+        Returns:
+            tuple[int, int] | None: First and last matching CAN id, None if
+                the matching id's are not contiguous
+        """
+        free = ~self.can_mask & CAN_EFF_MASK
+        if free & (free + 1):
+            return None
+        low = self.can_id & self.can_mask & CAN_EFF_MASK
+        return low, low | free
+
+
+def range_filters(low: int, high: int) -> list[IdFilter]:
+    """
+    Split a range of CAN id's into the fewest filters matching exactly it.
+
+    Each filter covers an aligned block whose size is a power of two, so
+    drivers that only take id/mask pairs can still filter ranges.
+    """
+    filters = []
+    while low <= high:
+        size = low & -low if low else 1 << CAN_EFF_MASK.bit_length()
+        while low + size - 1 > high:
+            size >>= 1
+        filters.append(IdFilter(low, CAN_EFF_MASK & ~(size - 1)))
+        low += size
+    return filters
+
+
+def parse_filters(text: str) -> list[IdFilter]:
+    """
+    Parse filters separated by commas or new lines.
+
+    Each filter is a CAN id, an ID/MASK pair or a LOW-HIGH range of CAN
+    id's, every number in hex with a 0x prefix or in decimal.
+
+    Raises:
+        ValueError: If a filter cannot be parsed.
+    """
+    filters = []
+    for token in re.split(r"[,\s]+", text.strip()):
+        if not token:
+            continue
+        try:
+            if "/" in token:
+                can_id, can_mask = token.split("/")
+                filters.append(IdFilter(int(can_id, 0), int(can_mask, 0)))
+            elif "-" in token:
+                low, high = token.split("-")
+                filters += range_filters(int(low, 0), int(high, 0))
+            else:
+                filters.append(IdFilter(int(token, 0)))
+        except ValueError:
+            raise ValueError(
+                f"Invalid filter {token!r}, expected ID, ID/MASK or LOW-HIGH"
+            ) from None
+    return filters
+
+
+def has_driver_filters(bus: BusABC) -> bool:
+    """
+    Check if a bus discards filtered frames in its driver, kernel or hardware.
+
+    Other interfaces fall back to python-can checking every message in Python.
+    """
+    from can.bus import BusABC
+
+    return type(bus)._apply_filters is not BusABC._apply_filters
+
+
+class FrameFilter:
+    """
+    Acceptance filters compiled to match whole arrays of CAN id's at once.
+
+    Filters whose mask covers only high bits accept a contiguous range of
+    CAN id's, these ranges are merged and matched with a binary search. The
+    few remaining masks are tested one after another.
+    """
+
+    def __init__(self, filters: Sequence[IdFilter]) -> None:
+        self.filters = list(filters)
+
+        ranges, self._masked = [], []
+        for id_filter in self.filters:
+            span = id_filter.get_range()
+            if span is None:
+                self._masked.append(id_filter)
+            else:
+                ranges.append(span)
+
+        # Merge overlapping and adjacent ranges so starts are strictly ascending
+        merged: list[list[int]] = []
+        for low, high in sorted(ranges):
+            if merged and low <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], high)
+            else:
+                merged.append([low, high])
+        self._starts = [low for low, _ in merged]
+        self._stops = [high for _, high in merged]
+        self._start_array = np.array(self._starts, dtype=np.int64)
+        self._stop_array = np.array(self._stops, dtype=np.int64)
+
+    @classmethod
+    def parse(cls, text: str) -> FrameFilter:
+        return cls(parse_filters(text))
+
+    def __bool__(self) -> bool:
+        return bool(self.filters)
+
+    def to_can_filters(self) -> list[dict] | None:
+        """
+        Get the filters in the format of can.BusABC.set_filters.
+        """
+        return [id_filter.to_can_filter() for id_filter in self.filters] or None
+
+    def match(self, can_id: int) -> bool:
+        if not self.filters:
+            return True
+        index = bisect.bisect_right(self._starts, can_id) - 1
+        if index >= 0 and can_id <= self._stops[index]:
+            return True
+        return any(not (f.can_id ^ can_id) & f.can_mask for f in self._masked)
+
+    def matches(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Check which CAN id's any of the filters accept.
+
+        Returns:
+            np.ndarray: bool per CAN id
+        """
+        if not self.filters:
+            return np.ones(len(ids), dtype=bool)
+
+        ids = ids.astype(np.int64)
+        accepted = np.zeros(len(ids), dtype=bool)
+        if self._starts:
+            index = np.searchsorted(self._start_array, ids, side="right") - 1
+            accepted = (index >= 0) & (ids <= self._stop_array[np.maximum(index, 0)])
+        for f in self._masked:
+            accepted |= ((ids ^ f.can_id) & f.can_mask) == 0
+        return accepted
+
+    def apply(self, frames: Frames) -> Frames:
+        if not self.filters:
+            return frames
+        return frames[self.matches(frames.arbitration_id)]
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import enum
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from can_explorer.payloads import (
+    PAYLOAD_WIDTH,
+    fit_payloads,
+    pack_payloads,
+    width_class,
+)
+
+if TYPE_CHECKING:
+    import can
+
+
+class FrameFlag(enum.IntFlag):
+    EXTENDED = 1
+    REMOTE = 2
+    ERROR = 4
+    FD = 8
+
+
+# The flags above the frame flags hold the index of the bus a frame was
+# received on, so frames from every bus share the same arrays and files
+CHANNEL_SHIFT = 4
+MAX_CHANNELS = 1 << (8 - CHANNEL_SHIFT)
+
+# Data is keyed by CAN id, offset by the channel index above the 32 bits
+# of the CAN id so the first channel is keyed by the bare CAN id
+KEY_SHIFT = 32
+KEY_MASK = (1 << KEY_SHIFT) - 1
+
+
+def make_key(channel: int, can_id: int) -> int:
+    return channel << KEY_SHIFT | can_id
+
+
+def split_key(key: int) -> tuple[int, int]:
+    """
+    Get the channel index and CAN id of a key.
+    """
+    return key >> KEY_SHIFT, key & KEY_MASK
+
+
+def format_key(
+    key: int, id_format: Callable = hex, channels: Sequence[str] = ()
+) -> str:
+    """
+    Format a key as its CAN id, preceded by the channel name with several buses.
+
+    Args:
+        key (int)
+        id_format (Callable): Formats the CAN id
+        channels (Sequence[str]): Name of each channel
+    """
+    channel, can_id = split_key(key)
+    text = str(id_format(can_id))
+    if channel or len(channels) > 1:
+        name = channels[channel] if channel < len(channels) else str(channel)
+        text = f"{name} {text}"
+    return text
+
+
+@dataclass
+class Frames:
+    """
+    A batch of CAN frames stored as parallel arrays.
+
+    Used to move frames between the bus, the model and capture files without
+    creating a can.Message per frame.
+    """
+
+    timestamp: np.ndarray  # float64
+    arbitration_id: np.ndarray  # uint32
+    dlc: np.ndarray  # uint8
+    flags: np.ndarray  # uint8
+    payload: np.ndarray  # uint8 shaped [frame, byte]
+
+    def __len__(self) -> int:
+        return len(self.arbitration_id)
+
+    @property
+    def channel(self) -> np.ndarray:
+        return self.flags >> CHANNEL_SHIFT
+
+    def keys(self) -> np.ndarray:
+        """
+        Get the key of each frame, see make_key.
+
+        Returns:
+            np.ndarray: int64 per frame
+        """
+        keys = self.arbitration_id.astype(np.int64)
+        if len(self) and self.flags.max() >> CHANNEL_SHIFT:
+            keys |= self.channel.astype(np.int64) << KEY_SHIFT
+        return keys
+
+    def with_channel(self, channel: int) -> Frames:
+        """
+        Copy the frames, marked as received on a channel.
+
+        Raises:
+            ValueError: If the channel index cannot be stored.
+        """
+        if not 0 <= channel < MAX_CHANNELS:
+            raise ValueError(f"At most {MAX_CHANNELS} channels are supported")
+        flags = (self.flags & ((1 << CHANNEL_SHIFT) - 1)) | (channel << CHANNEL_SHIFT)
+        return Frames(
+            timestamp=self.timestamp,
+            arbitration_id=self.arbitration_id,
+            dlc=self.dlc,
+            flags=flags.astype(np.uint8),
+            payload=self.payload,
+        )
+
+    def copy(self) -> Frames:
+        """
+        Copy the frames out of the buffers they may be viewing.
+        """
+        return Frames(
+            timestamp=self.timestamp.copy(),
+            arbitration_id=self.arbitration_id.copy(),
+            dlc=self.dlc.copy(),
+            flags=self.flags.copy(),
+            payload=self.payload.copy(),
+        )
+
+    def __getitem__(self, index) -> Frames:
+        return Frames(
+            timestamp=self.timestamp[index],
+            arbitration_id=self.arbitration_id[index],
+            dlc=self.dlc[index],
+            flags=self.flags[index],
+            payload=self.payload[index],
+        )
+
+    @classmethod
+    def empty(cls, width: int = PAYLOAD_WIDTH) -> Frames:
+        return cls(
+            timestamp=np.empty(0, np.float64),
+            arbitration_id=np.empty(0, np.uint32),
+            dlc=np.empty(0, np.uint8),
+            flags=np.empty(0, np.uint8),
+            payload=np.empty((0, width), np.uint8),
+        )
+
+    @property
+    def width(self) -> int:
+        return self.payload.shape[1]
+
+    @classmethod
+    def concatenate(cls, batches: Sequence[Frames]) -> Frames:
+        """
+        Join batches in order, payloads are padded to the widest batch.
+        """
+        if not batches:
+            return cls.empty()
+        width = max(batch.width for batch in batches)
+        return cls(
+            timestamp=np.concatenate([batch.timestamp for batch in batches]),
+            arbitration_id=np.concatenate([batch.arbitration_id for batch in batches]),
+            dlc=np.concatenate([batch.dlc for batch in batches]),
+            flags=np.concatenate([batch.flags for batch in batches]),
+            payload=np.concatenate(
+                [fit_payloads(batch.payload, width) for batch in batches]
+            ),
+        )
+
+    @classmethod
+    def from_messages(
+        cls, messages: Sequence[can.Message], width: int | None = None
+    ) -> Frames:
+        """
+        Pack messages into parallel arrays.
+
+        Args:
+            messages (Sequence[can.Message])
+            width (int | None): Payload columns, longer payloads are truncated,
+                None for the width class of the longest payload
+        """
+        if width is None:
+            width = width_class(max((len(m.data) for m in messages), default=0))
+        return cls(
+            timestamp=np.fromiter(
+                (message.timestamp for message in messages), np.float64, len(messages)
+            ),
+            arbitration_id=np.fromiter(
+                (message.arbitration_id for message in messages),
+                np.uint32,
+                len(messages),
+            ),
+            dlc=np.fromiter(
+                (len(message.data) for message in messages), np.uint8, len(messages)
+            ),
+            flags=np.fromiter(
+                (get_flags(message) for message in messages), np.uint8, len(messages)
+            ),
+            payload=pack_payloads([message.data for message in messages], width),
+        )
+
+    def to_messages(self) -> list[can.Message]:
+        import can
+
+        return [
+            can.Message(
+                timestamp=float(self.timestamp[index]),
+                arbitration_id=int(self.arbitration_id[index]),
+                is_extended_id=bool(self.flags[index] & FrameFlag.EXTENDED),
+                is_remote_frame=bool(self.flags[index] & FrameFlag.REMOTE),
+                is_error_frame=bool(self.flags[index] & FrameFlag.ERROR),
+                is_fd=bool(self.flags[index] & FrameFlag.FD),
+                data=self.payload[index, : self.dlc[index]].tobytes(),
+            )
+            for index in range(len(self))
+        ]
+
+
+def get_flags(message: can.Message) -> int:
+    return (
+        FrameFlag.EXTENDED * message.is_extended_id
+        | FrameFlag.REMOTE * message.is_remote_frame
+        | FrameFlag.ERROR * message.is_error_frame
+        | FrameFlag.FD * message.is_fd
+    )
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+import can
+
+from can_explorer.backpressure import Policy
+from can_explorer.controllers import Controller
+from can_explorer.filters import FrameFilter
+from can_explorer.models import PlotModel
+from can_explorer.payloads import FD_PAYLOAD_WIDTH, PAYLOAD_WIDTH
+from can_explorer.plot_data import PlotData
+from can_explorer.recording import CaptureWriter
+from can_explorer.statistics import COLUMNS, format_row
+
+
+class NullPlotView:
+    """
+    Plot surface that tracks CAN id's without drawing anything.
+
+    No row is ever visible, so refreshing the controller costs nothing
+    beyond draining the render scheduler.
+    """
+
+    def __init__(self) -> None:
+        self._ids: set[int] = set()
+
+    def add_rows(self, *can_ids: int) -> None:
+        self._ids.update(can_ids)
+
+    def remove_rows(self, *can_ids: int) -> None:
+        self._ids.difference_update(can_ids)
+
+    def clear(self) -> None:
+        self._ids.clear()
+
+    def get_ids(self) -> list[int]:
+        return sorted(self._ids)
+
+    def get_rows(self) -> dict:
+        return {}
+
+    def sync(self) -> set[int]:
+        return set()
+
+    def update(self, can_id: int, plot_data: PlotData) -> None:
+        self._ids.add(can_id)
+
+
+class NullView:
+    """
+    View for running the bus to model pipeline without a GUI.
+    """
+
+    def __init__(self) -> None:
+        self.plot = NullPlotView()
+
+    def set_main_button_label(self, state: bool) -> None:
+        pass
+
+    def set_timeline(self, duration: float | None) -> None:
+        pass
+
+    def set_channels(self, channels: Sequence[str]) -> None:
+        pass
+
+    def set_shedding(self, policy: Policy | None) -> None:
+        pass
+
+
+def run(
+    config: dict | Sequence[dict],
+    duration: float | None = None,
+    record: str | Path | None = None,
+    model: PlotModel | None = None,
+    metrics: str | Path | None = None,
+    filters: FrameFilter | None = None,
+) -> Controller:
+    """
+    Receive from buses into the model until the duration elapses or Ctrl+C.
+
+    Args:
+        config (dict | Sequence[dict]): Keyword arguments for can.Bus, one
+            per bus to receive from simultaneously
+        duration (float | None): Seconds to run, None to run until interrupted
+        record (str | Path | None): Capture file to record every frame to
+        model (PlotModel | None)
+        metrics (str | Path | None): JSON lines file to export metrics to
+        filters (FrameFilter | None): CAN id's to receive, None for every id
+
+    Returns:
+        Controller: Stopped controller holding the received data
+    """
+    configs = [config] if isinstance(config, dict) else list(config)
+    fd = any(c.get("fd") for c in configs)
+    recorder = (
+        CaptureWriter(record, width=FD_PAYLOAD_WIDTH if fd else PAYLOAD_WIDTH)
+        if record
+        else None
+    )
+    buses = []
+    try:
+        for c in configs:
+            buses.append(can.Bus(**c))
+    except Exception:
+        # Whatever was opened before a bus failed is released
+        for bus in buses:
+            bus.shutdown()
+        if recorder is not None:
+            recorder.close()
+        raise
+
+    controller = Controller(model or PlotModel(), NullView(), recorder=recorder)
+    controller.set_buses(
+        buses, [str(c.get("channel", index)) for index, c in enumerate(configs)]
+    )
+
+    deadline = time.monotonic() + duration if duration is not None else None
+    controller.set_filters(filters)
+    controller.set_metrics_export(metrics)
+    controller.start()
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            controller.refresh()
+            time.sleep(controller.scheduler.refresh_rate or 0.1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.stop()
+        controller.refresh(force=True)
+        controller.set_recorder(None)
+        controller.set_metrics_export(None)
+        for bus in controller.buses:
+            bus.shutdown()
+
+    return controller
+
+
+def summarize(controller: Controller) -> str:
+    statistics = controller.model.get_statistics()
+    statistics.sort(order="arbitration_id")
+    latest = float(statistics["last_seen"].max(initial=0))
+
+    rows = [tuple(label for label, _ in COLUMNS)]
+    rows += [
+        format_row(record, latest, channels=controller.channels)
+        for record in statistics
+    ]
+    widths = [max(len(row[column]) for row in rows) for column in range(len(COLUMNS))]
+
+    lines = [f"{len(statistics)} CAN id's received"]
+    lines += [
+        "  "
+        + "  ".join(text.rjust(width) for text, width in zip(row, widths, strict=True))
+        for row in rows
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+
+import can
+from can.bus import BusABC
+
+from can_explorer.configs import Default
+
+
+def receive_batch(
+    bus: BusABC,
+    batch_size: int = Default.BATCH_SIZE,
+    max_latency: float = Default.BATCH_LATENCY,
+    timeout: float = Default.RECV_TIMEOUT,
+) -> list[can.Message]:
+    """
+    Receive a single batch of messages from a bus.
+
+    Blocks for up to timeout seconds for the first message, then drains
+    whatever else is already queued without blocking until the batch is
+    full or max_latency has elapsed.
+
+    Returns:
+        list[can.Message]: Empty if nothing arrived before the timeout
+    """
+    message = bus.recv(timeout=timeout)
+    if message is None:
+        return []
+
+    batch = [message]
+    deadline = time.monotonic() + max_latency
+    while len(batch) < batch_size and time.monotonic() < deadline:
+        message = bus.recv(timeout=0)
+        if message is None:
+            break
+        batch.append(message)
+
+    return batch
+
+
+class IngestWorker(threading.Thread):
+    """
+    Receives messages from a bus and hands them off in batches.
+
+    See receive_batch for how each batch is collected. Per message
+    overhead of the callback is paid once per batch instead.
+    """
+
+    def __init__(
+        self,
+        bus: BusABC,
+        callback: Callable[[list[can.Message]], None],
+        batch_size: int = Default.BATCH_SIZE,
+        max_latency: float = Default.BATCH_LATENCY,
+        timeout: float = Default.RECV_TIMEOUT,
+    ) -> None:
+        super().__init__(name="can-explorer-ingest", daemon=True)
+        self.bus = bus
+        self._callback = callback
+        self._batch_size = max(1, batch_size)
+        self._max_latency = max_latency
+        self._timeout = timeout
+        self._running = threading.Event()
+
+    def run(self) -> None:
+        self._running.set()
+        while self._running.is_set():
+            batch = self.receive()
+            if batch:
+                self._callback(batch)
+
+    def receive(self) -> list[can.Message]:
+        return receive_batch(
+            self.bus, self._batch_size, self._max_latency, self._timeout
+        )
+
+    def stop(self, timeout: float | None = None) -> None:
+        """
+        Stop receiving and wait for the current batch to be handed off.
+        """
+        self._running.clear()
+        if self.is_alive():
+            self.join(timeout if timeout is not None else self._timeout * 10)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import itertools
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import can
+
+from can_explorer.configs import Default
+from can_explorer.frames import Frames
+from can_explorer.payloads import FD_PAYLOAD_WIDTH, PAYLOAD_WIDTH
+from can_explorer.recording import CaptureReader, CaptureWriter, index_path
+
+CAPTURE_SUFFIX = ".canx"
+
+
+def read_log(path: str | Path, chunk_size: int = Default.LOG_CHUNK) -> Iterator[Frames]:
+    """
+    Stream any log format python-can can read as batches of frames.
+
+    Args:
+        path (str | Path): ASC, BLF, candump or any other supported log
+        chunk_size (int): Number of messages per batch
+
+    Yields:
+        Frames
+    """
+    messages = iter(can.LogReader(path))
+    while chunk := list(itertools.islice(messages, chunk_size)):
+        yield Frames.from_messages(chunk)
+
+
+class LogFile:
+    """
+    A CAN log opened for offline viewing.
+
+    Text and vendor logs are converted once into a temporary capture file so
+    any point of the timeline can be rendered from the capture index instead
+    of replaying the log. Capture files are opened directly.
+    """
+
+    def __init__(self, reader: CaptureReader, temporary: bool = False) -> None:
+        self.reader = reader
+        self._temporary = temporary
+
+    @classmethod
+    def open(cls, path: str | Path, chunk_size: int = Default.LOG_CHUNK) -> LogFile:
+        path = Path(path)
+        if path.suffix == CAPTURE_SUFFIX:
+            return cls(CaptureReader(path))
+
+        with tempfile.NamedTemporaryFile(suffix=CAPTURE_SUFFIX, delete=False) as file:
+            capture = Path(file.name)
+
+        # Logs are converted with classic payloads and converted again in
+        # full once a CAN FD frame turns up, most logs never hold one
+        width = PAYLOAD_WIDTH
+        try:
+            while True:
+                with CaptureWriter(
+                    capture, chunk_size=chunk_size, width=width
+                ) as writer:
+                    for frames in read_log(path, chunk_size):
+                        if frames.dlc.max(initial=0) > width:
+                            break
+                        writer.write(frames)
+                    else:
+                        break
+                width = FD_PAYLOAD_WIDTH
+
+            return cls(CaptureReader(capture), temporary=True)
+        except Exception:
+            # Unreadable logs must not leave their partial conversion behind
+            capture.unlink(missing_ok=True)
+            index_path(capture).unlink(missing_ok=True)
+            raise
+
+    @property
+    def path(self) -> Path:
+        return self.reader.path
+
+    def get_ids(self) -> list[int]:
+        return self.reader.get_ids()
+
+    def get_time_range(self) -> tuple[float, float]:
+        return self.reader.get_time_range()
+
+    def last(self, can_id: int, n: int, t: float | None = None) -> Frames:
+        """
+        Get the most recent frames of a CAN id at or before a timestamp.
+        """
+        return self.reader.last(can_id, n, t)
+
+    def close(self) -> None:
+        self.reader.close()
+        if self._temporary:
+            self.path.unlink(missing_ok=True)
+            index_path(self.path).unlink(missing_ok=True)
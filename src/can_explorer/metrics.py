@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+from can_explorer.configs import Default
+
+STAGES = ("receive", "append", "render", "frame")
+
+
+class Histogram:
+    """
+    Latency histogram with logarithmic buckets from 1 µs to 100 s.
+
+    Recording is a bucket increment so it is cheap enough for the ingest
+    path, percentiles are resolved to the upper edge of their bucket.
+    """
+
+    # Eight buckets per decade, roughly 33% resolution
+    EDGES = np.logspace(-6, 2, 8 * 8 + 1)
+
+    def __init__(self) -> None:
+        self._counts = np.zeros(len(self.EDGES) + 1, dtype=np.int64)
+        self._total = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return int(self._counts.sum())
+
+    def record(self, seconds: float) -> None:
+        bucket = int(np.searchsorted(self.EDGES, seconds))
+        with self._lock:
+            self._counts[bucket] += 1
+            self._total += seconds
+            self._max = max(self._max, seconds)
+
+    def record_many(self, seconds: np.ndarray) -> None:
+        if not len(seconds):
+            return
+        buckets = np.searchsorted(self.EDGES, seconds)
+        counts = np.bincount(buckets, minlength=len(self._counts))
+        with self._lock:
+            self._counts += counts
+            self._total += float(seconds.sum())
+            self._max = max(self._max, float(seconds.max()))
+
+    def percentile(self, percent: float) -> float:
+        with self._lock:
+            counts = self._counts.copy()
+        total = counts.sum()
+        if not total:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(counts), total * percent / 100))
+        edge = float(self.EDGES[min(bucket, len(self.EDGES) - 1)])
+        return min(edge, self._max)
+
+    def snapshot(self) -> dict:
+        count = self.count
+        return dict(
+            count=count,
+            mean=self._total / count if count else 0.0,
+            p50=self.percentile(50),
+            p90=self.percentile(90),
+            p99=self.percentile(99),
+            max=self._max,
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts[:] = 0
+            self._total = self._max = 0.0
+
+
+class PipelineMetrics:
+    """
+    Counters and per stage latency histograms of the ingest to render path.
+
+    Stages:
+        receive: Bus timestamp of a frame until it reached the controller
+        append: Time to add a batch of frames to the model
+        render: Time to redraw the rows updated in one refresh
+        frame: DearPyGui frame time
+    """
+
+    def __init__(self) -> None:
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def get_count(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.stages[stage].record(seconds)
+
+    def observe_many(self, stage: str, seconds: np.ndarray) -> None:
+        self.stages[stage].record_many(seconds)
+
+    def snapshot(self, **gauges) -> dict:
+        """
+        Get every metric as a JSON serializable dict.
+
+        Args:
+            **gauges: Instantaneous values to include, e.g. queue depth
+        """
+        with self._lock:
+            counters = dict(self._counters)
+        return dict(
+            time=time.time(),
+            uptime=time.monotonic() - self._start,
+            counters=counters,
+            stages={stage: hist.snapshot() for stage, hist in self.stages.items()},
+            **gauges,
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+        for histogram in self.stages.values():
+            histogram.reset()
+        self._start = time.monotonic()
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds * 1e6:.0f} us"
+
+
+def format_snapshot(snapshot: dict) -> str:
+    """
+    Render a metrics snapshot as a few lines of text for the overlay.
+    """
+    lines = [
+        f"{stage:<8} p50 {_format_seconds(values['p50']):>8}"
+        f"  p99 {_format_seconds(values['p99']):>8}"
+        f"  max {_format_seconds(values['max']):>8}"
+        for stage, values in snapshot["stages"].items()
+    ]
+
+    counters = snapshot["counters"]
+    uptime = max(snapshot["uptime"], 1e-9)
+    frames = counters.get("frames", 0)
+    queue = snapshot.get("queue_depth")
+    lines.append(
+        f"frames {frames} ({frames / uptime:.0f}/s)"
+        f"  coalesced {counters.get('coalesced', 0)}"
+        f"  dropped {snapshot.get('dropped', 0)}"
+        f"  shed {snapshot.get('shed', 0)}"
+        f"  queue {'n/a' if queue is None else queue}"
+        f"  memory {snapshot.get('memory', 0) / 2**20:.1f} MiB"
+    )
+    return "\n".join(lines)
+
+
+class MetricsExporter(threading.Thread):
+    """
+    Appends a metrics snapshot to a JSON lines file at a fixed interval.
+    """
+
+    def __init__(
+        self,
+        snapshot: Callable[[], dict],
+        path: str | Path,
+        interval: float = Default.METRICS_INTERVAL,
+    ) -> None:
+        super().__init__(name="can-explorer-metrics", daemon=True)
+        self.path = Path(path)
+        self._snapshot = snapshot
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        with open(self.path, "a") as file:
+            while not self._stopped.wait(self._interval):
+                file.write(json.dumps(self._snapshot()) + "\n")
+                file.flush()
+            file.write(json.dumps(self._snapshot()) + "\n")
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stopped.set()
+        self.join(timeout)
@@ -1,38 +1,572 @@
-from collections import defaultdict, deque
-from typing import DefaultDict
+from __future__ import annotations
 
-import can
+import itertools
+from collections import Counter, OrderedDict
+from collections.abc import Hashable, Iterable
+from typing import TYPE_CHECKING
+
+import numpy as np
+from wrapt import synchronized
 
 from can_explorer.configs import Default
-from can_explorer.plotting import PlotData, convert_payloads
+from can_explorer.dbc import SignalDatabase
+from can_explorer.filters import FrameFilter
+from can_explorer.frames import CHANNEL_SHIFT, MAX_CHANNELS, Frames, split_key
+from can_explorer.payloads import (
+    PAYLOAD_WIDTH,
+    Bitfield,
+    byte_series,
+    fit_payloads,
+    segment_series,
+    to_integer,
+    width_class,
+)
+from can_explorer.plot_data import PlotData, convert_payloads
+from can_explorer.statistics import BusStatistics
+from can_explorer.store import EXTREMA_BLOCK, SampleStore
+
+if TYPE_CHECKING:
+    import can
 
 
-class PayloadBuffer(deque):
-    def __init__(self):
-        self.MIN = Default.BUFFER_MIN
-        self.MAX = Default.BUFFER_MAX
-        super().__init__([0] * self.MAX, maxlen=self.MAX)
+# Fields stored for every sample, the payload in the width class of the store
+FIELDS = {"dlc": np.uint8, "value": np.float64, "timestamp": np.float64}
 
-    def __getitem__(self, index) -> tuple:  # type: ignore [override]
-        # Add ability to utilize slicing
-        # Note: must convert deque to avoid runtime error
-        if isinstance(index, slice):
-            return tuple(self)[index.start : index.stop : index.step]
-        return tuple(deque.__getitem__(self, index))
+
+def _row_nbytes(depth: int, width: int) -> int:
+    # Bytes a CAN id takes in the store of its placement, see SampleStore.nbytes
+    sample = sum(np.dtype(dtype).itemsize for dtype in FIELDS.values()) + width
+    extrema = 2 * np.dtype(np.float64).itemsize * -(-depth // EXTREMA_BLOCK)
+    return 2 * depth * sample + extrema + 2 * np.dtype(np.intp).itemsize
 
 
 class PlotModel:
-    def __init__(self) -> None:
-        self._data: DefaultDict[int, PayloadBuffer] = defaultdict(PayloadBuffer)
+    """
+    Samples and statistics of every CAN id, within a memory budget.
+
+    CAN id's are stored apart by the number of samples they keep and the width
+    class of their payloads. Each starts at Default.BUFFER_MIN samples and
+    doubles them once they are filled, up to the history. Over budget, the
+    least recently received CAN id's are halved back down to
+    Default.BUFFER_MIN first, then evicted.
+    """
+
+    def __init__(self, memory_budget: int | None = Default.MEMORY_BUDGET) -> None:
+        # Every CAN id lives in the store of its depth and payload width, a
+        # few busy or CAN FD id's do not widen the storage of every other one
+        self._stores: dict[tuple[int, int], SampleStore] = {}
+        self._placement: dict[Hashable, tuple[int, int]] = {}  # In arrival order
+        self._history = Default.BUFFER_MAX
+        self._budget = memory_budget
+        self._usage = 0  # Bytes allocated, updated as storage is resized
+        self._recent: OrderedDict[Hashable, None] = OrderedDict()  # Oldest first
+        self._evicted: set[Hashable] = set()
+        self._statistics = BusStatistics()
         self._len = Default.BUFFER_SIZE
+        self._window: float | None = None
+        self._latest = 0.0
+        self._byte_channels = False
+        self._database: SignalDatabase | None = None
+        self._filter: FrameFilter | None = None
+        self._pending: list[tuple[can.Message, int]] = []  # By add_message
+        self._store(self._default)
+        self._account()
+
+    @synchronized
+    def add_message(self, message: can.Message, channel: int = 0) -> None:
+        """
+        Append a single message.
+
+        Messages are buffered and appended in one batch once Default.BATCH_SIZE
+        are buffered or the model is read, writing rows one at a time costs
+        about as much per row as writing a whole batch.
+
+        Args:
+            message (can.Message)
+            channel (int): Index of the bus it was received on, see make_key
+
+        Raises:
+            ValueError: If the channel index cannot be stored.
+        """
+        if not 0 <= channel < MAX_CHANNELS:
+            raise ValueError(f"At most {MAX_CHANNELS} channels are supported")
+        if self._filter is not None and not self._filter.match(message.arbitration_id):
+            return
+
+        self._pending.append((message, channel))
+        if len(self._pending) >= Default.BATCH_SIZE:
+            self._flush()
+
+    def add_messages(self, messages: Iterable[can.Message], channel: int = 0) -> None:
+        """
+        Append a batch of messages in a single pass.
+
+        Args:
+            messages (Iterable[can.Message])
+            channel (int): Index of the bus they were received on
+        """
+        frames = Frames.from_messages(list(messages))
+        self.add_frames(frames.with_channel(channel) if channel else frames)
+
+    @synchronized
+    def add_frames(self, frames: Frames) -> None:
+        """
+        Append a batch of frames directly from their arrays.
+
+        Args:
+            frames (Frames)
+        """
+        if self._filter is not None:
+            frames = self._filter.apply(frames)
+        self._flush()
+        self._add(frames)
+
+    def _flush(self) -> None:
+        # Append the messages buffered by add_message, before reading or
+        # appending anything else so the arrival order is kept
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        frames = Frames.from_messages([message for message, _ in pending])
+        channels = np.fromiter((channel for _, channel in pending), np.uint8)
+        frames.flags |= channels << CHANNEL_SHIFT
+        self._add(frames)
+
+    def _add(self, frames: Frames) -> None:
+        if not len(frames):
+            return
+
+        # Frames of every channel are stored apart, keyed by make_key
+        keys = frames.keys()
+        unique, inverse = np.unique(keys, return_inverse=True)
+        unique = unique.tolist()
+        if frames.width > PAYLOAD_WIDTH:
+            longest = np.zeros(len(unique), dtype=np.intp)
+            np.maximum.at(longest, inverse, np.minimum(frames.dlc, frames.width))
+            widths = [width_class(length) for length in longest.tolist()]
+        else:
+            widths = [PAYLOAD_WIDTH] * len(unique)
+
+        resized = False
+        placements = []
+        counts = np.bincount(inverse).tolist()
+        for key, width, count in zip(unique, widths, counts, strict=True):
+            placement = self._placement.get(key)
+            if placement is None:
+                placement = self._placement[key] = (self._default[0], width)
+                resized = True
+            elif width > placement[1]:
+                placement = self._move(key, placement[0], width)
+                resized = True
+            if count > placement[0] and placement[0] < self._history:
+                placement = self._reserve(key, placement, count)
+                resized = True
+            placements.append(placement)
+
+        values = to_integer(frames.payload, frames.dlc)
+        groups = {
+            placement: index
+            for index, placement in enumerate(dict.fromkeys(placements))
+        }
+        if len(groups) == 1:
+            self._write(placements[0], keys, frames, values)
+        else:
+            group = np.array([groups[placement] for placement in placements])[inverse]
+            for placement, index in groups.items():
+                mask = group == index
+                self._write(placement, keys[mask], frames[mask], values[mask])
+
+        self._statistics.extend(frames)
+        self._latest = max(self._latest, float(frames.timestamp.max()))
+
+        # CAN id's are as recent as their last frame of the batch
+        last = np.empty(len(unique), dtype=np.intp)
+        last[inverse] = np.arange(len(keys))
+        self._touch([unique[index] for index in np.argsort(last).tolist()], resized)
+
+    def _write(
+        self,
+        placement: tuple[int, int],
+        keys: np.ndarray,
+        frames: Frames,
+        values: np.ndarray,
+    ) -> None:
+        self._store(placement).extend(
+            keys,
+            dlc=frames.dlc,
+            value=values,
+            timestamp=frames.timestamp,
+            payload=fit_payloads(frames.payload, placement[1]),
+        )
 
-    def add_message(self, message: can.Message) -> None:
-        can_id = message.arbitration_id
-        val = int.from_bytes(message.data, byteorder="big")
-        self._data[can_id].append(val)
+    def _touch(self, keys: list[Hashable], resized: bool) -> None:
+        # Mark CAN id's as most recently received, deepen the ones that filled
+        # up what they keep, then keep within budget
+        recent = self._recent
+        full = []
+        for key in keys:
+            recent[key] = None
+            recent.move_to_end(key)
+            placement = self._placement[key]
+            depth = placement[0]
+            if depth < self._history and self._stores[placement].count(key) >= depth:
+                full.append(key)
 
+        if resized:
+            self._account()
+        if full and self._deepen(full):
+            self._account()
+            resized = True
+        if resized:
+            self._fit()
+
+    def _deepen(self, keys: list[Hashable]) -> bool:
+        # Double the samples kept by CAN id's, as far as the budget allows
+        deepened = False
+        for key in keys:
+            depth, width = self._placement[key]
+            grown = min(self._history, 2 * depth)
+            cost = _row_nbytes(grown, width) - _row_nbytes(depth, width)
+            if self._budget is None or self._usage + cost <= self._budget:
+                self._move(key, grown, width)
+                self._usage += cost
+                deepened = True
+        return deepened
+
+    def _reserve(
+        self, key: Hashable, placement: tuple[int, int], count: int
+    ) -> tuple[int, int]:
+        # Deepen a CAN id ahead of a batch of count samples, a store only
+        # keeps its depth of them, as far as the history and budget allow
+        depth, width = placement
+        grown = depth
+        while grown < min(count, self._history):
+            grown = min(self._history, 2 * grown)
+        while grown > depth:
+            cost = _row_nbytes(grown, width) - _row_nbytes(depth, width)
+            if self._budget is None or self._usage + cost <= self._budget:
+                break
+            grown = max(depth, grown // 2)
+        if grown == depth:
+            return placement
+
+        self._usage += cost
+        if key in self._stores.get(placement, ()):
+            return self._move(key, grown, width)
+        self._placement[key] = (grown, width)
+        return grown, width
+
+    def _fit(self) -> None:
+        budget = self._budget
+        while budget is not None and self._usage > budget:
+            count = max(1, len(self._recent) // 8)
+            deep = []
+            for key in self._recent:
+                if self._placement[key][0] > self._default[0]:
+                    deep.append(key)
+                    if len(deep) == count:
+                        break
+
+            if deep:
+                for key in deep:
+                    depth, width = self._placement[key]
+                    self._move(key, max(self._default[0], depth // 2), width)
+                self._account()
+                continue
+
+            # Stores release whole rows down to a minimum, evict the fewest
+            # CAN id's that free any, none once evicting no longer helps
+            limit = len(self._recent) - 1
+            count = min(count, limit)
+            while count and not self._releasable(count):
+                count = 0 if count == limit else min(2 * count, limit)
+            if not count:
+                break
+
+            usage = self._usage
+            self._evict(count)
+            self._account()
+            if self._usage >= usage:
+                break
+
+    def _releasable(self, count: int) -> int:
+        # Bytes the stores would free if the least recent CAN id's were evicted
+        evicted = Counter(
+            self._placement[key] for key in itertools.islice(self._recent, count)
+        )
+        freed = 0
+        for placement, n in evicted.items():
+            store = self._stores[placement]
+            if n == len(store) and placement != self._default:
+                freed += store.nbytes
+            else:
+                freed += store.nbytes - store.compacted_nbytes(len(store) - n)
+        return freed
+
+    def _evict(self, count: int) -> None:
+        evicted = [self._recent.popitem(last=False)[0] for _ in range(count)]
+        placements = set()
+        for key in evicted:
+            placement = self._placement.pop(key)
+            self._stores[placement].remove(key)
+            placements.add(placement)
+        for placement in placements:
+            self._release(placement)
+        self._statistics.remove(evicted)
+        self._evicted.update(evicted)
+
+    def _move(self, key: Hashable, depth: int, width: int) -> tuple[int, int]:
+        # Move the newest samples of a CAN id to the store of another
+        # depth or width, oldest sample first
+        source = self._stores[self._placement[key]]
+        target = self._store((depth, width))
+        n = min(source.count(key), depth)
+        history = {name: source.last(key, n, name) for name in (*FIELDS, "payload")}
+        history["payload"] = fit_payloads(history["payload"], width)
+        target.assign(key, **history)
+
+        source.remove(key)
+        self._release(self._placement[key])
+        self._placement[key] = (depth, width)
+        return depth, width
+
+    @property
+    def _default(self) -> tuple[int, int]:
+        # Placement of newly received CAN id's
+        return min(Default.BUFFER_MIN, self._history), PAYLOAD_WIDTH
+
+    def _store(self, placement: tuple[int, int]) -> SampleStore:
+        store = self._stores.get(placement)
+        if store is None:
+            depth, width = placement
+            store = self._stores[placement] = SampleStore(
+                depth,
+                fields={**FIELDS, "payload": (np.uint8, width)},
+                extrema="value",
+            )
+        return store
+
+    def _release(self, placement: tuple[int, int]) -> None:
+        # Drop a store no CAN id is left in, or the rows it no longer needs
+        store = self._stores[placement]
+        if not len(store) and placement != self._default:
+            del self._stores[placement]
+        else:
+            store.compact()
+
+    def _account(self) -> None:
+        self._usage = (
+            sum(store.nbytes for store in self._stores.values())
+            + self._statistics.nbytes
+        )
+
+    def _lookup(self, can_id: int) -> SampleStore:
+        # Unknown CAN id's read as zeros from the store of new ones
+        return self._stores[self._placement.get(can_id, self._default)]
+
+    def _payload(self, can_id: int, n: int) -> np.ndarray:
+        return self._lookup(can_id).last(can_id, n, "payload")
+
+    def _plan(self, can_id: int):
+        # Signal plan of the CAN id of a key, regardless of its channel
+        if self._database is None:
+            return None
+        return self._database.get(split_key(can_id)[1])
+
+    def _select(self, can_id: int) -> tuple[int, np.ndarray | None]:
+        # Number of samples to plot and their x positions, None for the index
+        if self._window is None:
+            return self._len, None
+
+        # Samples older than the window are left out, as are unwritten ones
+        # which would otherwise pass as received at time zero
+        store = self._lookup(can_id)
+        timestamps = store.last(can_id, store.count(can_id), "timestamp")
+        start = int(np.searchsorted(timestamps, self._latest - self._window))
+        return len(timestamps) - start, timestamps[start:] - self._latest
+
+    @synchronized
     def get_data(self, can_id: int) -> PlotData:
-        return convert_payloads(self._data[can_id][-self._len :])
+        self._flush()
+        n, x = self._select(can_id)
+        store = self._lookup(can_id)
+        payloads = store.last(can_id, n, "payload")
+        dlc = store.last(can_id, n, "dlc")
+
+        values = store.last(can_id, n, "value")
+
+        channels = {}
+        plan = self._plan(can_id)
+        if plan is not None and plan.signals:
+            decoded = plan.decode(payloads)
+            channels = {
+                signal: decoded[:, index] for index, signal in enumerate(plan.signals)
+            }
+        elif self._byte_channels:
+            channels = {
+                f"B{index}": byte_series(payloads, index)
+                for index in range(int(dlc.max(initial=0)))
+            }
+        elif dlc.max(initial=0) > PAYLOAD_WIDTH:
+            # A CAN FD payload is too wide to plot as a single value
+            channels = {
+                f"S{index}": segment_series(payloads, index)
+                for index in range(-(-int(dlc.max()) // 8))
+            }
+
+        # Limits of the combined value are maintained on write, over the
+        # written samples only, channels are few enough to reduce directly
+        y_limits = (
+            None if channels else store.limits(can_id, min(n, store.count(can_id)))
+        )
+
+        # Every row shares the same time axis, ending at the newest sample
+        x_limits = None if self._window is None else (-self._window, 0.0)
+        return convert_payloads(values, channels, y_limits, x, x_limits)
+
+    @synchronized
+    def get_payloads(self, can_id: int) -> np.ndarray:
+        """
+        Get the raw payloads currently in the plot window.
+
+        Returns:
+            np.ndarray: uint8 matrix shaped [sample, byte]
+        """
+        self._flush()
+        return self._payload(can_id, self._len).copy()
+
+    @synchronized
+    def get_bitfield(self, can_id: int, bitfield: Bitfield) -> PlotData:
+        """
+        Get the series of an arbitrary bitfield within the plot window.
+
+        Args:
+            can_id (int)
+            bitfield (Bitfield)
+        """
+        self._flush()
+        return convert_payloads(bitfield.extract(self._payload(can_id, self._len)))
+
+    @synchronized
+    def get_signals(self, can_id: int) -> dict[str, np.ndarray]:
+        """
+        Decode the physical value of each DBC signal within the plot window.
+
+        Returns:
+            dict[str, np.ndarray]: Signal name and values, empty if the CAN id
+            is not defined in the loaded database
+        """
+        self._flush()
+        plan = self._plan(can_id)
+        if plan is None:
+            return {}
+
+        decoded = plan.decode(self._payload(can_id, self._len))
+        return {signal: decoded[:, index] for index, signal in enumerate(plan)}
+
+    @synchronized
+    def get_ids(self) -> list[int]:
+        self._flush()
+        return list(self._placement)
+
+    @synchronized
+    def get_statistics(self) -> np.ndarray:
+        """
+        Get the bus statistics of every CAN id received since the last clear.
+
+        Returns:
+            np.ndarray: Structured array of statistics.STATISTICS
+        """
+        self._flush()
+        return self._statistics.snapshot()
+
+    @synchronized
+    def get_toggles(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the fraction of frames that toggled each payload bit per CAN id.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: CAN id's in ascending order and
+                the toggle rates shaped [CAN id, bit]
+        """
+        self._flush()
+        return self._statistics.get_toggles()
+
+    @synchronized
+    def reset_toggles(self) -> None:
+        self._flush()
+        self._statistics.reset_toggles()
+
+    @synchronized
+    def clear(self) -> None:
+        self._pending.clear()
+        self._stores.clear()
+        self._placement.clear()
+        self._recent.clear()
+        self._statistics.clear()
+        self._latest = 0.0
+        self._store(self._default)
+        self._account()
+
+    def get_history(self) -> int:
+        return self._history
+
+    @synchronized
+    def set_history(self, size: int) -> None:
+        """
+        Set the number of values stored for each CAN id.
+
+        Each CAN id grows towards it as it fills up what it keeps so far.
+
+        Args:
+            size (int): N values
+        """
+        self._flush()
+        self._history = size
+        self._store(self._default)
+        for key, (depth, width) in list(self._placement.items()):
+            if depth > size:
+                self._move(key, size, width)
+        for placement in list(self._stores):
+            self._release(placement)
+        self._account()
+        self._fit()
+
+    @synchronized
+    def get_memory_usage(self) -> int:
+        """
+        Get the bytes allocated for samples and statistics.
+        """
+        self._flush()
+        return self._usage
+
+    def get_memory_budget(self) -> int | None:
+        return self._budget
+
+    @synchronized
+    def set_memory_budget(self, budget: int | None) -> None:
+        """
+        Limit the memory allocated for samples and statistics.
+
+        Over budget, the samples kept by the least recently received CAN id's
+        are halved down to Default.BUFFER_MIN before they are evicted along
+        with their statistics.
+
+        Args:
+            budget (int | None): Bytes, None for no limit
+        """
+        self._flush()
+        self._budget = budget
+        self._fit()
+
+    @synchronized
+    def pop_evicted(self) -> set[Hashable]:
+        """
+        Get the CAN id's evicted to stay within budget since the previous call.
+        """
+        self._flush()
+        evicted, self._evicted = self._evicted, set()
+        return evicted - set(self._recent)
 
     def set_limit(self, limit: int) -> None:
         """
@@ -42,3 +576,46 @@ class PlotModel:
             limit (int): N values
         """
         self._len = limit
+
+    def set_window(self, seconds: float | None) -> None:
+        """
+        Plot the samples received within a trailing time window against time.
+
+        The window ends at the newest sample of any CAN id, so every plot
+        shares the same x axis, measured in seconds before that sample.
+
+        Args:
+            seconds (float | None): Window length, None to plot the number
+                of samples set by set_limit against their index
+        """
+        self._window = seconds
+
+    def set_byte_channels(self, enabled: bool) -> None:
+        """
+        Plot each payload byte as its own series instead of the combined value.
+
+        Args:
+            enabled (bool)
+        """
+        self._byte_channels = enabled
+
+    def set_filter(self, frame_filter: FrameFilter | None) -> None:
+        """
+        Discard frames of CAN id's the filter does not accept as they arrive.
+
+        Used when the bus cannot filter in its driver, frames already stored
+        are kept.
+
+        Args:
+            frame_filter (FrameFilter | None): None to accept every frame
+        """
+        self._filter = frame_filter or None
+
+    def set_database(self, database: SignalDatabase | None) -> None:
+        """
+        Plot decoded DBC signals for every CAN id the database defines.
+
+        Args:
+            database (SignalDatabase | None): None to plot raw payloads
+        """
+        self._database = database
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+# Payloads are stored as a uint8 matrix shaped [sample, byte], left aligned
+# and zero padded to the width of the store, alongside the length of each
+# sample so the original frame can be reconstructed.
+
+PAYLOAD_WIDTH = 8
+FD_PAYLOAD_WIDTH = 64
+
+# CAN FD payloads are stored in the narrowest of these widths that holds
+# the longest payload of their CAN id, classic frames never exceed the first
+WIDTH_CLASSES = (PAYLOAD_WIDTH, 16, 32, FD_PAYLOAD_WIDTH)
+
+Byteorder = Literal["big", "little"]
+
+
+def pack_payloads(payloads: list[bytes], width: int = PAYLOAD_WIDTH) -> np.ndarray:
+    """
+    Pack raw payloads into a zero padded uint8 matrix.
+
+    Args:
+        payloads (list[bytes])
+        width (int): Number of columns, longer payloads are truncated
+
+    Returns:
+        np.ndarray: Matrix shaped [sample, width]
+    """
+    buffer = b"".join(bytes(data[:width]).ljust(width, b"\x00") for data in payloads)
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(len(payloads), width)
+
+
+def width_class(length: int) -> int:
+    """
+    Get the storage width of payloads up to a length, see WIDTH_CLASSES.
+    """
+    for width in WIDTH_CLASSES:
+        if length <= width:
+            return width
+    return FD_PAYLOAD_WIDTH
+
+
+def fit_payloads(payloads: np.ndarray, width: int) -> np.ndarray:
+    """
+    Truncate or zero pad a payload matrix to a number of columns.
+    """
+    if payloads.shape[1] >= width:
+        return payloads[:, :width]
+    fitted = np.zeros((len(payloads), width), dtype=np.uint8)
+    fitted[:, : payloads.shape[1]] = payloads
+    return fitted
+
+
+def _as_uint64(payloads: np.ndarray, byteorder: Byteorder) -> np.ndarray:
+    dtype = ">u8" if byteorder == "big" else "<u8"
+    return np.ascontiguousarray(payloads[:, :8]).view(dtype).ravel().astype(np.uint64)
+
+
+def to_integer(payloads: np.ndarray, dlc: np.ndarray) -> np.ndarray:
+    """
+    Combine each payload into one big endian integer.
+
+    Equivalent to int.from_bytes(data, "big") per sample, computed in one pass.
+
+    Args:
+        payloads (np.ndarray): Matrix shaped [sample, 8]
+        dlc (np.ndarray): Length of each sample
+
+    Returns:
+        np.ndarray: uint64 value of each sample
+    """
+    values = _as_uint64(payloads, "big")
+    shift = (8 * (8 - np.minimum(dlc, 8))).astype(np.uint64)
+    # Shifting a uint64 by 64 is undefined, empty payloads are zero regardless
+    return np.where(dlc > 0, values >> np.minimum(shift, 63), 0).astype(np.uint64)
+
+
+def byte_series(payloads: np.ndarray, index: int) -> np.ndarray:
+    """
+    Get the series of a single payload byte.
+    """
+    return payloads[:, index]
+
+
+def word_series(
+    payloads: np.ndarray, index: int, size: int = 2, byteorder: Byteorder = "big"
+) -> np.ndarray:
+    """
+    Get the series of a multi byte word starting at a byte index.
+
+    Args:
+        payloads (np.ndarray): Matrix shaped [sample, byte]
+        index (int): First byte of the word
+        size (int): Number of bytes in the word
+        byteorder (Byteorder)
+
+    Returns:
+        np.ndarray: uint64 value of each sample
+    """
+    columns = payloads[:, index : index + size].astype(np.uint64)
+    if byteorder == "little":
+        columns = columns[:, ::-1]
+    weights = np.uint64(1) << (
+        np.uint64(8) * np.arange(size - 1, -1, -1, dtype=np.uint64)
+    )
+    return (columns * weights).sum(axis=1, dtype=np.uint64)
+
+
+def segment_series(payloads: np.ndarray, index: int) -> np.ndarray:
+    """
+    Get the series of an 8 byte segment, the combined value of CAN FD payloads.
+
+    Args:
+        payloads (np.ndarray): Matrix shaped [sample, byte]
+        index (int): Segment, covering bytes 8 * index up to 8 * index + 7
+
+    Returns:
+        np.ndarray: uint64 big endian value of each sample
+    """
+    return word_series(payloads, 8 * index, 8)
+
+
+@dataclass(frozen=True)
+class Bitfield:
+    """
+    Location of an arbitrary group of bits within a payload.
+
+    For big endian fields ``start`` counts from the most significant bit of
+    the first byte, for little endian fields it counts from the least
+    significant bit of the first byte.
+    """
+
+    start: int
+    length: int
+    byteorder: Byteorder = "big"
+    signed: bool = False
+
+    def extract(self, payloads: np.ndarray) -> np.ndarray:
+        """
+        Extract the field from every sample.
+
+        Args:
+            payloads (np.ndarray): Matrix shaped [sample, 8]
+
+        Returns:
+            np.ndarray: int64 value of each sample
+        """
+        values = _as_uint64(payloads, self.byteorder)
+        if self.byteorder == "big":
+            shift = 64 - self.start - self.length
+        else:
+            shift = self.start
+
+        mask = np.uint64((1 << self.length) - 1)
+        raw = (values >> np.uint64(shift)) & mask
+
+        if not self.signed:
+            return raw.astype(np.int64)
+
+        if self.length == 64:
+            return raw.view(np.int64)
+
+        sign = np.uint64(1 << (self.length - 1))
+        return (raw ^ sign).astype(np.int64) - np.int64(sign)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from collections.abc import Collection, Mapping
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# Heatmap colors from never to always changing, as RGB in [0, 1]
+HEATMAP_STOPS = np.array(
+    [
+        (0.12, 0.12, 0.12),
+        (0.55, 0.10, 0.45),
+        (0.95, 0.35, 0.10),
+        (1.00, 0.90, 0.30),
+    ]
+)
+
+
+def convert_payloads(
+    payloads: Collection,
+    channels: Mapping[str, Collection] | None = None,
+    y_limits: tuple[float, float] | None = None,
+    x: Collection | None = None,
+    x_limits: tuple[float, float] | None = None,
+) -> PlotData:
+    """
+    Package plot series for drawing.
+
+    Args:
+        payloads (Collection): Combined value of each sample
+        channels (Mapping[str, Collection] | None): Series drawn in place of
+            the combined value
+        y_limits (tuple[float, float] | None): Known limits of the series
+        x (Collection | None): Position of each sample, the sample index if None
+        x_limits (tuple[float, float] | None): Range of the x axis
+    """
+    if x is None:
+        # The x axis is the sample index so its limits follow from the length
+        x = np.arange(len(payloads), dtype=np.float64)
+        x_limits = x_limits or (0.0, float(max(len(payloads) - 1, 0)))
+
+    # DearPyGui requires contiguous buffers to accept arrays directly
+    return PlotData(
+        x=np.ascontiguousarray(x, dtype=np.float64),
+        y=np.ascontiguousarray(payloads, dtype=np.float64),
+        channels={
+            label: np.ascontiguousarray(values, dtype=np.float64)
+            for label, values in (channels or {}).items()
+        },
+        x_limits=x_limits,
+        y_limits=y_limits,
+    )
+
+
+def _min_max_buckets(
+    y: np.ndarray, buckets: int, size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    # Pad with the final value so extremes of the last bucket are unaffected
+    padded = np.concatenate((y, np.full(buckets * size - len(y), y[-1])))
+    grouped = padded.reshape(buckets, size)
+    rows = np.arange(buckets)
+    low, high = grouped.argmin(axis=1), grouped.argmax(axis=1)
+
+    # Keep the two extremes of each bucket in chronological order
+    first, second = np.minimum(low, high), np.maximum(low, high)
+    return grouped[rows, first], grouped[rows, second]
+
+
+def downsample(data: PlotData, width: int) -> PlotData:
+    """
+    Reduce each series to roughly two points per pixel.
+
+    Samples are grouped into one bucket per pixel and only the minimum and
+    maximum of each bucket are kept, so short spikes stay visible while the
+    number of points sent to DearPyGui is bounded by the plot width.
+
+    Args:
+        data (PlotData)
+        width (int): Plot width in pixels
+
+    Returns:
+        PlotData: Original data if it already fits within the width
+    """
+    length = len(data.x)
+    if width <= 0 or length <= width * 2:
+        return data
+
+    size = -(-length // width)  # ceil
+    buckets = -(-length // size)
+    starts = np.arange(buckets) * size
+
+    x = np.asarray(data.x)
+    x_pairs = np.empty(buckets * 2, dtype=np.float64)
+    x_pairs[0::2] = x[starts]
+    x_pairs[1::2] = x[np.minimum(starts + size // 2, length - 1)]
+
+    def reduce(y: Collection) -> np.ndarray:
+        first, second = _min_max_buckets(np.asarray(y), buckets, size)
+        pairs = np.empty(buckets * 2, dtype=np.float64)
+        pairs[0::2], pairs[1::2] = first, second
+        return pairs
+
+    # Extremes survive min/max decimation so the limits remain valid
+    return PlotData(
+        x=x_pairs,
+        y=reduce(data.y),
+        channels={label: reduce(y) for label, y in data.channels.items()},
+        x_limits=data.x_limits,
+        y_limits=data.y_limits,
+    )
+
+
+@dataclass
+class PlotData:
+    x: Collection
+    y: Collection
+    channels: dict[str, Collection] = field(default_factory=dict)
+    x_limits: tuple[float, float] | None = None
+    y_limits: tuple[float, float] | None = None
+
+    def series(self) -> list[Collection]:
+        """
+        Get every series to draw, channels take the place of the combined value.
+        """
+        return list(self.channels.values()) or [self.y]
+
+    def get_x_limits(self) -> tuple[float, float]:
+        if self.x_limits is None:
+            return float(np.min(self.x)), float(np.max(self.x))
+        return self.x_limits
+
+    def get_y_limits(self) -> tuple[float, float]:
+        if self.y_limits is None:
+            # Multiplexed DBC signals are NaN where another signal was sent
+            series = [np.asarray(y) for y in self.series()]
+            series = [y[~np.isnan(y)] for y in series]
+            series = [y for y in series if len(y)]
+            if not series:
+                return 0.0, 0.0
+            return (
+                float(min(np.min(y) for y in series)),
+                float(max(np.max(y) for y in series)),
+            )
+        return self.y_limits
+
+
+def heatmap_texture(values: np.ndarray, rows: int) -> np.ndarray:
+    """
+    Color a matrix of fractions as the pixels of a dynamic texture.
+
+    Args:
+        values (np.ndarray): Fractions in [0, 1] shaped [row, column], drawn
+            on a square root scale so rarely changing cells stand out
+        rows (int): Height of the texture, rows past the values are transparent
+
+    Returns:
+        np.ndarray: Flat float32 RGBA pixels, one per cell
+    """
+    pixels = np.zeros((rows, values.shape[1], 4), dtype=np.float32)
+    scaled = np.sqrt(np.clip(values, 0, 1)) * (len(HEATMAP_STOPS) - 1)
+    stops = np.arange(len(HEATMAP_STOPS))
+    for channel in range(3):
+        pixels[: len(values), :, channel] = np.interp(
+            scaled, stops, HEATMAP_STOPS[:, channel]
+        )
+    pixels[: len(values), :, 3] = 1.0
+    return pixels.ravel()
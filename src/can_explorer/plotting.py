@@ -1,28 +1,19 @@
 from __future__ import annotations
 
 from collections.abc import Collection
-from dataclasses import dataclass
 from typing import Any
 
 import dearpygui.dearpygui as dpg
 
 from can_explorer.configs import Default
+from can_explorer.plot_data import (  # noqa: F401 | Re-exported for existing imports
+    PlotData,
+    convert_payloads,
+    downsample,
+)
 from can_explorer.tags import generate_tag
 
 
-def convert_payloads(payloads: Collection) -> PlotData:
-    return PlotData(
-        x=tuple(range(len(payloads))),
-        y=tuple(payloads),
-    )
-
-
-@dataclass
-class PlotData:
-    x: Collection
-    y: Collection
-
-
 class LabelItem(str):
     def __new__(cls) -> LabelItem:
         label = dpg.add_button(
@@ -37,6 +28,7 @@ class PlotItem(str):
     x_axis: str
     y_axis: str
     series: str
+    channels: list[str]
 
     def __new__(cls) -> PlotItem:
         with dpg.plot(
@@ -54,9 +46,23 @@ class PlotItem(str):
                 axis=dpg.mvYAxis, lock_min=True, lock_max=True, no_tick_labels=True
             )
             plot.series = dpg.add_line_series(parent=plot.y_axis, x=[], y=[])
+            plot.channels = [plot.series]
 
         return plot
 
+    def set_series(self, x: Collection, ys: list[Collection]) -> None:
+        """
+        Draw one line series per y collection, creating or hiding series as needed.
+        """
+        while len(self.channels) < len(ys):
+            self.channels.append(dpg.add_line_series(parent=self.y_axis, x=[], y=[]))
+
+        for index, series in enumerate(self.channels):
+            if index < len(ys):
+                dpg.configure_item(series, x=x, y=ys[index], show=True)
+            else:
+                dpg.configure_item(series, show=False)
+
 
 class _PercentageWidthTableRow:
     # https://github.com/hoffstadt/DearPyGui/discussions/1306
@@ -96,9 +102,23 @@ class PlotRow:
     def delete(self) -> None:
         dpg.delete_item(self.id)
 
+    def get_width(self) -> int:
+        """
+        Get the width of the plot in pixels, estimated from the
+        default window size until the plot has been rendered.
+        """
+        width = dpg.get_item_rect_size(self.plot)[0]
+        return int(width or Default.WIDTH * Default.PLOT_COLUMN_WIDTH // 100)
+
     def hide(self) -> None:
         dpg.hide_item(self.id)
 
+    def move(self, parent: int, before: int = 0) -> None:
+        """
+        Move the row within its parent, appending it if no item to precede is given.
+        """
+        dpg.move_item(self.id, parent=parent, before=before)
+
     def show(self) -> None:
         dpg.show_item(self.id)
 
@@ -112,9 +132,9 @@ class PlotRow:
             dpg.set_item_label(self.label, label)
 
         if data is not None:
-            dpg.set_axis_limits(self.plot.x_axis, min(data.x), max(data.x))
-            dpg.set_axis_limits(self.plot.y_axis, min(data.y), max(data.y))
-            dpg.configure_item(self.plot.series, x=data.x, y=data.y)
+            dpg.set_axis_limits(self.plot.x_axis, *data.get_x_limits())
+            dpg.set_axis_limits(self.plot.y_axis, *data.get_y_limits())
+            self.plot.set_series(data.x, data.series())
 
         if height is not None:
             dpg.set_item_height(self.label, height)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """
+    Wall clock time of each stage from launch until the first frame is shown.
+
+    Only the standard library is imported so the profile can be started
+    before any heavy module, a disabled profile records nothing.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.stages: list[tuple[str, float]] = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def total(self) -> float:
+        return time.perf_counter() - self._start
+
+    def report(self) -> str:
+        """
+        Format each stage and the time spent outside of them as a table.
+        """
+        total = self.total()
+        rows = self.stages + [("other", total - sum(s for _, s in self.stages))]
+        width = max(len(name) for name, _ in rows)
+
+        lines = [f"Startup took {total * 1e3:.1f} ms"]
+        lines += [
+            f"  {name:<{width}}  {seconds * 1e3:7.1f} ms  {seconds / total:4.0%}"
+            for name, seconds in rows
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import Any, Protocol
+
+from can_explorer.backpressure import Policy
+from can_explorer.plot_data import PlotData
+
+
+class PlotSurface(Protocol):
+    """
+    Destination for plot data, one row per CAN id.
+    """
+
+    def add_rows(self, *can_ids: int) -> None: ...
+
+    def remove_rows(self, *can_ids: int) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def get_ids(self) -> list[int]: ...
+
+    def get_rows(self) -> Mapping[int, Any]:
+        """
+        Get the rows currently visible, only these are redrawn.
+        """
+        ...
+
+    def sync(self) -> set[int]:
+        """
+        Get the CAN id's of rows that became visible since the previous call.
+        """
+        ...
+
+    def update(self, can_id: int, plot_data: PlotData) -> None: ...
+
+
+class View(Protocol):
+    """
+    What the controller needs from a view to run the bus to model pipeline.
+
+    MainView implements it with DearPyGui, NullView without any GUI. The
+    settings and slider callbacks of the controller additionally expect a
+    full MainView.
+    """
+
+    plot: PlotSurface
+
+    def set_main_button_label(self, state: bool) -> None: ...
+
+    def set_timeline(self, duration: float | None) -> None: ...
+
+    def set_channels(self, channels: Sequence[str]) -> None:
+        """
+        Set the name of each bus, rows of other buses than the first are
+        labelled with it.
+        """
+        ...
+
+    def set_shedding(self, policy: Policy | None) -> None:
+        """
+        Indicate the policy currently shedding load, None once it stops.
+        """
+        ...
@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+from wrapt import synchronized
+
+from can_explorer.configs import Default
+from can_explorer.frames import CHANNEL_SHIFT, KEY_SHIFT, Frames
+from can_explorer.payloads import PAYLOAD_WIDTH, fit_payloads
+
+# A capture is a header followed by fixed size little endian records in
+# arrival order. Its sidecar index is a header followed by one entry per CAN
+# id per flushed chunk of records, holding the chunk's record range and the
+# first and last timestamp of that id within it. Index entries are keyed by
+# make_key, so the same CAN id received on several channels is kept apart.
+# Both files are append-only so a capture interrupted mid-write is still
+# readable up to its last record.
+# Records of CAN FD captures hold wider payloads, the width of a capture
+# follows from the record size in its header.
+
+VERSION = 1
+
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("itemsize", "<u4")])
+
+
+def record_dtype(width: int = PAYLOAD_WIDTH) -> np.dtype:
+    return np.dtype(
+        [
+            ("timestamp", "<f8"),
+            ("arbitration_id", "<u4"),
+            ("dlc", "u1"),
+            ("flags", "u1"),
+            ("payload", "u1", (width,)),
+        ]
+    )
+
+
+RECORD = record_dtype()
+
+INDEX = np.dtype(
+    [
+        ("key", "<u8"),  # See make_key
+        ("count", "<u4"),
+        ("start", "<u8"),
+        ("stop", "<u8"),
+        ("t_first", "<f8"),
+        ("t_last", "<f8"),
+    ]
+)
+
+_RECORD_MAGIC = b"CANXREC"
+_INDEX_MAGIC = b"CANXIDX"
+
+
+def index_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_suffix(path.suffix + ".idx")
+
+
+def _header(magic: bytes, dtype: np.dtype) -> bytes:
+    return np.array([(magic, VERSION, dtype.itemsize)], dtype=HEADER).tobytes()
+
+
+def _check_header(path: Path, magic: bytes, dtype: np.dtype) -> None:
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if not len(header) or header["magic"][0] != magic:
+        raise ValueError(f"{path} is not a CAN Explorer capture")
+    if header["version"][0] != VERSION or header["itemsize"][0] != dtype.itemsize:
+        raise ValueError(f"{path} was written by an unsupported version")
+
+
+def _read_record_dtype(path: Path) -> np.dtype:
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    width = PAYLOAD_WIDTH
+    if len(header):
+        width += int(header["itemsize"][0]) - RECORD.itemsize
+    dtype = record_dtype(max(width, PAYLOAD_WIDTH))
+    _check_header(path, _RECORD_MAGIC, dtype)
+    return dtype
+
+
+def to_records(frames: Frames, width: int = PAYLOAD_WIDTH) -> np.ndarray:
+    records = np.empty(len(frames), dtype=record_dtype(width))
+    records["timestamp"] = frames.timestamp
+    records["arbitration_id"] = frames.arbitration_id
+    records["dlc"] = frames.dlc
+    records["flags"] = frames.flags
+    records["payload"] = fit_payloads(frames.payload, width)
+    return records
+
+
+def record_keys(records: np.ndarray) -> np.ndarray:
+    """
+    Get the key of each record, see make_key.
+
+    Returns:
+        np.ndarray: int64 per record
+    """
+    keys = records["arbitration_id"].astype(np.int64)
+    keys |= (records["flags"] >> CHANNEL_SHIFT).astype(np.int64) << KEY_SHIFT
+    return keys
+
+
+def to_frames(records: np.ndarray) -> Frames:
+    return Frames(
+        timestamp=np.ascontiguousarray(records["timestamp"], dtype=np.float64),
+        arbitration_id=np.ascontiguousarray(records["arbitration_id"], np.uint32),
+        dlc=np.ascontiguousarray(records["dlc"]),
+        flags=np.ascontiguousarray(records["flags"]),
+        payload=np.ascontiguousarray(records["payload"]),
+    )
+
+
+def index_chunk(keys: np.ndarray, timestamp: np.ndarray, start: int) -> np.ndarray:
+    """
+    Summarize a chunk of consecutive records into one index entry per CAN id.
+
+    Args:
+        keys (np.ndarray): Key of each record in the chunk, see record_keys
+        timestamp (np.ndarray): Timestamp of each record in the chunk
+        start (int): Position of the chunk's first record in the capture
+
+    Returns:
+        np.ndarray: INDEX entries ordered by key
+    """
+    if not len(keys):
+        return np.empty(0, dtype=INDEX)
+
+    order = np.argsort(keys, kind="stable")
+    unique, first, counts = np.unique(
+        keys[order], return_index=True, return_counts=True
+    )
+
+    entries = np.empty(len(unique), dtype=INDEX)
+    entries["key"] = unique
+    entries["count"] = counts
+    entries["start"] = start
+    entries["stop"] = start + len(keys)
+    entries["t_first"] = np.minimum.reduceat(timestamp[order], first)
+    entries["t_last"] = np.maximum.reduceat(timestamp[order], first)
+    return entries
+
+
+class CaptureWriter:
+    """
+    Streams received frames to an append-only capture file.
+
+    Records are buffered by the file object and the sidecar index is
+    appended whenever a chunk fills up or the flush interval elapses, after
+    the records it refers to have been flushed.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        chunk_size: int = Default.RECORD_CHUNK,
+        flush_interval: float = Default.RECORD_FLUSH,
+        width: int = PAYLOAD_WIDTH,
+    ) -> None:
+        """
+        Args:
+            path (str | Path)
+            chunk_size (int): Records per index chunk
+            flush_interval (float): Seconds between flushes of the index
+            width (int): Payload bytes per record, longer payloads are
+                truncated, FD_PAYLOAD_WIDTH to record CAN FD frames in full
+        """
+        self.path = Path(path)
+        self.width = width
+        self._chunk_size = chunk_size
+        self._flush_interval = flush_interval
+
+        # Both files stay open until close, unless creating either one fails
+        with ExitStack() as stack:
+            self._file = stack.enter_context(self.path.open("wb"))
+            self._file.write(_header(_RECORD_MAGIC, record_dtype(width)))
+            self._index = stack.enter_context(index_path(self.path).open("wb"))
+            self._index.write(_header(_INDEX_MAGIC, INDEX))
+            self._file.flush()
+            self._index.flush()
+            stack.pop_all()
+
+        self._written = 0
+        self._chunk_start = 0
+        self._pending_keys: list[np.ndarray] = []
+        self._pending_times: list[np.ndarray] = []
+        self._deadline = time.monotonic() + flush_interval
+
+    def __enter__(self) -> CaptureWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def written(self) -> int:
+        """
+        Number of records written so far.
+        """
+        return self._written
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    @synchronized
+    def write(self, frames: Frames) -> None:
+        """
+        Append a batch of frames, frames written after close are dropped.
+        """
+        if self.closed or not len(frames):
+            return
+
+        records = to_records(frames, self.width)
+        self._file.write(records.tobytes())
+        self._written += len(records)
+        self._pending_keys.append(frames.keys())
+        self._pending_times.append(records["timestamp"])
+
+        if (
+            self._written - self._chunk_start >= self._chunk_size
+            or time.monotonic() >= self._deadline
+        ):
+            self._flush()
+
+    @synchronized
+    def flush(self) -> None:
+        if not self.closed:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending_keys:
+            entries = index_chunk(
+                np.concatenate(self._pending_keys),
+                np.concatenate(self._pending_times),
+                self._chunk_start,
+            )
+            self._pending_keys.clear()
+            self._pending_times.clear()
+            self._chunk_start = self._written
+
+            # Records first so the index never refers past the end of the file
+            self._file.flush()
+            self._index.write(entries.tobytes())
+
+        self._file.flush()
+        self._index.flush()
+        self._deadline = time.monotonic() + self._flush_interval
+
+    @synchronized
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._flush()
+        self._file.close()
+        self._index.close()
+
+
+class CaptureReader:
+    """
+    Random access to a capture file through a memory map.
+
+    Queries for a CAN id only touch the chunks the index lists for that id
+    within the requested time range. Records written after the last index
+    flush, e.g. by a capture that is still running or was interrupted, are
+    indexed when the reader is opened.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._dtype = _read_record_dtype(self.path)
+
+        # A trailing partial record from an interrupted write is ignored
+        count = (self.path.stat().st_size - HEADER.itemsize) // self._dtype.itemsize
+        if count:
+            self.records = np.memmap(
+                self.path, self._dtype, mode="r", offset=HEADER.itemsize, shape=(count,)
+            )
+        else:
+            self.records = np.empty(0, dtype=self._dtype)
+
+        self.index = self._load_index(index_path(self.path), count)
+
+    def _load_index(self, path: Path, count: int) -> np.ndarray:
+        index = np.empty(0, dtype=INDEX)
+        try:
+            _check_header(path, _INDEX_MAGIC, INDEX)
+        except (OSError, ValueError):
+            pass  # Missing or of an older layout, rebuilt from the records
+        else:
+            index = np.fromfile(path, dtype=INDEX, offset=HEADER.itemsize)
+            index = index[index["stop"] <= count]
+
+        indexed = int(index["stop"].max()) if len(index) else 0
+        tail = self.records[indexed:]
+        return np.concatenate(
+            (index, index_chunk(record_keys(tail), tail["timestamp"], indexed))
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def width(self) -> int:
+        """
+        Payload bytes per record.
+        """
+        return self._dtype["payload"].shape[0]
+
+    def get_ids(self) -> list[int]:
+        """
+        Get the key of every CAN id in the capture, see make_key.
+        """
+        return np.unique(self.index["key"]).tolist()
+
+    def get_time_range(self) -> tuple[float, float]:
+        if not len(self.index):
+            return 0.0, 0.0
+        return float(self.index["t_first"].min()), float(self.index["t_last"].max())
+
+    def count(self, can_id: int) -> int:
+        return int(self.index["count"][self.index["key"] == can_id].sum())
+
+    def read(self, start: int = 0, stop: int | None = None) -> Frames:
+        """
+        Get the frames between two record positions.
+        """
+        return to_frames(self.records[start:stop])
+
+    def query(
+        self, can_id: int, t0: float | None = None, t1: float | None = None
+    ) -> Frames:
+        """
+        Get every frame of a CAN id with a timestamp between t0 and t1.
+
+        Args:
+            can_id (int): Key of the CAN id, see make_key
+            t0 (float | None): Earliest timestamp, inclusive
+            t1 (float | None): Latest timestamp, inclusive
+
+        Returns:
+            Frames: Matching frames in arrival order
+        """
+        t0 = -np.inf if t0 is None else t0
+        t1 = np.inf if t1 is None else t1
+
+        entries = self.index[
+            (self.index["key"] == can_id)
+            & (self.index["t_last"] >= t0)
+            & (self.index["t_first"] <= t1)
+        ]
+
+        chunks = []
+        for start, stop in zip(
+            entries["start"].tolist(), entries["stop"].tolist(), strict=True
+        ):
+            chunk = self.records[start:stop]
+            mask = (
+                (record_keys(chunk) == can_id)
+                & (chunk["timestamp"] >= t0)
+                & (chunk["timestamp"] <= t1)
+            )
+            chunks.append(chunk[mask])
+
+        if not chunks:
+            return Frames.empty(self.width)
+        return to_frames(np.concatenate(chunks))
+
+    def last(self, can_id: int, n: int, t: float | None = None) -> Frames:
+        """
+        Get the most recent frames of a CAN id at or before a timestamp.
+
+        Chunks are visited newest first and only until n frames are found.
+
+        Args:
+            can_id (int): Key of the CAN id, see make_key
+            n (int): Maximum number of frames
+            t (float | None): Latest timestamp, inclusive
+
+        Returns:
+            Frames: Matching frames in arrival order
+        """
+        t = np.inf if t is None else t
+
+        entries = self.index[
+            (self.index["key"] == can_id) & (self.index["t_first"] <= t)
+        ]
+
+        chunks: list[np.ndarray] = []
+        remaining = n
+        for start, stop in zip(
+            entries["start"][::-1].tolist(), entries["stop"][::-1].tolist(), strict=True
+        ):
+            if remaining <= 0:
+                break
+            chunk = self.records[start:stop]
+            chunk = chunk[(record_keys(chunk) == can_id) & (chunk["timestamp"] <= t)]
+            chunks.append(chunk[max(0, len(chunk) - remaining) :])
+            remaining -= len(chunks[-1])
+
+        if not chunks:
+            return Frames.empty(self.width)
+        return to_frames(np.concatenate(chunks[::-1]))
+
+    def close(self) -> None:
+        # The map is released once no frames refer to it
+        self.records = np.empty(0, dtype=self._dtype)
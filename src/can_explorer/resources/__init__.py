@@ -2,19 +2,22 @@ import pathlib
 import platform
 import threading
 from random import randint
-from typing import Any, Final
+from typing import TYPE_CHECKING, Any, Final
 
-from can import Message
+if TYPE_CHECKING:
+    from can import Message
 
 DIR_PATH: Final = pathlib.Path(__file__).parent
 
 HOST_OS: Final = platform.system().lower()
 
 
-def generate_random_can_message() -> Message:
+def generate_random_can_message() -> "Message":
     """
     Generate a random CAN message.
     """
+    from can import Message
+
     message_id = randint(1, 25)
     data_length = randint(1, 8)
     data = (randint(0, 255) for _ in range(data_length))
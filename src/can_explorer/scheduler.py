@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from can_explorer.configs import Default
+
+
+class RenderScheduler:
+    """
+    Paces plot redraws independently of the incoming message rate.
+
+    Ingest threads mark CAN id's as dirty whenever new data arrives while the
+    GUI thread drains the dirty set once per refresh period, so each row is
+    redrawn at most once per frame regardless of bus load.
+    """
+
+    def __init__(self, refresh_rate: float | None = Default.REFRESH_RATE) -> None:
+        self._rate = refresh_rate or 0.0
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+        self._deadline = 0.0
+
+    @property
+    def refresh_rate(self) -> float:
+        return self._rate
+
+    def mark(self, *can_ids: int) -> int:
+        """
+        Flag CAN id's as needing a redraw on the next frame.
+
+        Returns:
+            int: Number of CAN id's that were not already flagged
+        """
+        with self._lock:
+            before = len(self._dirty)
+            self._dirty.update(can_ids)
+            return len(self._dirty) - before
+
+    def is_due(self) -> bool:
+        """
+        Check if the refresh period has elapsed since the last drain.
+        """
+        return time.monotonic() >= self._deadline
+
+    def drain(self) -> set[int]:
+        """
+        Collect and reset the dirty CAN id's, scheduling the next frame.
+
+        Returns:
+            set[int]: CAN id's updated since the previous drain
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+
+        self._deadline = time.monotonic() + self._rate
+        return dirty
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dirty.clear()
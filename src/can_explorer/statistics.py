@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+
+import numpy as np
+
+from can_explorer.frames import Frames, format_key
+from can_explorer.payloads import PAYLOAD_WIDTH, pack_payloads
+
+BITS = PAYLOAD_WIDTH * 8
+
+# Frames added one by one are folded in batches of up to this many
+PENDING_FRAMES = 256
+
+# Running state of each CAN id, the period is tracked with Welford's
+# algorithm so its mean and variance never need the frame history
+STATE = np.dtype(
+    [
+        ("arbitration_id", np.uint64),  # Key of the CAN id, see make_key
+        ("count", np.uint64),
+        ("first", np.float64),
+        ("last", np.float64),
+        ("period", np.float64),  # Mean time between frames
+        ("m2", np.float64),  # Sum of squared period deviations
+        ("dlc", np.uint8),
+        ("dlc_changes", np.uint64),
+        ("payload_changes", np.uint64),
+        ("payload", np.uint8, (PAYLOAD_WIDTH,)),
+        ("toggles", np.uint32, (BITS,)),  # Changes of each payload bit, MSB first
+        ("toggles_since", np.uint64),  # Count when the toggles were reset
+    ]
+)
+
+STATISTICS = np.dtype(
+    [
+        ("arbitration_id", np.uint64),
+        ("count", np.uint64),
+        ("rate", np.float64),  # Frames per second
+        ("period", np.float64),  # Seconds
+        ("jitter", np.float64),  # Standard deviation of the period, seconds
+        ("dlc", np.uint8),
+        ("dlc_changes", np.uint64),
+        ("payload_changes", np.uint64),
+        ("last_seen", np.float64),  # Timestamp of the latest frame
+    ]
+)
+
+# Table heading and STATISTICS field of each column
+COLUMNS = (
+    ("ID", "arbitration_id"),
+    ("Count", "count"),
+    ("Rate (Hz)", "rate"),
+    ("Period (ms)", "period"),
+    ("Jitter (ms)", "jitter"),
+    ("DLC", "dlc"),
+    ("DLC Changes", "dlc_changes"),
+    ("Payload Changes", "payload_changes"),
+    ("Last Seen (s)", "last_seen"),
+)
+
+
+def _format_float(value: float, scale: float = 1.0, digits: int = 1) -> str:
+    return "-" if np.isnan(value) else f"{value * scale:.{digits}f}"
+
+
+def format_row(
+    record: np.void,
+    latest: float,
+    id_format: Callable = hex,
+    channels: Sequence[str] = (),
+) -> tuple[str, ...]:
+    """
+    Format the statistics of one CAN id as the text of each column.
+
+    Args:
+        record (np.void): Record of STATISTICS
+        latest (float): Timestamp the last seen time is relative to
+        id_format (Callable): Formats the CAN id
+        channels (Sequence[str]): Name of each channel
+
+    Returns:
+        tuple[str, ...]: One string per column of COLUMNS
+    """
+    return (
+        format_key(int(record["arbitration_id"]), id_format, channels),
+        str(record["count"]),
+        _format_float(record["rate"]),
+        _format_float(record["period"], 1e3, 2),
+        _format_float(record["jitter"], 1e3, 2),
+        str(record["dlc"]),
+        str(record["dlc_changes"]),
+        str(record["payload_changes"]),
+        _format_float(latest - record["last_seen"]),
+    )
+
+
+class BusStatistics:
+    """
+    Per CAN id bus statistics, updated incrementally as frames arrive.
+
+    Every frame costs a constant amount of work regardless of how many
+    frames or CAN id's were received before it, and a batch of frames is
+    folded in with a few vectorized passes. A snapshot of every CAN id is
+    derived from the running state in a single pass.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self._state = np.zeros(capacity, dtype=STATE)
+        self._slots: dict[int, int] = {}
+        self._pending: list[tuple[int, float, bytes]] = []  # Added one by one
+
+    def __len__(self) -> int:
+        self._fold_pending()
+        return len(self._slots)
+
+    @property
+    def nbytes(self) -> int:
+        return self._state.nbytes
+
+    def _slot(self, can_id: int) -> int:
+        slot = self._slots.get(can_id)
+        if slot is None:
+            slot = self._slots[can_id] = len(self._slots)
+            if slot == len(self._state):
+                self._state = np.resize(self._state, 2 * len(self._state))
+                self._state[slot:] = 0
+            self._state["arbitration_id"][slot] = can_id
+        return slot
+
+    def add(self, can_id: int, timestamp: float, data: bytes | bytearray) -> None:
+        """
+        Fold a single frame into the statistics of its CAN id.
+
+        Single frames are buffered and folded in with the vectorized batch
+        update once PENDING_FRAMES are buffered or the statistics are read.
+        """
+        self._pending.append((can_id, timestamp, bytes(data)))
+        if len(self._pending) >= PENDING_FRAMES:
+            self._fold_pending()
+
+    def extend(self, frames: Frames) -> None:
+        """
+        Fold a batch of frames into the statistics of their CAN id's.
+        """
+        self._fold_pending()
+        if len(frames):
+            self._fold(
+                frames.keys(),
+                frames.timestamp,
+                frames.dlc,
+                frames.payload[:, :PAYLOAD_WIDTH],
+            )
+
+    def _fold_pending(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        can_ids, timestamps, payloads = zip(*pending, strict=True)
+        self._fold(
+            np.array(can_ids, dtype=np.int64),
+            np.array(timestamps, dtype=np.float64),
+            np.fromiter(map(len, payloads), np.uint8, len(payloads)),
+            pack_payloads(list(payloads)),
+        )
+
+    def _fold(
+        self,
+        keys: np.ndarray,
+        timestamps: np.ndarray,
+        dlc: np.ndarray,
+        payloads: np.ndarray,
+    ) -> None:
+        # Group the batch by CAN id, keeping the arrival order within groups
+        order = np.argsort(keys, kind="stable")
+        ids = keys[order]
+        timestamps = timestamps[order]
+        dlc = dlc[order]
+        payloads = payloads[order]
+
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        ends = np.r_[starts[1:], len(ids)] - 1
+        slots = np.array([self._slot(can_id) for can_id in ids[starts].tolist()])
+        state = self._state[slots]
+        seen = state["count"] > 0
+
+        group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(ids)]))
+        first = np.zeros(len(ids), dtype=bool)
+        first[starts] = True
+
+        # Each frame is compared to the previous one of its CAN id, which
+        # for the first frame of a group is the last one already folded in
+        previous = np.r_[0.0, timestamps[:-1]]
+        previous[starts] = state["last"]
+        previous_dlc = np.r_[0, dlc[:-1]].astype(dlc.dtype)
+        previous_dlc[starts] = state["dlc"]
+        previous_payloads = np.roll(payloads, 1, axis=0)
+        previous_payloads[starts] = state["payload"]
+        valid = ~first | seen[group]
+
+        # Period of the batch per CAN id, merged with the running one
+        intervals = np.where(valid, timestamps - previous, 0.0)
+        n_batch = np.bincount(group, weights=valid)
+        mean_batch = np.bincount(group, weights=intervals) / np.maximum(n_batch, 1)
+        deviation = np.where(valid, intervals - mean_batch[group], 0.0)
+        m2_batch = np.bincount(group, weights=deviation**2)
+
+        n_state = np.maximum(state["count"].astype(np.float64) - 1, 0)
+        n = np.maximum(n_state + n_batch, 1)
+        delta = mean_batch - state["period"]
+        state["period"] += delta * n_batch / n
+        state["m2"] += m2_batch + delta**2 * n_state * n_batch / n
+
+        # Bits that differ from the previous payload, summed per CAN id
+        toggled = np.where(valid[:, None], payloads ^ previous_payloads, 0)
+        state["toggles"] += np.add.reduceat(
+            np.unpackbits(toggled.astype(np.uint8), axis=1),
+            starts,
+            axis=0,
+            dtype=np.uint32,
+        )
+
+        dlc_changed = valid & (dlc != previous_dlc)
+        payload_changed = toggled.any(axis=1)
+        state["dlc_changes"] += np.bincount(group, weights=dlc_changed).astype(
+            np.uint64
+        )
+        state["payload_changes"] += np.bincount(group, weights=payload_changed).astype(
+            np.uint64
+        )
+
+        state["first"] = np.where(seen, state["first"], timestamps[starts])
+        state["count"] += np.diff(np.r_[starts, len(ids)]).astype(np.uint64)
+        state["last"] = timestamps[ends]
+        state["dlc"] = dlc[ends]
+        state["payload"] = payloads[ends]
+
+        self._state[slots] = state
+
+    def snapshot(self) -> np.ndarray:
+        """
+        Get the statistics of every CAN id.
+
+        Returns:
+            np.ndarray: Structured array of STATISTICS, one record per CAN id
+                in the order they were first received
+        """
+        self._fold_pending()
+        state = self._state[: len(self._slots)]
+        intervals = np.maximum(state["count"].astype(np.float64) - 1, 0)
+
+        statistics = np.zeros(len(state), dtype=STATISTICS)
+        for name in (
+            "arbitration_id",
+            "count",
+            "dlc",
+            "dlc_changes",
+            "payload_changes",
+        ):
+            statistics[name] = state[name]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            statistics["period"] = np.where(intervals > 0, state["period"], np.nan)
+            statistics["rate"] = np.where(
+                state["period"] > 0, 1 / statistics["period"], np.nan
+            )
+            statistics["jitter"] = np.where(
+                intervals > 1,
+                np.sqrt(state["m2"] / np.maximum(intervals - 1, 1)),
+                np.nan,
+            )
+        statistics["last_seen"] = state["last"]
+        return statistics
+
+    def get_toggles(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get how often each payload bit of every CAN id changed.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: CAN id's in ascending order and the
+                fraction of their frames that toggled each bit, shaped
+                [CAN id, bit] with the most significant bit of byte 0 first
+        """
+        self._fold_pending()
+        state = np.sort(self._state[: len(self._slots)], order="arbitration_id")
+        since = np.maximum(state["toggles_since"], 1)
+        changes = np.maximum(state["count"] - np.minimum(since, state["count"]), 1)
+        return (
+            state["arbitration_id"],
+            (state["toggles"] / changes[:, None].astype(np.float32)).astype(np.float32),
+        )
+
+    def reset_toggles(self) -> None:
+        """
+        Restart counting bit changes, e.g. before applying a stimulus.
+        """
+        self._fold_pending()
+        self._state["toggles"] = 0
+        self._state["toggles_since"] = self._state["count"]
+
+    def remove(self, can_ids: Iterable[int]) -> None:
+        """
+        Forget CAN id's, releasing the capacity they no longer need.
+        """
+        self._fold_pending()
+        removed = [
+            self._slots.pop(can_id) for can_id in can_ids if can_id in self._slots
+        ]
+        if not removed:
+            return
+
+        keep = np.ones(len(self._slots) + len(removed), dtype=bool)
+        keep[removed] = False
+        state = self._state[: len(keep)][keep]
+
+        capacity = max(64, 1 << max(len(state) - 1, 0).bit_length())
+        self._state = np.zeros(capacity, dtype=STATE)
+        self._state[: len(state)] = state
+        self._slots = {
+            can_id: slot for slot, can_id in enumerate(state["arbitration_id"].tolist())
+        }
+
+    def clear(self) -> None:
+        self._state[:] = 0
+        self._slots.clear()
+        self._pending.clear()
@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable, Iterator, Mapping
+
+import numpy as np
+import numpy.typing as npt
+
+from can_explorer.configs import Default
+
+EXTREMA_BLOCK = 64
+
+
+class BlockExtrema:
+    """
+    Running minimum and maximum of a ring buffer field, summarized per block.
+
+    Each row of the ring is split into fixed size blocks whose summary covers
+    the block's first position up to its most recently written position. The
+    extremes of any trailing window are then found by combining the summaries
+    of the blocks it spans and scanning at most one partial block, instead of
+    scanning every sample in the window.
+    """
+
+    def __init__(self, slots: int, size: int, block: int = EXTREMA_BLOCK) -> None:
+        self.block = block
+        self._size = size
+        blocks = -(-size // block)  # ceil
+        self.min = np.zeros((slots, blocks), dtype=np.float64)
+        self.max = np.zeros((slots, blocks), dtype=np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.min.nbytes + self.max.nbytes
+
+    def grow(self, rows: int) -> None:
+        """
+        Change the number of rows, rows past a smaller count are dropped.
+        """
+        for name in ("min", "max"):
+            array = getattr(self, name)
+            grown = np.zeros((rows, array.shape[1]), dtype=array.dtype)
+            grown[: min(rows, len(array))] = array[:rows]
+            setattr(self, name, grown)
+
+    def update(self, slot: int, index: int, value: float) -> None:
+        """
+        Fold a single value written at a ring position into its block.
+        """
+        block = index // self.block
+        if index % self.block == 0:
+            self.min[slot, block] = self.max[slot, block] = value
+        else:
+            self.min[slot, block] = min(self.min[slot, block], value)
+            self.max[slot, block] = max(self.max[slot, block], value)
+
+    def summarize(self, values: np.ndarray, slots: np.ndarray, last: np.ndarray):
+        """
+        Recompute block summaries from the stored values in one vectorized pass.
+
+        Args:
+            values (np.ndarray): Field array shaped [slot, sample]
+            slots (np.ndarray): Slot of each block to recompute
+            last (np.ndarray): Most recently written ring position of each block
+        """
+        if not len(slots):
+            return
+
+        first = (last // self.block) * self.block
+        lengths = last - first + 1
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        columns = np.arange(lengths.sum()) - np.repeat(starts - first, lengths)
+        flat = values[np.repeat(slots, lengths), columns]
+
+        blocks = last // self.block
+        self.min[slots, blocks] = np.minimum.reduceat(flat, starts)
+        self.max[slots, blocks] = np.maximum.reduceat(flat, starts)
+
+    def rebuild(self, values: np.ndarray, cursor: np.ndarray, rows: int) -> None:
+        """
+        Recompute every block summary, e.g. after the ring has been resized.
+        """
+        blocks = self.min.shape[1]
+        slots = np.repeat(np.arange(rows), blocks)
+        last = np.tile(
+            np.minimum(np.arange(1, blocks + 1) * self.block, self._size) - 1, rows
+        )
+
+        # The block holding the cursor is only summarized up to the cursor
+        written = (cursor[:rows] - 1) % self._size
+        head = np.arange(rows) * blocks + written // self.block
+        last[head] = written
+
+        self.summarize(values, slots, last)
+
+    def limits(self, values: np.ndarray, slot: int, cursor: int, n: int):
+        """
+        Get the minimum and maximum of the last n values of a slot.
+
+        Args:
+            values (np.ndarray): Field row of the slot in its mirrored layout
+            slot (int)
+            cursor (int): Next ring position to be written
+            n (int): Window length
+
+        Returns:
+            tuple[float, float]
+        """
+        if n <= 0:
+            return 0.0, 0.0
+
+        stop = cursor + self._size
+        start = stop - n
+        base = (start // self._size) * self._size
+        boundary = base + min(-(-(start - base) // self.block) * self.block, self._size)
+
+        prefix = values[start : min(boundary, stop)]
+        low = prefix.min(initial=np.inf)
+        high = prefix.max(initial=-np.inf)
+        if boundary >= stop:
+            return float(low), float(high)
+
+        first = (boundary % self._size) // self.block
+        last = ((stop - 1) % self._size) // self.block
+        if first <= last:
+            blocks = slice(first, last + 1)
+            low = min(low, self.min[slot, blocks].min())
+            high = max(high, self.max[slot, blocks].max())
+        else:
+            low = min(
+                low, self.min[slot, first:].min(), self.min[slot, : last + 1].min()
+            )
+            high = max(
+                high, self.max[slot, first:].max(), self.max[slot, : last + 1].max()
+            )
+        return float(low), float(high)
+
+
+def _compacted_rows(keys: int, minimum: int) -> int:
+    return max(minimum, 1 << max(keys - 1, 0).bit_length())
+
+
+class SampleStore:
+    """
+    Columnar ring buffer storage shared by every CAN id.
+
+    Each field lives in its own array indexed by ``[slot, sample, ...]`` where
+    every CAN id is assigned a dense slot on first use. Every sample is written
+    into both halves of its row so the most recent N samples of a slot are
+    always a contiguous view, and operations spanning all id's (clear, resize,
+    aggregates) act on whole arrays at once rather than looping over
+    independent buffers.
+
+    A scalar field can optionally have its running extremes maintained on
+    write so the limits of any trailing window are available without a scan.
+    """
+
+    def __init__(
+        self,
+        size: int = Default.BUFFER_MAX,
+        slots: int = 16,
+        fields: Mapping[str, npt.DTypeLike] | None = None,
+        extrema: str | None = None,
+    ) -> None:
+        fields = fields or {"value": np.uint64}
+        self._size = size
+        self._index: dict[Hashable, int] = {}
+        self._keys: list[Hashable] = []
+        self._fields = {
+            name: np.zeros((slots, size * 2), dtype=dtype)
+            for name, dtype in fields.items()
+        }
+        self._cursor = np.zeros(slots, dtype=np.intp)
+        self._count = np.zeros(slots, dtype=np.intp)  # Samples held, up to size
+        self._extrema_field = extrema
+        self._extrema = BlockExtrema(slots, size) if extrema else None
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes allocated, including the rows reserved for keys to come.
+        """
+        return (
+            sum(array.nbytes for array in self._fields.values())
+            + self._cursor.nbytes
+            + self._count.nbytes
+            + (self._extrema.nbytes if self._extrema is not None else 0)
+        )
+
+    def count(self, key: Hashable) -> int:
+        """
+        Get the number of samples held for a key, at most the size.
+        """
+        slot = self._index.get(key)
+        return 0 if slot is None else int(self._count[slot])
+
+    def slot(self, key: Hashable) -> int:
+        """
+        Get the slot assigned to a key, allocating one if needed.
+        """
+        try:
+            return self._index[key]
+        except KeyError:
+            pass
+
+        slot = len(self._keys)
+        if slot == len(self._cursor):
+            self._grow(slot * 2)
+
+        self._index[key] = slot
+        self._keys.append(key)
+        return slot
+
+    def slots(self, keys: Iterable[Hashable]) -> np.ndarray:
+        """
+        Map keys to their slots, allocating any that are new.
+
+        An array of keys is looked up once per distinct key.
+        """
+        if isinstance(keys, np.ndarray):
+            unique, inverse = np.unique(keys, return_inverse=True)
+            return self.slots(unique.tolist())[inverse]
+        return np.fromiter((self.slot(key) for key in keys), dtype=np.intp)
+
+    def _grow(self, rows: int) -> None:
+        # Also shrinks, the rows past a smaller count must be unused
+        kept = min(rows, len(self._cursor))
+        for name, array in self._fields.items():
+            grown = np.zeros((rows, *array.shape[1:]), dtype=array.dtype)
+            grown[:kept] = array[:kept]
+            self._fields[name] = grown
+
+        for name in ("_cursor", "_count"):
+            array = np.zeros(rows, dtype=np.intp)
+            array[:kept] = getattr(self, name)[:kept]
+            setattr(self, name, array)
+
+        if self._extrema is not None:
+            self._extrema.grow(rows)
+
+    def compact(self, minimum: int = 16) -> None:
+        """
+        Release the rows reserved beyond the next power of two of the keys.
+        """
+        rows = _compacted_rows(len(self._keys), minimum)
+        if rows < len(self._cursor):
+            self._grow(rows)
+
+    def compacted_nbytes(self, keys: int, minimum: int = 16) -> int:
+        """
+        Get the bytes allocated once compacted down to a number of keys.
+        """
+        rows = min(len(self._cursor), _compacted_rows(keys, minimum))
+        return self.nbytes // len(self._cursor) * rows
+
+    def append(self, key: Hashable, **values) -> None:
+        """
+        Append a single sample.
+
+        Args:
+            key (Hashable)
+            **values: Value of each field, omitted fields are zeroed
+        """
+        slot = self.slot(key)
+        index = self._cursor[slot]
+        for name, array in self._fields.items():
+            value = values.get(name, 0)
+            array[slot, index] = array[slot, index + self._size] = value
+        self._cursor[slot] = (index + 1) % self._size
+        self._count[slot] = min(self._count[slot] + 1, self._size)
+
+        if self._extrema is not None:
+            value = self._fields[self._extrema_field][slot, index]
+            self._extrema.update(slot, index, value)
+
+    def extend(self, keys: Iterable[Hashable], **values: npt.ArrayLike) -> None:
+        """
+        Append a batch of samples in a single vectorized pass.
+
+        Args:
+            keys (Iterable[Hashable]): Key of each sample
+            **values: Value of each field for every sample, in arrival order
+        """
+        slots = self.slots(keys)
+        if not len(slots):
+            return
+
+        # Rank each sample within its slot while preserving arrival order
+        order = np.argsort(slots, kind="stable")
+        slots = slots[order]
+        unique, start, counts = np.unique(slots, return_index=True, return_counts=True)
+        rank = np.arange(len(slots)) - np.repeat(start, counts)
+
+        # Only the newest samples of a slot survive a batch larger than the buffer
+        keep = rank >= np.repeat(counts, counts) - self._size
+        order, slots, rank = order[keep], slots[keep], rank[keep]
+
+        index = (self._cursor[slots] + rank) % self._size
+        for name, array in self._fields.items():
+            if name in values:
+                value = np.asarray(values[name], dtype=array.dtype)[order]
+            else:
+                value = 0
+            array[slots, index] = value
+            array[slots, index + self._size] = value
+
+        self._cursor[unique] = (self._cursor[unique] + counts) % self._size
+        self._count[unique] = np.minimum(self._count[unique] + counts, self._size)
+
+        if self._extrema is not None:
+            # Summarize each touched block up to its last write in this batch
+            blocks = slots * self._extrema.min.shape[1] + index // self._extrema.block
+            order = np.lexsort((rank, blocks))
+            blocks = blocks[order]
+            last = np.append(blocks[1:] != blocks[:-1], True)
+            self._extrema.summarize(
+                self._fields[self._extrema_field],
+                slots[order][last],
+                index[order][last],
+            )
+
+    def assign(self, key: Hashable, **values: npt.ArrayLike) -> None:
+        """
+        Replace every sample of a key, e.g. to move it between stores.
+
+        Args:
+            key (Hashable)
+            **values: Samples of each field in chronological order, only the
+                newest that fit are kept, omitted fields are zeroed
+        """
+        slot = self.slot(key)
+        n = min(self._size, max((len(value) for value in values.values()), default=0))
+        for name, array in self._fields.items():
+            array[slot] = 0
+            if name in values:
+                value = np.asarray(values[name], dtype=array.dtype)[-n:] if n else 0
+                array[slot, :n] = array[slot, self._size : self._size + n] = value
+        self._cursor[slot] = n % self._size
+        self._count[slot] = n
+
+        if self._extrema is not None:
+            self._extrema.min[slot] = self._extrema.max[slot] = 0
+            blocks = np.arange(0, n, self._extrema.block)
+            last = np.minimum(blocks + self._extrema.block, n) - 1
+            self._extrema.summarize(
+                self._fields[self._extrema_field], np.full(len(blocks), slot), last
+            )
+
+    def last(self, key: Hashable, n: int, field: str = "value") -> np.ndarray:
+        """
+        Get a view of the most recent samples of a key in chronological order.
+
+        Note: the view is invalidated by subsequent writes, copy it
+        if it must outlive the next append.
+
+        Args:
+            key (Hashable)
+            n (int): Number of samples
+            field (str)
+
+        Returns:
+            np.ndarray: Contiguous view of the last n samples, zeros if the
+                key is not stored
+        """
+        n = max(0, min(n, self._size))
+        slot = self._index.get(key)
+        if slot is None:
+            array = self._fields[field]
+            return np.zeros((n, *array.shape[2:]), dtype=array.dtype)
+        stop = self._cursor[slot] + self._size
+        return self._fields[field][slot, stop - n : stop]
+
+    def window(self, n: int, field: str = "value") -> np.ndarray:
+        """
+        Gather the most recent samples of every key into one array.
+
+        Args:
+            n (int): Number of samples per key
+            field (str)
+
+        Returns:
+            np.ndarray: Array shaped [key, sample, ...] ordered by slot
+        """
+        n = max(0, min(n, self._size))
+        rows = len(self._keys)
+        stop = self._cursor[:rows, np.newaxis] + self._size
+        columns = stop - n + np.arange(n)
+        return self._fields[field][np.arange(rows)[:, np.newaxis], columns]
+
+    def limits(self, key: Hashable, n: int) -> tuple[float, float]:
+        """
+        Get the minimum and maximum of the most recent samples of a key.
+
+        Raises:
+            RuntimeError: If the store was created without an extrema field.
+        """
+        if self._extrema is None:
+            raise RuntimeError("Store does not maintain extrema")
+
+        slot = self._index.get(key)
+        if slot is None:
+            return 0.0, 0.0
+        n = max(0, min(n, self._size))
+        values = self._fields[self._extrema_field][slot]
+        return self._extrema.limits(values, slot, self._cursor[slot], n)
+
+    def resize(self, size: int) -> None:
+        """
+        Change the number of samples kept per key, preserving the newest ones.
+        """
+        if size == self._size:
+            return
+
+        n = min(size, self._size)
+        rows = len(self._keys)
+        for name, array in self._fields.items():
+            kept = self.window(n, name)
+            resized = np.zeros((len(array), size * 2, *array.shape[2:]), array.dtype)
+            resized[:rows, :n] = kept
+            resized[:rows, size : size + n] = kept
+            self._fields[name] = resized
+
+        self._cursor[:] = n % size
+        self._count = np.minimum(self._count, n)
+        self._size = size
+
+        if self._extrema is not None:
+            self._extrema = BlockExtrema(len(self._cursor), size)
+            self._extrema.rebuild(
+                self._fields[self._extrema_field], self._cursor, len(self._cursor)
+            )
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Remove a key and its samples, the last slot is moved into its place.
+
+        Raises:
+            KeyError: If the key is not stored.
+        """
+        slot = self._index.pop(key)
+        last = len(self._keys) - 1
+        moved = self._keys.pop()
+
+        if slot != last:
+            self._index[moved] = slot
+            self._keys[slot] = moved
+            for array in self._fields.values():
+                array[slot] = array[last]
+            self._cursor[slot] = self._cursor[last]
+            self._count[slot] = self._count[last]
+            if self._extrema is not None:
+                self._extrema.min[slot] = self._extrema.min[last]
+                self._extrema.max[slot] = self._extrema.max[last]
+
+        for array in self._fields.values():
+            array[last] = 0
+        self._cursor[last] = self._count[last] = 0
+        if self._extrema is not None:
+            self._extrema.min[last] = self._extrema.max[last] = 0
+
+    def clear(self) -> None:
+        """
+        Remove every key and zero the sample storage.
+        """
+        self._index.clear()
+        self._keys.clear()
+        for array in self._fields.values():
+            array[:] = 0
+        self._cursor[:] = self._count[:] = 0
+
+        if self._extrema is not None:
+            self._extrema.min[:] = self._extrema.max[:] = 0
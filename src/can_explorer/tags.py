@@ -24,13 +24,43 @@ class Tag:
     clear_button: int
     plot_buffer_slider: int
     plot_height_slider: int
+    timeline_slider: int
+    metrics_overlay: int
+    shedding_text: int
+    memory_text: int
+    metrics_text: int
     plot_tab: int
     settings_tab: int
+    statistics_tab: int
+    statistics_table: int
+    heatmap_tab: int
+    heatmap_registry: int
+    heatmap_y_axis: int
+    heatmap_series: int
+    heatmap_reset: int
     settings_interface: int
     settings_channel: int
     settings_baudrate: int
+    settings_fd: int
+    settings_data_bitrate: int
+    settings_capture_process: int
+    settings_policy: int
+    settings_filters: int
+    settings_filters_apply: int
     settings_apply: int
     settings_id_format: int
+    settings_byte_channels: int
+    settings_group_channels: int
+    settings_time_window: int
+    settings_window_length: int
+    settings_metrics_overlay: int
+    settings_memory_budget: int
+    settings_dbc_path: int
+    settings_dbc_load: int
+    settings_record_path: int
+    settings_record: int
+    settings_log_path: int
+    settings_log_open: int
 
     def __init__(self) -> None:
         for tag_name in self.__slots__:
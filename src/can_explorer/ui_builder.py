@@ -1,16 +1,37 @@
 from dataclasses import dataclass
+from functools import cached_property
 
 import dearpygui.dearpygui as dpg
 
 from can_explorer.configs import Default
 from can_explorer.resources import Percentage
+from can_explorer.statistics import BITS, COLUMNS
 from can_explorer.tags import Tag
 
 
-@dataclass
 class Font:
-    default: int
-    large: int
+    """
+    Font sizes of the app, each added to the font atlas on first use.
+
+    Every size is rasterized when the atlas is built, so sizes that are
+    never shown are not loaded.
+    """
+
+    def __init__(self, registry: int) -> None:
+        self._registry = registry
+
+    def _add(self, scale: float) -> int:
+        return dpg.add_font(
+            Default.FONT, Default.FONT_HEIGHT * scale, parent=self._registry
+        )
+
+    @cached_property
+    def default(self) -> int:
+        return self._add(1.0)
+
+    @cached_property
+    def large(self) -> int:
+        return self._add(1.75)
 
 
 @dataclass
@@ -39,23 +60,40 @@ class UIBuilder:
     def create_header(self):
         with dpg.tab_bar(tag=self.tag.header, callback=self.tab_callback):
             dpg.add_tab(label="Viewer")
+            dpg.add_tab(label="Statistics")
+            dpg.add_tab(label="Bits")
             dpg.add_tab(label="Settings")
 
     def create_body(self):
         with dpg.child_window(tag=self.tag.body, border=False):
             with dpg.group(tag=self.tag.plot_tab, show=True):
                 pass  # Plot setup will be added here
+            with dpg.group(tag=self.tag.statistics_tab, show=False):
+                self.add_statistics()
+            with dpg.group(tag=self.tag.heatmap_tab, show=False):
+                self.add_heatmap()
             with dpg.group(tag=self.tag.settings_tab, show=False):
                 self.add_settings()
 
     def create_footer(self):
         with dpg.child_window(
-            tag=self.tag.footer, height=110, border=False, no_scrollbar=True
+            tag=self.tag.footer,
+            height=Default.FOOTER_HEIGHT,
+            border=False,
+            no_scrollbar=True,
         ):
             dpg.add_spacer(height=2)
             dpg.add_separator()
             dpg.add_spacer(height=2)
 
+            with dpg.group(tag=self.tag.metrics_overlay, show=False):
+                dpg.add_text(tag=self.tag.metrics_text)
+                dpg.add_separator()
+
+            with dpg.group(horizontal=True):
+                dpg.add_text(tag=self.tag.memory_text)
+                dpg.add_text(tag=self.tag.shedding_text, color=Default.WARNING)
+
             with dpg.table(header_row=False):
                 dpg.add_table_column()
                 dpg.add_table_column()
@@ -89,6 +127,17 @@ class UIBuilder:
                             clamped=True,
                             format="%d%%",
                         )
+            with dpg.group(horizontal=True):
+                dpg.add_text("Timeline")
+                dpg.add_spacer()
+                dpg.add_slider_float(
+                    tag=self.tag.timeline_slider,
+                    width=-1,
+                    max_value=0,
+                    clamped=True,
+                    format="%.2f s",
+                    enabled=False,
+                )
             dpg.add_spacer(height=2)
 
             dpg.add_separator()
@@ -107,12 +156,7 @@ class UIBuilder:
                 )
 
     def add_fonts(self):
-        with dpg.font_registry():
-            self._parent.font = Font(
-                default=dpg.add_font(Default.FONT, Default.FONT_HEIGHT),
-                large=dpg.add_font(Default.FONT, Default.FONT_HEIGHT * 1.75),
-            )
-
+        self._parent.font = Font(dpg.add_font_registry())
         dpg.bind_font(self._parent.font.default)
 
     def add_themes(self):
@@ -125,15 +169,111 @@ class UIBuilder:
 
         dpg.bind_theme(self._parent.theme.default)
 
+    def add_statistics(self):
+        # Only the rows scrolled into view are rendered
+        with dpg.table(
+            tag=self.tag.statistics_table,
+            sortable=True,
+            sort_tristate=False,
+            clipper=True,
+            scrollY=True,
+            freeze_rows=1,
+            resizable=True,
+            row_background=True,
+            policy=dpg.mvTable_SizingStretchProp,
+            callback=self._parent.statistics.sort_callback,
+        ):
+            for label, field in COLUMNS:
+                dpg.add_table_column(label=label, user_data=field)
+
+    def add_heatmap(self):
+        dpg.add_texture_registry(tag=self.tag.heatmap_registry)
+        texture = dpg.add_dynamic_texture(
+            BITS,
+            Default.HEATMAP_ROWS,
+            [0.0] * BITS * Default.HEATMAP_ROWS * 4,
+            parent=self.tag.heatmap_registry,
+        )
+
+        dpg.add_button(tag=self.tag.heatmap_reset, label="Reset Counters", height=30)
+        with dpg.plot(height=-1, width=-1, no_menus=True, no_box_select=True):
+            x_axis = dpg.add_plot_axis(
+                dpg.mvXAxis, lock_min=True, lock_max=True, opposite=True
+            )
+            dpg.set_axis_ticks(
+                x_axis, tuple((f"B{byte}", byte * 8 + 4) for byte in range(BITS // 8))
+            )
+            dpg.set_axis_limits(x_axis, 0, BITS)
+            with dpg.plot_axis(dpg.mvYAxis, tag=self.tag.heatmap_y_axis, invert=True):
+                # One texture row per CAN id, one column per payload bit
+                dpg.add_image_series(
+                    texture,
+                    (0, 0),
+                    (BITS, Default.HEATMAP_ROWS),
+                    tag=self.tag.heatmap_series,
+                )
+
     def add_settings(self):
         with dpg.collapsing_header(label="CAN Bus", default_open=True):
             dpg.add_combo(tag=self.tag.settings_interface, label="Interface")
-            dpg.add_input_text(tag=self.tag.settings_channel, label="Channel")
+            dpg.add_input_text(
+                tag=self.tag.settings_channel,
+                label="Channel",
+                hint="comma separated to receive several, e.g. can0, can1",
+            )
             dpg.add_combo(tag=self.tag.settings_baudrate, label="Baudrate")
+            dpg.add_checkbox(tag=self.tag.settings_fd, label="CAN FD")
+            dpg.add_combo(tag=self.tag.settings_data_bitrate, label="Data Bitrate")
+            dpg.add_checkbox(
+                tag=self.tag.settings_capture_process,
+                label="Capture In Separate Process",
+            )
+            dpg.add_combo(tag=self.tag.settings_policy, label="Overload Policy")
             dpg.add_spacer(height=5)
             dpg.add_button(tag=self.tag.settings_apply, label="Apply", height=30)
             dpg.add_spacer(height=5)
 
+        with dpg.collapsing_header(label="Filters"):
+            dpg.add_input_text(
+                tag=self.tag.settings_filters,
+                label="ID's",
+                hint="0x100/0x7F0, 0x200-0x2FF, 0x7DF",
+                multiline=True,
+                height=60,
+            )
+            dpg.add_spacer(height=5)
+            dpg.add_button(
+                tag=self.tag.settings_filters_apply, label="Apply Filters", height=30
+            )
+            dpg.add_spacer(height=5)
+
+        with dpg.collapsing_header(label="DBC"):
+            dpg.add_input_text(
+                tag=self.tag.settings_dbc_path, label="File", hint="path/to/file.dbc"
+            )
+            dpg.add_spacer(height=5)
+            dpg.add_button(tag=self.tag.settings_dbc_load, label="Load", height=30)
+            dpg.add_spacer(height=5)
+
+        with dpg.collapsing_header(label="Log File"):
+            dpg.add_input_text(
+                tag=self.tag.settings_log_path,
+                label="File",
+                hint="path/to/file.asc",
+            )
+            dpg.add_spacer(height=5)
+            dpg.add_button(tag=self.tag.settings_log_open, label="Open", height=30)
+            dpg.add_spacer(height=5)
+
+        with dpg.collapsing_header(label="Recording"):
+            dpg.add_input_text(
+                tag=self.tag.settings_record_path,
+                label="File",
+                hint="path/to/capture.canx",
+            )
+            dpg.add_checkbox(tag=self.tag.settings_record, label="Record")
+            dpg.add_spacer(height=5)
+
         with dpg.collapsing_header(label="GUI"):
             with dpg.group(horizontal=True):
                 dpg.add_text("ID Format")
@@ -143,6 +283,37 @@ class UIBuilder:
                     horizontal=True,
                 )
 
+            dpg.add_checkbox(
+                tag=self.tag.settings_byte_channels, label="Expand Payload Bytes"
+            )
+            dpg.add_checkbox(
+                tag=self.tag.settings_group_channels,
+                label="Group Rows By Channel",
+                default_value=True,
+            )
+            dpg.add_checkbox(tag=self.tag.settings_time_window, label="Time Window")
+            dpg.add_input_float(
+                tag=self.tag.settings_window_length,
+                label="Window Length (s)",
+                default_value=Default.WINDOW_LENGTH,
+                min_value=0.1,
+                min_clamped=True,
+            )
+
+            dpg.add_checkbox(
+                tag=self.tag.settings_metrics_overlay,
+                label="Show Performance Overlay",
+            )
+            dpg.add_input_int(
+                tag=self.tag.settings_memory_budget,
+                label="Memory Budget (MiB)",
+                default_value=Default.MEMORY_BUDGET // 2**20,
+                min_value=0,
+                min_clamped=True,
+                on_enter=True,
+            )
+            dpg.add_text("0 for no limit, rarely received id's are evicted beyond it")
+
             dpg.add_button(
                 label="Launch Font Manager", width=-1, callback=dpg.show_font_manager
             )
@@ -153,5 +324,9 @@ class UIBuilder:
 
     def tab_callback(self, sender, app_data, user_data):
         current_tab = dpg.get_item_label(app_data)
+        if current_tab == "Settings":
+            self._parent.settings.load_options()
         dpg.configure_item(self.tag.plot_tab, show=(current_tab == "Viewer"))
-        dpg.configure_item(self.tag.settings_tab, show=(current_tab != "Viewer"))
+        dpg.configure_item(self.tag.statistics_tab, show=(current_tab == "Statistics"))
+        dpg.configure_item(self.tag.heatmap_tab, show=(current_tab == "Bits"))
+        dpg.configure_item(self.tag.settings_tab, show=(current_tab == "Settings"))
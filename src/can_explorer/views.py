@@ -1,14 +1,21 @@
 from __future__ import annotations
 
-from collections.abc import Callable, Collection
+import bisect
+from collections.abc import Callable, Collection, Sequence
 from typing import cast
 
 import dearpygui.dearpygui as dpg
+import numpy as np
 from wrapt import synchronized
 
+from can_explorer.backpressure import Policy
 from can_explorer.configs import Default
-from can_explorer.plotting import PlotData, PlotRow
+from can_explorer.frames import KEY_MASK, KEY_SHIFT, format_key
+from can_explorer.metrics import format_snapshot
+from can_explorer.plot_data import PlotData, downsample, heatmap_texture
+from can_explorer.plotting import PlotRow
 from can_explorer.resources import Percentage
+from can_explorer.statistics import BITS, COLUMNS, format_row
 from can_explorer.tags import Tag
 from can_explorer.ui_builder import UIBuilder
 
@@ -17,14 +24,33 @@ from can_explorer.ui_builder import UIBuilder
 # https://github.com/GrahamDumpleton/wrapt/blob/develop/blog/07-the-missing-synchronized-decorator.md
 
 
+def _interleaved(key: int) -> tuple[int, int]:
+    # Order by CAN id first, the same CAN id of every channel side by side
+    return key & KEY_MASK, key >> KEY_SHIFT
+
+
 class PlotView:
+    """
+    Virtualized list of plot rows, one per CAN id of each channel.
+
+    Only the rows intersecting the visible region of the body are backed by
+    widgets, the rows above and below it are represented by two spacers of
+    the same total height. Widgets scrolled out of view are hidden and
+    reused for the rows scrolled into view.
+    """
+
     _format: Callable = Default.ID_FORMAT
     _height: int = Default.PLOT_HEIGHT
+    _grouped: bool = True
 
     def __init__(self, parent: MainView) -> None:
         self._parent = parent
-        self._row_keys: list[int] = []
-        self._row_values: list[PlotRow] = []
+        self._order: list[int] = []  # Every CAN id in display order
+        self._rows: dict[int, PlotRow] = {}  # Widgets bound to visible CAN id's
+        self._pool: list[PlotRow] = []  # Hidden widgets available for reuse
+        self._pending: set[int] = set()  # Bound CAN id's not yet drawn
+        self._spacers: tuple[int, int] | None = None
+        self._viewport: tuple[int, int, int] | None = None
 
     @property
     def tag(self) -> Tag:
@@ -32,46 +58,140 @@ class PlotView:
 
     @synchronized
     def add_row(self, can_id: int) -> None:
-        self._row_keys.append(can_id)
-        self._row_keys.sort()
-        self._row_values.append(PlotRow(self.tag.plot_tab))
-        dpg.bind_item_font(self._row_values[-1].label, self._parent.font.large)  # type: ignore
+        self.add_rows(can_id)
+        self._bind()
+
+    @synchronized
+    def add_rows(self, *can_ids: int) -> None:
+        """
+        Register CAN id's without binding widgets until the next sync.
+        """
+        for can_id in can_ids:
+            index = self._index(can_id)
+            if index == len(self._order) or self._order[index] != can_id:
+                self._order.insert(index, can_id)
+                self._viewport = None
 
     @synchronized
     def clear(self) -> None:
-        while self._row_keys:
-            self.remove(self._row_keys[0])
+        self._order.clear()
+        self._viewport = None
+        self._bind()
+
+    def get_ids(self) -> list[int]:
+        return list(self._order)
 
     def get_rows(self) -> dict:
-        return dict(zip(self._row_keys, self._row_values, strict=False))
+        """
+        Get the widgets bound to the currently visible CAN id's, in display order.
+        """
+        return dict(self._rows)
 
     @synchronized
     def remove(self, can_id: int) -> None:
-        self._row_keys.remove(can_id)
-        self._sync_rows()
+        """
+        Remove the row of a CAN id.
+
+        Raises:
+            ValueError: If the CAN id has no row.
+        """
+        index = self._index(can_id)
+        if index == len(self._order) or self._order[index] != can_id:
+            raise ValueError(f"No row for CAN id {can_id:#x}")
+        del self._order[index]
+        self._viewport = None
+        self._bind()
 
     @synchronized
-    def update(self, can_id: int, plot_data: PlotData) -> None:
-        if can_id not in self._row_keys:
-            self.add_row(can_id)
-            self._sync_rows()
+    def remove_rows(self, *can_ids: int) -> None:
+        """
+        Unregister CAN id's, their widgets are released on the next sync.
+        """
+        for can_id in can_ids:
+            index = self._index(can_id)
+            if index < len(self._order) and self._order[index] == can_id:
+                del self._order[index]
+                self._viewport = None
 
-        index = self._row_keys.index(can_id)
-        self._row_values[index].update(
-            label=self._format(can_id), data=plot_data, height=self._height
-        )
+    def _index(self, can_id: int) -> int:
+        if self._grouped:
+            return bisect.bisect_left(self._order, can_id)
+        return bisect.bisect_left(self._order, _interleaved(can_id), key=_interleaved)
 
-    def _sync_rows(self) -> None:
+    def _label(self, can_id: int) -> str:
+        return format_key(can_id, self._format, self._parent.channels)
+
+    @synchronized
+    def sync(self) -> set[int]:
         """
-        Automatically hide's any rows not being used.
+        Rebind widgets to the rows currently within the scroll region.
+
+        Returns:
+            set[int]: Visible CAN id's that need data to be drawn
         """
+        self._bind()
+        pending, self._pending = self._pending, set()
+        return pending
 
-        for index, row in enumerate(self._row_values):
-            try:
-                self._row_keys[index]
+    @synchronized
+    def update(self, can_id: int, plot_data: PlotData) -> None:
+        if can_id not in self._rows:
+            self.add_row(can_id)
+
+        row = self._rows.get(can_id)
+        if row is None:
+            return  # Not visible
+
+        row.update(
+            label=self._label(can_id),
+            data=downsample(plot_data, row.get_width()),
+            height=self._height,
+        )
+        self._pending.discard(can_id)
+
+    def _bind(self) -> None:
+        if self._spacers is None:
+            self._spacers = (
+                dpg.add_spacer(parent=self.tag.plot_tab, show=False),
+                dpg.add_spacer(parent=self.tag.plot_tab, show=False),
+            )
+
+        pitch = self._height + Default.ROW_SPACING
+        scroll = int(dpg.get_y_scroll(self.tag.body))
+        height = dpg.get_item_height(self.tag.body) or Default.HEIGHT
+        if self._viewport == (pitch, scroll, height):
+            return
+        self._viewport = (pitch, scroll, height)
+
+        first = max(0, scroll // pitch - 1)
+        last = min(len(self._order), (scroll + height) // pitch + 2)
+        visible = self._order[first:last]
+
+        for can_id in set(self._rows).difference(visible):
+            row = self._rows.pop(can_id)
+            row.hide()
+            self._pool.append(row)
+            self._pending.discard(can_id)
+
+        top, bottom = self._spacers
+        rows = {}
+        for can_id in visible:
+            row = self._rows.get(can_id)
+            if row is None:
+                row = self._pool.pop() if self._pool else self._create_row()
                 row.show()
-            except IndexError:
-                row.hide()
+                self._pending.add(can_id)
+            row.move(self.tag.plot_tab, before=bottom)
+            rows[can_id] = row
+        self._rows = rows
+
+        for spacer, count in ((top, first), (bottom, len(self._order) - last)):
+            dpg.configure_item(spacer, height=count * pitch, show=count > 0)
+
+    def _create_row(self) -> PlotRow:
+        row = PlotRow(self.tag.plot_tab)
+        dpg.bind_item_font(row.label, self._parent.font.large)  # type: ignore
+        return row
 
     def set_format(self, id_format: Callable) -> None:
         """
@@ -80,10 +200,30 @@ class PlotView:
         Args:
             id_format (Callable)
         """
+        self._format = id_format
+        self.relabel()
+
+    def relabel(self) -> None:
+        """
+        Update the label of every visible row, e.g. once channels are renamed.
+        """
         for can_id, row in self.get_rows().items():
-            row.update(label=id_format(can_id))
+            row.update(label=self._label(can_id))
 
-        self._format = id_format
+    @synchronized
+    def set_grouping(self, grouped: bool) -> None:
+        """
+        Set whether rows are grouped by channel or interleaved by CAN id.
+
+        Args:
+            grouped (bool): True to list every CAN id of a channel before
+                the next channel, False to list the same CAN id of every
+                channel together
+        """
+        self._grouped = grouped
+        self._order.sort(key=None if grouped else _interleaved)
+        self._viewport = None
+        self._bind()
 
     def set_height(self, height: int) -> None:
         """
@@ -92,15 +232,149 @@ class PlotView:
         Args:
             height (int)
         """
-        for row in self._row_values:
+        for row in self._rows.values():
             row.update(height=height)
 
         self._height = height
+        self._viewport = None
+
+
+class StatisticsView:
+    """
+    Sortable table of the bus statistics of every CAN id.
+
+    Rows are created once per CAN id and refilled in sort order on every
+    update, only the cells whose text changed are written.
+    """
+
+    def __init__(self, parent: MainView) -> None:
+        self._parent = parent
+        self._cells: list[list[int | str]] = []  # Text items of each row
+        self._text: list[tuple[str, ...]] = []  # Displayed text of each row
+        self._sort = ("arbitration_id", False)  # Field, descending
+
+    @property
+    def tag(self) -> Tag:
+        return self._parent.tag
+
+    def is_shown(self) -> bool:
+        return dpg.get_item_configuration(self.tag.statistics_tab)["show"]
+
+    def sort_callback(self, sender, app_data, user_data=None) -> None:
+        if not app_data:
+            return
+        column, direction = app_data[0]
+        self._sort = (dpg.get_item_user_data(column), direction < 0)
+
+    def update(self, statistics: np.ndarray) -> None:
+        """
+        Display the statistics of every CAN id in the current sort order.
+
+        Args:
+            statistics (np.ndarray): Structured array of statistics.STATISTICS
+        """
+        field, descending = self._sort
+        order = np.argsort(statistics[field], kind="stable")
+        if descending:
+            order = order[::-1]
+
+        while len(self._cells) > len(statistics):
+            dpg.delete_item(dpg.get_item_parent(self._cells.pop()[0]))
+            self._text.pop()
+        while len(self._cells) < len(statistics):
+            with dpg.table_row(parent=self.tag.statistics_table):
+                self._cells.append([dpg.add_text() for _ in COLUMNS])
+            self._text.append(("",) * len(COLUMNS))
+
+        id_format = self._parent.settings.get_id_format()
+        channels = self._parent.channels
+        latest = float(statistics["last_seen"].max(initial=0))
+        for row, record in enumerate(statistics[order]):
+            text = format_row(record, latest, id_format, channels)
+            if text == self._text[row]:
+                continue
+            for cell, value, previous in zip(
+                self._cells[row], text, self._text[row], strict=True
+            ):
+                if value != previous:
+                    dpg.set_value(cell, value)
+            self._text[row] = text
+
+
+class HeatmapView:
+    """
+    Heatmap of how often each payload bit of every CAN id toggles.
+
+    The whole map is a single dynamic texture with one pixel per CAN id
+    and bit, rewritten in one call per update. The texture height grows
+    in powers of two as CAN id's are added.
+    """
+
+    def __init__(self, parent: MainView) -> None:
+        self._parent = parent
+        self._rows = Default.HEATMAP_ROWS
+        self._ids: list[int] = []
+        self._channels: list[str] = []
+
+    @property
+    def tag(self) -> Tag:
+        return self._parent.tag
+
+    def is_shown(self) -> bool:
+        return dpg.get_item_configuration(self.tag.heatmap_tab)["show"]
+
+    def _texture(self) -> int | str:
+        return dpg.get_item_configuration(self.tag.heatmap_series)["texture_tag"]
+
+    def update(self, ids: np.ndarray, toggles: np.ndarray) -> None:
+        """
+        Redraw the heatmap.
+
+        Args:
+            ids (np.ndarray): CAN id's in display order
+            toggles (np.ndarray): Toggle rate of each bit shaped [CAN id, bit]
+        """
+        if len(ids) > self._rows:
+            while self._rows < len(ids):
+                self._rows *= 2
+            previous = self._texture()
+            texture = dpg.add_dynamic_texture(
+                BITS,
+                self._rows,
+                heatmap_texture(toggles, self._rows),
+                parent=self.tag.heatmap_registry,
+            )
+            dpg.configure_item(
+                self.tag.heatmap_series,
+                texture_tag=texture,
+                bounds_max=(BITS, self._rows),
+            )
+            dpg.delete_item(previous)
+        else:
+            dpg.set_value(self._texture(), heatmap_texture(toggles, self._rows))
+
+        channels = self._parent.channels
+        if ids.tolist() != self._ids or channels != self._channels:
+            self._ids = ids.tolist()
+            self._channels = list(channels)
+            id_format = self._parent.settings.get_id_format()
+            dpg.set_axis_ticks(
+                self.tag.heatmap_y_axis,
+                tuple(
+                    (format_key(can_id, id_format, channels), row + 0.5)
+                    for row, can_id in enumerate(self._ids)
+                ),
+            )
+            dpg.set_axis_limits(self.tag.heatmap_y_axis, 0, max(len(self._ids), 1))
+
+    def set_reset_button_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.heatmap_reset, callback=callback)
 
 
 class SettingsView:
     def __init__(self, parent: MainView) -> None:
         self._parent = parent
+        self._interface_loader: Callable[[], Collection[str]] | None = None
 
     @property
     def tag(self) -> Tag:
@@ -115,18 +389,131 @@ class SettingsView:
     def get_baudrate(self) -> int:
         return dpg.get_value(self.tag.settings_baudrate)
 
+    def get_fd(self) -> bool:
+        return dpg.get_value(self.tag.settings_fd)
+
+    def get_data_bitrate(self) -> int | None:
+        value = dpg.get_value(self.tag.settings_data_bitrate)
+        return int(value) if value else None
+
     def get_id_format(self) -> Callable:
         return cast(
             Callable,
             hex if dpg.get_value(self.tag.settings_id_format).lower() == "hex" else int,
         )
 
+    def get_capture_process(self) -> bool:
+        return dpg.get_value(self.tag.settings_capture_process)
+
+    def get_dbc_path(self) -> str:
+        return dpg.get_value(self.tag.settings_dbc_path)
+
+    def get_byte_channels(self) -> bool:
+        return dpg.get_value(self.tag.settings_byte_channels)
+
+    def get_group_channels(self) -> bool:
+        return dpg.get_value(self.tag.settings_group_channels)
+
+    def get_time_window(self) -> float | None:
+        """
+        Get the length of the plotted time window.
+
+        Returns:
+            float | None: Seconds, None if plotting a number of samples
+        """
+        if not dpg.get_value(self.tag.settings_time_window):
+            return None
+        return dpg.get_value(self.tag.settings_window_length)
+
+    def get_filters(self) -> str:
+        return dpg.get_value(self.tag.settings_filters)
+
+    def get_policy(self) -> Policy:
+        return Policy(dpg.get_value(self.tag.settings_policy))
+
+    def get_metrics_overlay(self) -> bool:
+        return dpg.get_value(self.tag.settings_metrics_overlay)
+
+    def get_memory_budget(self) -> int | None:
+        """
+        Get the memory budget of the model.
+
+        Returns:
+            int | None: Bytes, None for no limit
+        """
+        mebibytes = dpg.get_value(self.tag.settings_memory_budget)
+        return mebibytes * 2**20 if mebibytes > 0 else None
+
+    def get_record_path(self) -> str:
+        return dpg.get_value(self.tag.settings_record_path)
+
+    def get_record(self) -> bool:
+        return dpg.get_value(self.tag.settings_record)
+
+    def get_log_path(self) -> str:
+        return dpg.get_value(self.tag.settings_log_path)
+
     def set_apply_button_callback(self, callback: Callable) -> None:
         dpg.configure_item(self.tag.settings_apply, callback=callback)
 
     def set_can_id_format_callback(self, callback: Callable) -> None:
         dpg.configure_item(self.tag.settings_id_format, callback=callback)
 
+    def set_dbc_load_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_dbc_load, callback=callback)
+
+    def set_byte_channels_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_byte_channels, callback=callback)
+
+    def set_group_channels_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_group_channels, callback=callback)
+
+    def set_time_window_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_time_window, callback=callback)
+        dpg.configure_item(self.tag.settings_window_length, callback=callback)
+
+    def set_filters_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_filters_apply, callback=callback)
+
+    def set_policy_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_policy, callback=callback)
+
+    def set_policy_options(self, iterable: Collection[str], default: str = "") -> None:
+        dpg.configure_item(
+            self.tag.settings_policy, items=iterable, default_value=default
+        )
+
+    def set_metrics_overlay_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_metrics_overlay, callback=callback)
+
+    def set_memory_budget_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_memory_budget, callback=callback)
+
+    def set_record_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_record, callback=callback)
+
+    def set_log_open_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.settings_log_open, callback=callback)
+
+    def set_interface_options_loader(
+        self, loader: Callable[[], Collection[str]]
+    ) -> None:
+        """
+        Defer listing the interface options until the settings are first opened.
+
+        Args:
+            loader (Callable[[], Collection[str]]): Returns the interface options
+        """
+        self._interface_loader = loader
+
+    def load_options(self) -> None:
+        """
+        Fill the interface options from the deferred loader, if not done yet.
+        """
+        loader, self._interface_loader = self._interface_loader, None
+        if loader is not None:
+            self.set_interface_options(loader(), default=self.get_interface())
+
     def set_interface_options(
         self, iterable: Collection[str], default: str = ""
     ) -> None:
@@ -144,13 +531,23 @@ class SettingsView:
             self.tag.settings_baudrate, items=iterable, default_value=default
         )
 
+    def set_data_bitrate_options(
+        self, iterable: Collection[str], default: str = ""
+    ) -> None:
+        dpg.configure_item(
+            self.tag.settings_data_bitrate, items=iterable, default_value=default
+        )
+
 
 class MainView:
     def __init__(self, tags: Tag | None = None) -> None:
         self.tag = tags or Tag()
         self.ui = UIBuilder(self)
         self.plot = PlotView(self)
+        self.statistics = StatisticsView(self)
+        self.heatmap = HeatmapView(self)
         self.settings = SettingsView(self)
+        self.channels: list[str] = []  # Name of each bus
         self.font = None
         self.theme = None
 
@@ -206,6 +603,71 @@ class MainView:
         percentage = dpg.get_value(self.tag.plot_height_slider)
         return Percentage.reverse(percentage, Default.PLOT_HEIGHT_MAX)
 
+    def show_metrics(self, show: bool) -> None:
+        """
+        Show or hide the performance overlay at the top of the footer.
+        """
+        dpg.configure_item(self.tag.metrics_overlay, show=show)
+        dpg.set_item_height(
+            self.tag.footer,
+            Default.FOOTER_HEIGHT + (Default.OVERLAY_HEIGHT if show else 0),
+        )
+        self.resize()
+
+    def set_channels(self, channels: Sequence[str]) -> None:
+        """
+        Set the name of each bus, shown before the CAN id of rows once
+        several buses are received.
+
+        Args:
+            channels (Sequence[str])
+        """
+        self.channels = list(channels)
+        self.plot.relabel()
+
+    def set_shedding(self, policy: Policy | None) -> None:
+        """
+        Warn that frames are being skipped to keep up with the bus.
+
+        Args:
+            policy (Policy | None): Policy shedding load, None to clear
+        """
+        text = "" if policy is None else f"Overloaded | shedding load: {policy.value}"
+        dpg.set_value(self.tag.shedding_text, text)
+
+    def set_memory_usage(self, usage: int, budget: int | None) -> None:
+        """
+        Show the memory allocated for samples and statistics.
+
+        Args:
+            usage (int): Bytes
+            budget (int | None): Bytes, None for no limit
+        """
+        text = f"Memory {usage / 2**20:.1f}"
+        if budget is not None:
+            text += f" / {budget / 2**20:.0f}"
+        dpg.set_value(self.tag.memory_text, text + " MiB")
+
+    def set_metrics(self, snapshot: dict) -> None:
+        dpg.set_value(self.tag.metrics_text, format_snapshot(snapshot))
+
+    def get_timeline(self) -> float:
+        return dpg.get_value(self.tag.timeline_slider)
+
+    def set_timeline(self, duration: float | None) -> None:
+        """
+        Set the length of the scrubbable timeline, positioned at its end.
+
+        Args:
+            duration (float | None): Seconds, None to disable the timeline
+        """
+        dpg.configure_item(
+            self.tag.timeline_slider,
+            max_value=duration or 0,
+            enabled=duration is not None,
+        )
+        dpg.set_value(self.tag.timeline_slider, duration or 0)
+
     def set_main_button_label(self, state: bool) -> None:
         dpg.set_item_label(self.tag.main_button, ("Stop", "Start")[not state])
 
@@ -220,3 +682,6 @@ class MainView:
 
     def set_plot_height_slider_callback(self, callback: Callable) -> None:
         dpg.configure_item(self.tag.plot_height_slider, callback=callback)
+
+    def set_timeline_slider_callback(self, callback: Callable) -> None:
+        dpg.configure_item(self.tag.timeline_slider, callback=callback)
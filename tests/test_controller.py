@@ -1,7 +1,23 @@
+import json
+import subprocess
+import sys
+import threading
 import time
+from unittest.mock import MagicMock, patch
 
+import can
+import numpy as np
 import pytest
+from can_explorer import headless
+from can_explorer.backpressure import IngestQueue, Policy
+from can_explorer.capture import CaptureProcess, FrameRing
+from can_explorer.controllers import State
+from can_explorer.filters import FrameFilter
+from can_explorer.frames import Frames, make_key
+from can_explorer.ingest import IngestWorker
+from can_explorer.metrics import Histogram
 from can_explorer.resources import generate_random_can_message
+from can_explorer.resources.demo import LOG_FILE
 
 
 def test_controller_populates_data_in_ascending_order(app, controller, view, vbus):
@@ -12,10 +28,25 @@ def test_controller_populates_data_in_ascending_order(app, controller, view, vbu
         vbus.send(message)
 
     time.sleep(0.1)
+    controller.refresh(force=True)
     plots = view.plot.get_rows()
     assert plots and list(plots) == sorted(plots)
 
 
+def test_controller_defers_rendering_until_refresh(app, controller, view, vbus):
+    controller.start()
+
+    for _ in range(100):
+        vbus.send(generate_random_can_message())
+
+    time.sleep(0.1)
+    assert not view.plot.get_rows()
+
+    controller.refresh(force=True)
+    assert view.plot.get_rows()
+    assert not controller.scheduler.drain()
+
+
 def test_controller_must_have_bus_set_before_starting(app, tag, controller):
     controller.set_bus(None)
     with pytest.raises(RuntimeError):
@@ -34,3 +65,234 @@ def test_controller_must_be_inactive_to_apply_settings(app, tag, controller):
     assert controller.is_active()
     with pytest.raises(RuntimeError):
         controller.settings_apply_button_callback()
+
+
+def test_controller_must_be_inactive_to_open_log(app, tag, controller):
+    controller.start()
+    with pytest.raises(RuntimeError):
+        controller.open_log("capture.asc")
+
+
+def test_ingest_worker_drains_messages_in_batches(vbus, vbus2):
+    callback = MagicMock()
+    worker = IngestWorker(vbus2, callback=callback, batch_size=10, max_latency=1)
+
+    for _ in range(25):
+        vbus.send(generate_random_can_message())
+
+    assert [len(worker.receive()) for _ in range(3)] == [10, 10, 5]
+    callback.assert_not_called()  # Batches are only handed off by the thread
+
+
+def test_frame_ring_delivers_frames_and_counts_overruns():
+    ring = FrameRing.create(capacity=8)
+    messages = [generate_random_can_message() for _ in range(20)]
+    try:
+        ring.write(Frames.from_messages(messages[:6]))
+        assert len(ring.read()) == 6
+
+        # Lapping the reader drops the oldest frames rather than blocking
+        ring.write(Frames.from_messages(messages[6:]))
+        frames = ring.read()
+        assert ring.lost == 6
+        assert frames.arbitration_id.tolist() == [
+            message.arbitration_id for message in messages[12:16]
+        ]
+        assert len(frames) + len(ring.read()) == 8
+    finally:
+        ring.close()
+
+
+def test_capture_process_hands_off_frames_written_before_stop():
+    received = []
+    capture = CaptureProcess(
+        {"interface": "virtual", "channel": "pytest"},
+        lambda frames: received.append(frames.copy()),
+    )
+    try:
+        capture.start()
+        capture._running.clear()
+        capture._reader.join()
+
+        # Written by the capture process after the reader last polled
+        capture.ring.write(_burst(4, ids=4))
+        capture.stop()
+
+        assert sum(len(frames) for frames in received) == 4
+    finally:
+        capture.close()
+
+
+def test_controller_queues_frames_independent_of_the_ring(fake_controller):
+    ring = FrameRing.create(capacity=4)
+    fake_controller.queue = IngestQueue()
+    try:
+        ring.write(_burst(4, ids=4))
+        fake_controller._on_frames_received(ring.read())
+
+        # Lapping the ring must not change frames still waiting in the queue
+        ring.write(_burst(8, ids=8)[4:])
+        frames = fake_controller.queue.get(timeout=0)
+        assert frames.arbitration_id.tolist() == [0, 1, 2, 3]
+    finally:
+        ring.close()
+
+
+def test_controller_records_received_frames(fake_controller):
+    fake_controller._on_messages_received(
+        [generate_random_can_message() for _ in range(10)]
+    )
+
+    (frames,), _ = fake_controller.recorder.write.call_args
+    assert len(frames) == 10
+
+
+def test_controller_seek_shows_full_history(fake_controller, model):
+    messages = list(can.LogReader(LOG_FILE))
+    model.set_history(500)
+    model.set_limit(500)
+    fake_controller.open_log(LOG_FILE)
+    try:
+        fake_controller.seek(messages[-1].timestamp)
+        can_id = messages[0].arbitration_id
+        expected = [
+            float(int.from_bytes(m.data, "big"))
+            for m in messages
+            if m.arbitration_id == can_id
+        ]
+
+        plot_data = model.get_data(can_id)
+        assert len(plot_data.x) == 500
+        assert plot_data.y.tolist() == expected[-500:]
+    finally:
+        fake_controller.close_log()
+
+
+def test_headless_run_receives_without_gui(vbus):
+    def send():
+        for _ in range(50):
+            vbus.send(generate_random_can_message())
+
+    threading.Timer(0.1, send).start()
+    controller = headless.run(dict(interface="virtual", channel="pytest"), duration=0.5)
+
+    assert controller.view.plot.get_ids() == sorted(controller.model.get_ids())
+    assert controller.model.get_ids()
+
+
+def test_headless_run_releases_buses_if_one_fails_to_open():
+    opened = MagicMock()
+    with patch.object(can, "Bus", side_effect=[opened, can.CanError("no bus")]):
+        with pytest.raises(can.CanError):
+            headless.run([dict(channel="0"), dict(channel="1")], duration=0)
+
+    opened.shutdown.assert_called_once()
+
+
+def test_headless_run_keys_each_bus_by_channel(vbus):
+    other = can.Bus(interface="virtual", channel="pytest-other")
+
+    def send():
+        vbus.send(can.Message(arbitration_id=0x10, data=[1]))
+        other.send(can.Message(arbitration_id=0x10, data=[2]))
+        other.send(can.Message(arbitration_id=0x20, data=[3]))
+
+    threading.Timer(0.1, send).start()
+    controller = headless.run(
+        [
+            dict(interface="virtual", channel="pytest"),
+            dict(interface="virtual", channel="pytest-other"),
+        ],
+        duration=0.5,
+    )
+    other.shutdown()
+
+    assert sorted(controller.model.get_ids()) == [
+        0x10,
+        make_key(1, 0x10),
+        make_key(1, 0x20),
+    ]
+    assert controller.channels == ["pytest", "pytest-other"]
+
+
+def test_histogram_percentiles_are_bounded_by_bucket_resolution():
+    histogram = Histogram()
+    histogram.record_many(np.linspace(1e-3, 1e-2, 1000))
+
+    assert histogram.count == 1000
+    assert 5e-3 <= histogram.percentile(50) <= 5e-3 * 1.34
+    assert histogram.percentile(100) == histogram.snapshot()["max"] == 1e-2
+
+
+def test_controller_reports_pipeline_metrics(fake_controller):
+    fake_controller._on_messages_received(
+        [generate_random_can_message() for _ in range(10)]
+    )
+
+    metrics = fake_controller.get_metrics()
+    assert metrics["counters"]["frames"] == 10
+    assert metrics["stages"]["append"]["count"] == 1
+    assert json.dumps(metrics)
+
+
+def test_controller_counts_capture_losses_once(fake_controller):
+    capture = MagicMock(lost=3)
+    capture.ring.pending = 0
+    during = []
+    capture.close.side_effect = lambda: during.append(fake_controller.get_metrics())
+    fake_controller.captures = [capture]
+    fake_controller._state = State.RUNNING
+
+    fake_controller.stop()
+
+    assert during[0]["dropped"] == fake_controller.get_metrics()["dropped"] == 3
+
+
+def _burst(count: int, ids: int) -> Frames:
+    messages = [generate_random_can_message() for _ in range(count)]
+    for index, message in enumerate(messages):
+        message.arbitration_id = index % ids
+        message.timestamp = index * 1e-3
+    return Frames.from_messages(messages)
+
+
+@pytest.mark.parametrize(
+    "policy, kept",
+    [(Policy.COALESCE, 5), (Policy.DROP_OLDEST, 60), (Policy.DECIMATE, 60)],
+)
+def test_ingest_queue_sheds_load_per_policy(policy, kept):
+    queue = IngestQueue(capacity=60, policy=policy, rate_limit=1000)
+    for _ in range(2):
+        queue.put(_burst(60, ids=5))
+
+    frames = queue.get(timeout=0)
+    assert len(frames) == kept
+    assert queue.shed == 120 - kept
+    assert queue.is_shedding()
+    assert queue.get(timeout=0) is None
+
+
+def test_ingest_queue_decimates_only_when_over_capacity():
+    queue = IngestQueue(capacity=120, policy=Policy.DECIMATE, rate_limit=1)
+    queue.put(_burst(60, ids=5))
+
+    assert len(queue.get(timeout=0)) == 60
+    assert queue.shed == 0
+    assert not queue.is_shedding()
+
+
+def test_controller_filters_in_model_without_driver_support(controller, vbus2):
+    controller.set_filters(FrameFilter.parse("0x100-0x1FF"))
+
+    # The virtual interface cannot filter, python-can must not check each message
+    assert vbus2.filters is None
+    assert controller.model._filter.match(0x150)
+    assert not controller.model._filter.match(0x200)
+
+    controller.set_filters(None)
+    assert controller.model._filter is None
+
+
+def test_app_import_defers_python_can():
+    code = "import sys, can_explorer.app; sys.exit('can' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], check=False).returncode == 0
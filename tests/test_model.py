@@ -0,0 +1,473 @@
+import tempfile
+
+import can
+import numpy as np
+import pytest
+from can_explorer.dbc import SignalDatabase
+from can_explorer.filters import FrameFilter
+from can_explorer.frames import Frames, make_key
+from can_explorer.logs import LogFile
+from can_explorer.models import PlotModel
+from can_explorer.payloads import Bitfield, pack_payloads, to_integer, word_series
+from can_explorer.recording import CaptureReader, CaptureWriter
+from can_explorer.resources.demo import LOG_FILE
+from can_explorer.statistics import BusStatistics
+from can_explorer.store import SampleStore
+
+
+def test_store_returns_last_values_in_order():
+    store = SampleStore(size=5)
+    for value in range(1, 8):
+        store.append(1, value=value)
+
+    assert store.last(1, 3).tolist() == [5, 6, 7]
+    assert store.last(1, 100).tolist() == [3, 4, 5, 6, 7]
+
+
+def test_store_extend_matches_sequential_append():
+    keys = np.random.randint(0, 40, size=500)
+    values = np.arange(500)
+
+    batched, sequential = SampleStore(size=8), SampleStore(size=8)
+    batched.extend(keys, value=values)
+    for key, value in zip(keys, values, strict=True):
+        sequential.append(key, value=value)
+
+    for key in sequential:
+        assert np.array_equal(batched.last(key, 8), sequential.last(key, 8))
+
+
+def test_store_resize_preserves_newest_values():
+    store = SampleStore(size=10)
+    store.extend([1] * 10 + [2] * 3, value=list(range(10)) + [7, 8, 9])
+    store.resize(4)
+
+    assert store.window(4).tolist() == [[6, 7, 8, 9], [0, 7, 8, 9]]
+
+
+def test_store_remove_keeps_other_keys():
+    store = SampleStore(size=4, slots=2, fields={"value": np.float64}, extrema="value")
+    store.extend([1, 2, 3, 3], value=[1, 2, 3, 4])
+    store.remove(1)
+    store.compact(minimum=1)
+
+    assert list(store) == [3, 2]
+    assert store.last(3, 2).tolist() == [3, 4]
+    assert store.limits(3, 2) == (3.0, 4.0)
+    assert store.last(1, 2).tolist() == [0, 0] and 1 not in store
+
+
+def test_store_reused_slot_starts_without_extrema():
+    store = SampleStore(size=256, fields={"value": np.float64}, extrema="value")
+    store.extend([1] * 256, value=np.arange(256) * 10.0)
+    store.remove(1)
+    store.append(2, value=5.0)
+
+    assert store.limits(2, 256) == (0.0, 5.0)
+
+
+def test_model_evicts_least_recent_ids_within_budget():
+    model = PlotModel(memory_budget=None)
+    for can_id in range(200):
+        model.add_message(can.Message(arbitration_id=can_id, data=[1]))
+    model.add_message(can.Message(arbitration_id=0, data=[2]))
+
+    model.set_memory_budget(model.get_memory_usage() // 4)
+    assert model.get_memory_usage() <= model.get_memory_budget()
+    assert 0 in model.get_ids() and 1 not in model.get_ids()
+    assert model.pop_evicted() == set(range(200)) - set(model.get_ids())
+    assert len(model.get_statistics()) == len(model.get_ids())
+
+
+def test_model_stops_evicting_once_it_frees_nothing():
+    model = PlotModel(memory_budget=None)
+    for can_id in range(20):
+        model.add_message(can.Message(arbitration_id=can_id, data=[1]))
+
+    # Stores keep at least 16 rows, evicting below that frees nothing
+    model.set_memory_budget(1)
+    assert model.get_ids() == list(range(4, 20))
+
+
+def test_model_deepens_only_ids_that_fill_up(model):
+    for index in range(150):
+        model.add_message(can.Message(timestamp=index, arbitration_id=1, data=[index]))
+    model.add_message(can.Message(arbitration_id=2, data=[1]))
+    model.set_limit(1000)
+
+    # The busy id kept every sample through doubling, the other stays shallow
+    assert len(model.get_payloads(1)) == 200
+    assert model.get_payloads(1)[-150:, 0].tolist() == list(range(150))
+    assert len(model.get_payloads(2)) == 50
+    assert model.get_data(1).y_limits == (0.0, 149.0)
+
+
+def test_model_keeps_every_sample_of_a_batch_within_history(model):
+    model.set_history(500)
+    model.set_limit(500)
+    messages = [
+        can.Message(timestamp=index, arbitration_id=1, data=[index % 256])
+        for index in range(600)
+    ]
+    model.add_frames(Frames.from_messages(messages))
+
+    plot_data = model.get_data(1)
+    assert len(plot_data.x) == 500
+    assert plot_data.y.tolist() == [index % 256 for index in range(100, 600)]
+
+
+def test_model_get_data_is_limited_to_buffer_size(model):
+    model.set_limit(10)
+    for value in range(20):
+        model.add_message(can.Message(arbitration_id=1, data=[value]))
+
+    plot_data = model.get_data(1)
+    assert len(plot_data.x) == len(plot_data.y) == 10
+    assert np.array_equal(plot_data.y, np.arange(10, 20))
+
+
+def test_model_time_window_shares_x_axis(model):
+    model.set_window(10)
+    for timestamp in range(100):
+        model.add_message(can.Message(timestamp=timestamp, arbitration_id=1, data=[1]))
+        if timestamp % 50 == 0:
+            model.add_message(
+                can.Message(timestamp=timestamp, arbitration_id=2, data=[2])
+            )
+
+    fast, slow = model.get_data(1), model.get_data(2)
+    assert fast.x.tolist() == list(range(-10, 1))
+    assert len(slow.x) == 0
+    assert fast.x_limits == slow.x_limits == (-10, 0)
+
+
+def test_model_leaves_unwritten_samples_out_of_plots(model):
+    model.add_message(can.Message(timestamp=1, arbitration_id=1, data=[5]))
+    model.add_message(can.Message(timestamp=2, arbitration_id=1, data=[7]))
+
+    # Index mode pads the series, but not its limits
+    assert model.get_data(1).y_limits == (5, 7)
+
+    model.set_window(10)
+    assert model.get_data(1).x.tolist() == [-1, 0]
+    assert model.get_data(1).y.tolist() == [5, 7]
+
+
+def test_store_limits_match_window_extremes():
+    store = SampleStore(size=200, fields={"value": np.float64}, extrema="value")
+    keys = np.random.randint(0, 5, size=1000)
+    store.extend(keys, value=np.random.uniform(-50, 50, size=1000))
+    for key in keys[:10]:
+        store.append(key, value=np.random.uniform(-50, 50))
+
+    for key in store:
+        for n in (1, 37, 64, 150, 200):
+            window = store.last(key, n)
+            assert store.limits(key, n) == (window.min(), window.max())
+
+
+def test_payload_integer_matches_int_from_bytes():
+    payloads = [bytes([1, 2, 3]), bytes(range(200, 208)), b""]
+    expected = [int.from_bytes(data, "big") for data in payloads]
+    dlc = np.array([len(data) for data in payloads])
+
+    assert to_integer(pack_payloads(payloads), dlc).tolist() == expected
+
+
+def test_payload_words_and_bitfields():
+    payloads = pack_payloads([bytes([0x12, 0x34, 0xF0, 0x00, 0, 0, 0, 0x80])])
+
+    assert word_series(payloads, 0).tolist() == [0x1234]
+    assert word_series(payloads, 0, byteorder="little").tolist() == [0x3412]
+    assert Bitfield(start=16, length=4).extract(payloads).tolist() == [0xF]
+    assert Bitfield(start=16, length=4, signed=True).extract(payloads).tolist() == [-1]
+    assert Bitfield(start=63, length=1, byteorder="little").extract(
+        payloads
+    ).tolist() == [1]
+
+
+def test_model_expands_byte_channels(model):
+    model.add_message(can.Message(arbitration_id=1, data=[1, 2, 3]))
+    assert not model.get_data(1).channels
+
+    model.set_byte_channels(True)
+    plot_data = model.get_data(1)
+    assert list(plot_data.channels) == ["B0", "B1", "B2"]
+    assert [channel[-1] for channel in plot_data.channels.values()] == [1, 2, 3]
+
+
+def test_model_decodes_dbc_signals(model, tmp_path):
+    dbc = tmp_path / "test.dbc"
+    dbc.write_text(
+        'VERSION ""\n\n'
+        "BO_ 256 Engine: 8 ECU\n"
+        ' SG_ Speed : 7|16@0+ (0.1,0) [0|6553.5] "km/h" Vector__XXX\n'
+        ' SG_ Temp : 16|8@1- (1,-40) [-40|215] "C" Vector__XXX\n'
+    )
+    model.set_database(SignalDatabase.load(dbc))
+    model.add_message(can.Message(arbitration_id=256, data=[0x12, 0x34, 0xF0]))
+
+    signals = model.get_signals(256)
+    assert signals["Speed"][-1] == pytest.approx(466.0)
+    assert signals["Temp"][-1] == -56
+    assert list(model.get_data(256).channels) == ["Speed", "Temp"]
+
+
+def test_model_decodes_multiplexed_dbc_signals(model, tmp_path):
+    dbc = tmp_path / "test.dbc"
+    dbc.write_text(
+        'VERSION ""\n\n'
+        "BO_ 256 Status: 8 ECU\n"
+        ' SG_ Page M : 0|8@1+ (1,0) [0|255] "" Vector__XXX\n'
+        ' SG_ Voltage m1 : 8|16@1+ (0.01,0) [0|655.35] "V" Vector__XXX\n'
+        ' SG_ Current m2 : 8|16@1- (0.1,0) [-3276.8|3276.7] "A" Vector__XXX\n'
+    )
+    model.set_database(SignalDatabase.load(dbc))
+    model.add_message(can.Message(arbitration_id=256, data=[1, 0xE8, 0x03]))
+    model.add_message(can.Message(arbitration_id=256, data=[2, 0x9C, 0xFF]))
+
+    signals = model.get_signals(256)
+    assert signals["Voltage"][-2] == pytest.approx(10.0)
+    assert np.isnan(signals["Voltage"][-1])
+    assert np.isnan(signals["Current"][-2]) and signals["Current"][-1] == -10.0
+    assert model.get_data(256).get_y_limits() == pytest.approx((-10.0, 10.0))
+
+
+def test_model_decodes_float_dbc_signals(model, tmp_path):
+    dbc = tmp_path / "test.dbc"
+    dbc.write_text(
+        'VERSION ""\n\n'
+        "BO_ 256 Sensor: 8 ECU\n"
+        ' SG_ Pressure : 0|32@1- (2,1) [0|0] "bar" Vector__XXX\n'
+        "\nSIG_VALTYPE_ 256 Pressure : 1;\n"
+    )
+    model.set_database(SignalDatabase.load(dbc))
+    data = np.array([-1.25], dtype="<f4").tobytes()
+    model.add_message(can.Message(arbitration_id=256, data=data))
+
+    assert model.get_signals(256)["Pressure"][-1] == -1.5
+
+
+def test_capture_file_queries_id_within_time_range(tmp_path):
+    messages = [
+        can.Message(timestamp=i * 0.01, arbitration_id=i % 5, data=bytes([i % 256]))
+        for i in range(2000)
+    ]
+    path = tmp_path / "capture.canx"
+    with CaptureWriter(path, chunk_size=300) as writer:
+        for i in range(0, len(messages), 128):
+            writer.write(Frames.from_messages(messages[i : i + 128]))
+
+    reader = CaptureReader(path)
+    expected = [m for m in messages if m.arbitration_id == 3 and 5 <= m.timestamp <= 9]
+    frames = reader.query(3, 5, 9)
+
+    assert len(reader) == len(messages)
+    assert reader.get_ids() == [0, 1, 2, 3, 4]
+    assert frames.timestamp.tolist() == [m.timestamp for m in expected]
+    assert [bytes(m.data) for m in frames.to_messages()] == [m.data for m in expected]
+
+
+def test_model_stores_fd_payloads_by_width_class(model):
+    model.add_message(can.Message(arbitration_id=1, data=[1, 2]))
+    model.add_message(can.Message(arbitration_id=2, data=[3]))
+    fd = can.Message(arbitration_id=1, is_fd=True, data=bytes(range(20)))
+    model.add_frames(Frames.from_messages([fd]))
+
+    # Only the CAN FD id moves to wider storage, keeping its history
+    payloads = model.get_payloads(1)
+    assert payloads.shape[1] == 32
+    assert payloads[-2, :3].tolist() == [1, 2, 0]
+    assert bytes(payloads[-1, :20]) == fd.data
+    assert model.get_payloads(2).shape[1] == 8
+    assert list(model.get_data(1).channels) == ["S0", "S1", "S2"]
+
+
+def test_add_message_matches_add_frames():
+    messages = [
+        can.Message(arbitration_id=1, data=[1, 2]),
+        can.Message(arbitration_id=2, data=bytes(range(8))),
+        can.Message(arbitration_id=1, is_fd=True, data=bytes(range(12))),
+        can.Message(arbitration_id=2, data=[]),
+    ]
+    single, batch = PlotModel(), PlotModel()
+    for message in messages:
+        single.add_message(message)
+    batch.add_frames(Frames.from_messages(messages))
+
+    for can_id in (1, 2):
+        assert np.array_equal(single.get_payloads(can_id), batch.get_payloads(can_id))
+        assert np.array_equal(
+            single.get_data(can_id).y, batch.get_data(can_id).y, equal_nan=True
+        )
+
+
+def test_add_message_keys_each_channel_apart(model):
+    model.add_message(can.Message(arbitration_id=1, data=[1]))
+    model.add_message(can.Message(arbitration_id=1, data=[2]), channel=1)
+
+    assert model.get_ids() == [1, make_key(1, 1)]
+    assert model.get_payloads(make_key(1, 1))[-1, 0] == 2
+    with pytest.raises(ValueError):
+        model.add_message(can.Message(arbitration_id=1), channel=16)
+
+
+def test_capture_file_records_fd_payloads(tmp_path):
+    fd = can.Message(arbitration_id=1, is_fd=True, data=bytes(range(64)))
+    path = tmp_path / "capture.canx"
+    with CaptureWriter(path, width=64) as writer:
+        writer.write(Frames.from_messages([fd]))
+
+    reader = CaptureReader(path)
+    assert reader.width == 64
+    assert bytes(reader.query(1).to_messages()[0].data) == fd.data
+
+
+def test_capture_file_keeps_channels_apart(tmp_path):
+    frames = Frames.from_messages(
+        [can.Message(timestamp=i, arbitration_id=0x10, data=[i]) for i in range(6)]
+    )
+    path = tmp_path / "capture.canx"
+    with CaptureWriter(path) as writer:
+        writer.write(frames[::2])
+        writer.write(frames[1::2].with_channel(1))
+
+    reader = CaptureReader(path)
+    assert reader.get_ids() == [0x10, make_key(1, 0x10)]
+    assert reader.query(0x10).timestamp.tolist() == [0, 2, 4]
+    assert reader.last(make_key(1, 0x10), 2).timestamp.tolist() == [3, 5]
+    assert reader.count(make_key(1, 0x10)) == 3
+
+
+def test_capture_file_indexes_unflushed_records_on_open(tmp_path):
+    path = tmp_path / "capture.canx"
+    writer = CaptureWriter(path, chunk_size=1000, flush_interval=60)
+    writer.write(Frames.from_messages([can.Message(arbitration_id=7, data=b"\x01")]))
+    writer._file.flush()
+
+    assert CaptureReader(path).count(7) == 1
+    writer.close()
+
+
+def test_log_file_returns_window_ending_at_timestamp():
+    messages = list(can.LogReader(LOG_FILE))
+    log = LogFile.open(LOG_FILE, chunk_size=1000)
+    try:
+        start, end = log.get_time_range()
+        middle = (start + end) / 2
+        can_id = messages[0].arbitration_id
+        expected = [
+            m.timestamp
+            for m in messages
+            if m.arbitration_id == can_id and m.timestamp <= middle
+        ]
+
+        assert log.last(can_id, 50, middle).timestamp.tolist() == expected[-50:]
+    finally:
+        log.close()
+
+    assert not log.path.exists()
+
+
+def test_log_file_removes_conversion_of_unreadable_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "tmp"))
+    (tmp_path / "tmp").mkdir()
+    log = tmp_path / "log.unknown"
+    log.write_text("")
+
+    with pytest.raises(ValueError):
+        LogFile.open(log)
+
+    assert not list((tmp_path / "tmp").iterdir())
+
+
+def test_bus_statistics_batches_match_single_frames():
+    messages = [
+        can.Message(
+            timestamp=index * 0.01 + (index % 3) * 1e-3,
+            arbitration_id=index % 4,
+            data=bytes([index % 5]) * (8 if index % 7 else 4),
+        )
+        for index in range(200)
+    ]
+    single, batched = BusStatistics(capacity=2), BusStatistics(capacity=2)
+    for message in messages:
+        single.add(message.arbitration_id, message.timestamp, message.data)
+    for start in range(0, len(messages), 30):
+        batched.extend(Frames.from_messages(messages[start : start + 30]))
+
+    statistics = single.snapshot()
+    for field in statistics.dtype.names:
+        assert np.allclose(statistics[field], batched.snapshot()[field])
+
+    record = statistics[statistics["arbitration_id"] == 1][0]
+    intervals = np.diff([m.timestamp for m in messages if m.arbitration_id == 1])
+    assert record["count"] == 50
+    assert record["period"] == pytest.approx(intervals.mean())
+    assert record["jitter"] == pytest.approx(intervals.std(ddof=1))
+    assert record["rate"] == pytest.approx(1 / intervals.mean())
+
+
+def test_bus_statistics_compare_payloads_across_add_and_extend():
+    payloads = [b"\x01", b"\x01", b"\x03", b"\x03", b"\x01", b"\x01"]
+    statistics = BusStatistics()
+    for index, data in enumerate(payloads):
+        if index % 2:
+            message = can.Message(timestamp=index, arbitration_id=1, data=data)
+            statistics.extend(Frames.from_messages([message]))
+        else:
+            statistics.add(1, index, data)
+
+    assert statistics.snapshot()["payload_changes"].tolist() == [2]
+    assert statistics.get_toggles()[1][0, 6] == pytest.approx(2 / 5)
+
+
+def test_model_counts_bit_toggles(model):
+    for index in range(11):
+        data = bytes([index % 2, 0, 0, 0, 0, 0, 0, 0x80 * (index >= 5)])
+        model.add_message(can.Message(timestamp=index, arbitration_id=7, data=data))
+    model.add_frames(
+        Frames.from_messages(
+            [can.Message(timestamp=index, arbitration_id=3) for index in range(3)]
+        )
+    )
+
+    ids, toggles = model.get_toggles()
+    assert ids.tolist() == [3, 7]
+    assert not toggles[0].any()
+    assert toggles[1, 7] == 1.0  # Least significant bit of byte 0
+    assert toggles[1, 56] == pytest.approx(0.1)  # Most significant bit of byte 7
+    assert np.count_nonzero(toggles[1]) == 2
+
+    model.reset_toggles()
+    assert not model.get_toggles()[1].any()
+
+
+def test_frame_filter_matches_like_can_filters():
+    frame_filter = FrameFilter.parse("0x100/0x7F0, 0x123\n0x200-0x2FF, 0x10/0x11")
+    ids = np.arange(0x800)
+
+    expected = [
+        any(
+            (can_id ^ f["can_id"]) & f["can_mask"] == 0
+            for f in frame_filter.to_can_filters()
+        )
+        for can_id in ids.tolist()
+    ]
+    assert frame_filter.matches(ids).tolist() == expected
+    assert [frame_filter.match(can_id) for can_id in ids.tolist()] == expected
+
+    with pytest.raises(ValueError):
+        FrameFilter.parse("0x100/")
+
+
+def test_model_filter_discards_frames(model):
+    model.set_filter(FrameFilter.parse("1-2"))
+    model.add_frames(
+        Frames.from_messages(
+            [can.Message(arbitration_id=can_id) for can_id in range(5)]
+        )
+    )
+    model.add_message(can.Message(arbitration_id=4))
+
+    assert sorted(model.get_ids()) == [1, 2]
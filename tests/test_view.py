@@ -0,0 +1,85 @@
+import can
+import dearpygui.dearpygui as dpg
+import numpy as np
+import pytest
+from can_explorer.plotting import convert_payloads, downsample
+
+
+def test_downsample_preserves_spikes():
+    payloads = np.zeros(2500)
+    payloads[1234] = 99
+    payloads[2000] = -5
+
+    plot_data = downsample(convert_payloads(payloads), width=100)
+    assert len(plot_data.x) == len(plot_data.y) <= 200
+    assert plot_data.y.max() == 99 and plot_data.y.min() == -5
+    assert np.all(np.diff(plot_data.x) >= 0)
+
+
+def test_downsample_skips_data_narrower_than_plot():
+    plot_data = convert_payloads(np.arange(100))
+    assert downsample(plot_data, width=100) is plot_data
+
+
+def test_plot_view_keeps_rows_in_ascending_order(app, view, tag):
+    for can_id in (5, 1, 9, 3):
+        view.plot.update(can_id, convert_payloads(np.arange(10)))
+
+    rows = view.plot.get_rows()
+    row_ids = [row.id for row in rows.values()]
+    children = dpg.get_item_children(tag.plot_tab, 1)
+    assert list(rows) == [1, 3, 5, 9]
+    assert [child for child in children if child in row_ids] == row_ids
+
+
+def test_plot_view_reuses_removed_rows(app, view):
+    view.plot.update(1, convert_payloads(np.arange(10)))
+    row = view.plot.get_rows()[1]
+
+    view.plot.clear()
+    view.plot.update(2, convert_payloads(np.arange(10)))
+    assert view.plot.get_rows() == {2: row}
+
+
+def test_plot_view_remove_requires_an_existing_row(app, view):
+    view.plot.add_rows(1, 3)
+    with pytest.raises(ValueError):
+        view.plot.remove(2)
+    with pytest.raises(ValueError):
+        view.plot.remove(4)
+
+    view.plot.remove(3)
+    assert view.plot.get_ids() == [1]
+
+
+def test_plot_view_only_binds_visible_rows(app, view, tag):
+    view.plot.add_rows(*range(1000))
+    assert view.plot.sync()
+
+    rows = view.plot.get_rows()
+    assert len(view.plot.get_ids()) == 1000
+    assert 0 < len(rows) < 50
+    assert list(rows) == list(range(len(rows)))
+
+
+def test_metrics_overlay_extends_footer(app, view, tag, controller):
+    height = dpg.get_item_height(tag.footer)
+    view.show_metrics(True)
+    view.set_metrics(controller.get_metrics())
+
+    assert dpg.get_item_height(tag.footer) > height
+    assert "frames 0" in dpg.get_value(tag.metrics_text)
+
+
+def test_statistics_view_sorts_rows(app, view, model, tag):
+    for can_id, count in ((3, 2), (1, 5), (2, 1)):
+        for index in range(count):
+            model.add_message(can.Message(timestamp=index, arbitration_id=can_id))
+
+    view.statistics.update(model.get_statistics())
+    assert [row[1] for row in view.statistics._text] == ["5", "1", "2"]
+
+    count_column = dpg.get_item_children(tag.statistics_table, 0)[1]
+    view.statistics.sort_callback(tag.statistics_table, [(count_column, -1)])
+    view.statistics.update(model.get_statistics())
+    assert [row[1] for row in view.statistics._text] == ["5", "2", "1"]